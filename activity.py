@@ -0,0 +1,166 @@
+# activity.py — Append-only activity log with hourly and daily rollups
+#
+# Connects, reconnects, disconnects, games played and words sent are
+# recorded in memory with record() and written in batches: each flush
+# appends one row per (hour, kind, user) to the activity log, and adds the
+# same counts to pre-aggregated per-hour and per-day rollups. /stats reads
+# only the rollups, so a query over any range costs at most a day's worth
+# of hour rows at each end plus one row per day in between, per kind.
+#
+# record() is process-wide like notifier.notify(): the controller installs
+# its ActivityLog, and worker processes install one that ships each batch
+# to the controller instead of the database.
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger("activity")
+
+CONNECT = "connect"
+RECONNECT = "reconnect"
+DISCONNECT = "disconnect"
+GAME = "game"
+WORD = "word"
+KINDS = (CONNECT, RECONNECT, DISCONNECT, GAME, WORD)
+
+HOUR = 3600
+DAY = 86400
+
+# (hour start in UNIX seconds, kind, user id or 0, count)
+Event = Tuple[int, str, int, int]
+
+
+def floor_to(ts: float, period: int) -> int:
+    """Start of the UTC hour / day (`period` seconds) containing `ts`."""
+    return int(ts) - int(ts) % period
+
+
+def ceil_to(ts: float, period: int) -> int:
+    start = floor_to(ts, period)
+    return start if start == ts else start + period
+
+
+def rollups(events: List[Event]) -> Dict[Tuple[int, int, str], int]:
+    """Counts to add per (period, bucket start, kind) for a batch of events."""
+    out: Dict[Tuple[int, int, str], int] = Counter()
+    for hour, kind, _, n in events:
+        out[HOUR, hour, kind] += n
+        out[DAY, floor_to(hour, DAY), kind] += n
+    return out
+
+
+class ActivityLog:
+    def __init__(
+        self,
+        save: Callable[[List[Event]], Awaitable[object]],
+        counts: Optional[Callable[[int, int, int], Awaitable[Dict[str, int]]]] = None,
+        interval: float = 10.0,
+    ):
+        """
+        save      coroutine function storing a batch of events with their rollups
+                  (e.g. DBSessionManager.save_activity)
+        counts    coroutine function (period, start, end) -> {kind: total} over the
+                  rollups (e.g. DBSessionManager.activity_counts); None for a
+                  write-only log, as in worker processes
+        interval  seconds between flushes
+        """
+        self.save = save
+        self._counts = counts
+        self.interval = interval
+        self._pending: Dict[Tuple[int, str, int], int] = Counter()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    # ------------------------ Producers ------------------------
+    def record(self, kind: str, user_id: Optional[int] = None, n: int = 1, at: Optional[float] = None):
+        """Count `n` events of `kind`; never blocks. Same-hour events are merged in memory."""
+        self._pending[floor_to(time.time() if at is None else at, HOUR), kind, user_id or 0] += n
+
+    def record_many(self, events: List[Event]):
+        for hour, kind, user_id, n in events:
+            self._pending[hour, kind, user_id] += n
+
+    # ------------------------ Writes ------------------------
+    async def flush(self):
+        """Write everything recorded so far; kept in memory for the next flush on failure."""
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, Counter()
+            events = [(hour, kind, user_id, n) for (hour, kind, user_id), n in batch.items()]
+            try:
+                await self.save(events)
+            except Exception as e:
+                log.warning(f"⚠️ Could not write {len(events)} activity rows: {e}")
+                self.record_many(events)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    # ------------------------ Reads ------------------------
+    async def counts(self, start: float, end: float) -> Dict[str, int]:
+        """Totals per kind over [start, end), rounded out to whole hours.
+
+        Whole days come from the daily rollup and the partial days at
+        either end from the hourly one; unflushed events are included.
+        """
+        if self._counts is None:
+            raise RuntimeError("this activity log has no reader")
+        start, end = floor_to(start, HOUR), ceil_to(end, HOUR)
+        first_day, last_day = ceil_to(start, DAY), floor_to(end, DAY)
+        if first_day < last_day:
+            ranges = [(DAY, first_day, last_day), (HOUR, start, first_day), (HOUR, last_day, end)]
+        else:
+            ranges = [(HOUR, start, end)]
+        totals: Dict[str, int] = Counter()
+        # Not while a batch is between memory and the database
+        async with self._lock:
+            for period, lo, hi in ranges:
+                if lo < hi:
+                    totals.update(await self._counts(period, lo, hi))
+            for (hour, kind, _), n in self._pending.items():
+                if start <= hour < end:
+                    totals[kind] += n
+        return {kind: totals.get(kind, 0) for kind in KINDS}
+
+    # ------------------------ Lifecycle ------------------------
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(), name="activity-log")
+
+    async def stop(self):
+        """Stop the periodic flush and write what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+# ------------------------ Process-wide sink ------------------------
+_log: Optional[ActivityLog] = None
+
+
+def install(activity_log: Optional[ActivityLog]):
+    """Route record() to `activity_log`; None drops events."""
+    global _log
+    _log = activity_log
+
+
+def record(kind: str, user_id: Optional[int] = None, n: int = 1):
+    """Count an event in this process's activity log, if one is installed."""
+    if _log is not None:
+        _log.record(kind, user_id, n)
+
+
+def record_many(events: List[Event]):
+    """Add a batch flushed by another process's log (see userbots/workers.py)."""
+    if _log is not None:
+        _log.record_many(events)
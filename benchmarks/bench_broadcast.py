@@ -0,0 +1,87 @@
+# benchmarks/bench_broadcast.py — Broadcaster throughput against a fake client
+#
+# The fake client answers after a random network latency, occasionally
+# raises FloodWait, and rejects a share of recipients as blocked.
+#
+# Usage: python -m benchmarks.bench_broadcast [recipients] [rate]
+import asyncio
+import random
+import sys
+import time
+
+from broadcast import Broadcaster, BroadcastJob
+
+
+class FloodWait(Exception):
+    def __init__(self, value):
+        super().__init__(f"wait {value}s")
+        self.value = value
+
+
+class UserIsBlocked(Exception):
+    pass
+
+
+class FakeClient:
+    def __init__(self, latency=(0.03, 0.12), flood_every=400, blocked_share=0.02, seed=1):
+        self.rng = random.Random(seed)
+        self.latency = latency
+        self.flood_every = flood_every
+        self.blocked = set()
+        self.blocked_share = blocked_share
+        self.calls = 0
+        self.delivered = set()
+
+    async def copy_message(self, user_id):
+        self.calls += 1
+        await asyncio.sleep(self.rng.uniform(*self.latency))
+        if self.flood_every and self.calls % self.flood_every == 0:
+            raise FloodWait(1)
+        if user_id in self.blocked or self.rng.random() < self.blocked_share:
+            self.blocked.add(user_id)
+            raise UserIsBlocked()
+        self.delivered.add(user_id)
+
+
+async def serial(client, users):
+    """The previous broadcast loop."""
+    success = failed = 0
+    for user_id in users:
+        try:
+            await client.copy_message(user_id)
+            success += 1
+            await asyncio.sleep(0.06)
+        except Exception:
+            failed += 1
+    return success, failed
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 25.0
+    users = list(range(1, n + 1))
+
+    client = FakeClient()
+    start = time.perf_counter()
+    sent, failed = await serial(client, users)
+    elapsed = time.perf_counter() - start
+    print(f"serial       {n / elapsed:7.1f} msg/s  sent={sent} failed={failed} ({elapsed:.1f}s)")
+
+    client = FakeClient()
+    pruned = []
+
+    async def prune(user_id):
+        pruned.append(user_id)
+
+    broadcaster = Broadcaster(client.copy_message, rate=rate, concurrency=10, prune=prune)
+    start = time.perf_counter()
+    job = await broadcaster.run(BroadcastJob(0, 0, users))
+    elapsed = time.perf_counter() - start
+    print(
+        f"Broadcaster  {n / elapsed:7.1f} msg/s  sent={job.sent} failed={job.failed} "
+        f"pruned={job.pruned} ({elapsed:.1f}s, limit {rate:.0f}/s)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
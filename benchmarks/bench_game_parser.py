@@ -0,0 +1,27 @@
+# benchmarks/bench_game_parser.py — messages parsed per second by parse_message
+#
+# Times the message corpus of tests/test_game_parser.py, which checks every
+# sample's parsed fields (python -m pytest tests/test_game_parser.py).
+#
+# Usage: python -m benchmarks.bench_game_parser [iterations]
+import sys
+import time
+
+from tests.test_game_parser import CORPUS
+from userbots.game_parser import parse_message
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    texts = [text for text, _, _ in CORPUS]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in texts:
+            parse_message(text)
+    elapsed = time.perf_counter() - start
+    total = iterations * len(texts)
+    print(f"Parsed {total} messages in {elapsed:.2f}s — {total / elapsed:,.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
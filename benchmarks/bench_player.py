@@ -0,0 +1,128 @@
+# benchmarks/bench_player.py — Load test of start_game_logic against simulated games
+#
+# Runs N simulated userbots (real start_game_logic handlers on FakeClients)
+# in N / players chats, each hosted by a simulator.GameHost, for a fixed
+# time and reports accepted turns per second, prompt-to-answer and lookup
+# latency percentiles, messages parsed vs. copies skipped by the shared
+# dispatcher, event-loop lag and memory.
+#
+# By default answers are sent without a scheduled delay, so the run measures
+# the player's own cost; --realistic keeps the configured answer timing.
+#
+# Usage: python -m benchmarks.bench_player [--userbots 200] [--seconds 20] [--words words.txt]
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+import config
+from benchmarks.bench_strategy import load_words
+from benchmarks.simulator import FakeClient, FakeUser, GameHost, HostStats, Network
+from metrics import resident_memory
+from userbots import wordchain_player
+from userbots.turn_scheduler import TurnScheduler
+from userbots.word_index import WordIndex
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def fmt_ms(values):
+    return " ".join(f"p{int(q * 100)} {percentile(values, q) * 1000:7.2f}ms" for q in (0.5, 0.95, 0.99))
+
+
+async def measure_lag(samples, interval=0.05):
+    """Record how late each `interval` sleep wakes up (event-loop lag)."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--userbots", type=int, default=200)
+    parser.add_argument("--players", type=int, default=2, help="userbots per game chat")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--words", default="words.txt")
+    parser.add_argument("--rtt", type=float, default=0.0, help="max simulated send round trip (s)")
+    parser.add_argument("--realistic", action="store_true", help="use the configured answer timing")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)  # per-turn log lines would dominate the run
+
+    index = WordIndex.build(load_words(args.words, n=50_000))
+    rss_before = resident_memory()
+
+    # Time every lookup exactly (the metrics histogram only keeps buckets)
+    lookups = []
+    get_word = wordchain_player.get_word
+
+    def timed_get_word(*a, **kw):
+        start = time.perf_counter()
+        try:
+            return get_word(*a, **kw)
+        finally:
+            lookups.append(time.perf_counter() - start)
+
+    wordchain_player.get_word = timed_get_word
+    config.WORDCHAIN_GROUP = None
+
+    network = Network()
+    stats = HostStats()
+    schedulers = []
+    for i in range(args.userbots):
+        user = FakeUser(100_000 + i, f"Bot{i:05d}")
+        client = FakeClient(network, user, rtt=(0.0, args.rtt))
+        if args.realistic:
+            turns = TurnScheduler(config.TURN_DELAY_FRACTION, config.TURN_MIN_DELAY, config.TURN_DEFAULT_LIMIT)
+        else:
+            turns = TurnScheduler(fraction=0.0, min_delay=0.0)
+        schedulers.append(turns)
+        network.join(-1_000_000 - i // args.players, client)
+        await wordchain_player.start_game_logic(client, index, turns)
+
+    hosts = []
+    for chat_id, clients in network.chats.items():
+        players = [c.user for c in clients]
+        if len(players) < 2:
+            continue
+        hosts.append(GameHost(network, chat_id, players, index, stats, seed=chat_id,
+                              timeout=30 if args.realistic else 1))
+    print(f"{args.userbots} userbots in {len(hosts)} games, {len(index)} words; running {args.seconds:.0f}s…")
+
+    lag = []
+    tasks = [asyncio.create_task(measure_lag(lag))]
+    # Stagger game starts so rounds don't all begin on the same tick
+    for host in hosts:
+        tasks.append(asyncio.create_task(host.run()))
+        await asyncio.sleep(random.uniform(0, 0.002))
+    started = time.perf_counter()
+    await asyncio.sleep(args.seconds)
+    elapsed = time.perf_counter() - started
+    rss_after = resident_memory()
+    for host in hosts:
+        host.stop()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for turns in schedulers:
+        turns.cancel_all()
+
+    print(f"turns/s      {stats.accepted / elapsed:10.1f}   (accepted {stats.accepted}, "
+          f"rejected {stats.rejected}, timeouts {stats.timeouts}, rounds {stats.rounds})")
+    print(f"answer       {fmt_ms(stats.answer_latency)}")
+    print(f"lookup       {fmt_ms(lookups)}")
+    dispatcher = wordchain_player.get_dispatcher(index)
+    print(f"messages     parsed {dispatcher.parsed}, duplicates skipped {dispatcher.duplicates}")
+    print(f"loop lag     {fmt_ms(lag)}   max {max(lag, default=0) * 1000:.2f}ms")
+    print(f"memory       {rss_after / 2**20:.1f} MiB RSS, "
+          f"{(rss_after - rss_before) / max(args.userbots, 1) / 1024:.1f} KiB per userbot")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+# benchmarks/bench_startup.py — Controller import time and time to first handled command
+#
+# Every run starts a fresh interpreter, since a warm module cache would hide
+# exactly the cost being measured, and times:
+#
+#   import    `import bot`
+#   services  init_services() plus the session store's warm()
+#   command   /start handled, from process launch to the reply
+#
+# It also lists the heavy modules that were loaded by then. None of them
+# should be until a userbot runs or MongoDB is configured. The database is a
+# throwaway SQLite file and Telegram is never contacted.
+#
+# Usage: python -m benchmarks.bench_startup [runs]
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY = ("telethon", "motor", "pymongo", "multiprocessing", "userbots.wordchain_player")
+
+
+class _Message:
+    """Just enough of a pyrogram Message for start_cmd."""
+
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+    async def reply_photo(self, photo, caption="", **kwargs):
+        self.replies.append(caption)
+
+
+def child():
+    started = time.perf_counter()
+    import bot
+    imported = time.perf_counter()
+
+    async def first_command():
+        bot.init_services()
+        await bot.db.warm()
+        ready = time.perf_counter()
+        message = _Message()
+        await bot.start_cmd(bot.app, message)
+        assert message.replies, "/start sent no reply"
+        await bot.db.close()
+        return ready
+
+    ready = asyncio.run(first_command())
+    print(json.dumps({
+        "import": imported - started,
+        "services": ready - imported,
+        "handled_at": time.time(),
+        "heavy": [name for name in HEAVY if name in sys.modules],
+    }))
+
+
+def run_once(env) -> dict:
+    launched = time.time()
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["command"] = result.pop("handled_at") - launched
+    return result
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DB_PATH=os.path.join(tmp, "sessions.db"),
+            MONGO_URI="", MONGO_URL="",
+            USERBOT_WORKERS="0",
+            START_IMAGE="",
+        )
+        results = [run_once(env) for _ in range(runs)]
+
+    for key in ("import", "services", "command"):
+        values = sorted(r[key] * 1000 for r in results)
+        print(f"{key:<9} median {statistics.median(values):8.1f} ms   min {values[0]:8.1f} ms   max {values[-1]:8.1f} ms")
+    heavy = sorted({name for r in results for name in r["heavy"]})
+    print(f"heavy modules loaded: {', '.join(heavy) or 'none'}")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+    else:
+        main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_strategy.py — Offline self-play of word-selection strategies
+#
+# Two players alternate words from one dictionary; each word must start with
+# the previous word's last letter and may not repeat. A player who has no
+# valid word loses. As in the real game, the minimum length grows every
+# LENGTH_STEP turns. Every strategy plays `games` games against "random".
+#
+# Usage: python -m benchmarks.bench_strategy [words.txt] [games]
+import random
+import sys
+import time
+
+from userbots.game_state import UsedWords
+from userbots.strategy import STRATEGIES, choose_word, difficulty_table
+from userbots.word_index import WordIndex
+
+# English-like letter weights for the synthetic dictionary, so some letters
+# are genuinely hard to continue from (x, q, z, ...)
+LETTER_WEIGHTS = {
+    "a": 82, "b": 15, "c": 28, "d": 43, "e": 127, "f": 22, "g": 20, "h": 61, "i": 70,
+    "j": 2, "k": 8, "l": 40, "m": 24, "n": 67, "o": 75, "p": 19, "q": 1, "r": 60,
+    "s": 63, "t": 91, "u": 28, "v": 10, "w": 24, "x": 2, "y": 20, "z": 1,
+}
+LENGTH_STEP = 20
+MAX_TURNS = 300  # longer games count as draws
+
+
+def load_words(path, n=3000, seed=7):
+    """`path` if it exists, else `n` synthetic words (small, so games end)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [w.strip().lower() for w in f if w.strip()]
+    except FileNotFoundError:
+        pass
+    rng = random.Random(seed)
+    letters, weights = zip(*LETTER_WEIGHTS.items())
+    return list({"".join(rng.choices(letters, weights, k=rng.randint(3, 10))) for _ in range(n)})
+
+
+def play(index, first, second, rng):
+    """Return (winner_seat, turns); winner_seat is 0/1, or None on MAX_TURNS."""
+    used = UsedWords(index)
+    strategies = (first, second)
+    word = index.word(rng.randrange(len(index)))
+    used.add(word)
+    for turn in range(MAX_TURNS):
+        seat = turn % 2
+        min_len = 3 + turn // LENGTH_STEP
+        word = choose_word(index, strategies[seat], word[-1], min_len=min_len, used=used)
+        if word is None:
+            return 1 - seat, turn
+        used.add(word)
+    return None, MAX_TURNS
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "words.txt"
+    games = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    index = WordIndex.build(load_words(path))
+    start = time.perf_counter()
+    difficulty_table(index)
+    print(f"{len(index)} words, difficulty table in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+    print(f"{'strategy':<12} {'win rate':>9} {'draws':>7} {'turns/game':>11} {'my turns/win':>13}")
+
+    for strategy in STRATEGIES:
+        rng = random.Random(1)
+        random.seed(1)
+        wins = draws = turns = win_turns = 0
+        for g in range(games):
+            seat = g % 2  # alternate who moves first
+            pair = (strategy, "random") if seat == 0 else ("random", strategy)
+            winner, n = play(index, *pair, rng)
+            turns += n
+            draws += winner is None
+            if winner == seat:
+                wins += 1
+                win_turns += (n + 1 - seat) // 2  # moves made by `strategy`
+        print(
+            f"{strategy:<12} {wins / games:>8.1%} {draws / games:>7.1%} {turns / games:>11.1f} "
+            f"{(win_turns / wins if wins else 0):>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_word_index.py — WordIndex.pick vs. the old linear scan
+#
+# Usage: python -m benchmarks.bench_word_index [words.txt] [lookups]
+import random
+import string
+import sys
+import time
+
+from userbots.word_index import WordIndex
+
+
+def load_words(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [w.strip().lower() for w in f if w.strip()]
+    except (FileNotFoundError, TypeError):
+        rng = random.Random(7)
+        letters = string.ascii_lowercase
+        return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 14))) for _ in range(300_000)]
+
+
+def scan_word(dictionary, prefix, include="", banned=None, min_len=3):
+    """The previous get_word implementation, kept here for comparison."""
+    banned = banned or []
+    valid = [
+        w for w in dictionary
+        if w.startswith(prefix)
+        and (not include or include in w)
+        and all(bl not in w for bl in banned)
+        and len(w) >= min_len
+    ]
+    return random.choice(valid) if valid else None
+
+
+def make_queries(n):
+    rng = random.Random(42)
+    letters = string.ascii_lowercase
+    queries = []
+    for _ in range(n):
+        prefix = rng.choice(letters)
+        include = rng.choice(letters) if rng.random() < 0.5 else ""
+        banned = [c for c in rng.sample(letters, rng.randint(0, 4)) if c not in (prefix, include)]
+        queries.append((prefix, include, banned, rng.randint(3, 8)))
+    return queries
+
+
+def bench(label, fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(*q)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {len(queries):>6} lookups  {elapsed * 1000 / len(queries):8.3f} ms/lookup")
+    return elapsed
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "words.txt"
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    words = load_words(path)
+
+    start = time.perf_counter()
+    index = WordIndex.build(words)
+    print(f"Indexed {len(index)} words in {time.perf_counter() - start:.2f}s ({index.nbytes() // 1024} KiB)")
+
+    queries = make_queries(lookups)
+    scan = bench("linear scan", lambda *q: scan_word(words, *q), queries)
+    indexed = bench("WordIndex", index.pick, queries)
+    print(f"Speedup: {scan / indexed:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
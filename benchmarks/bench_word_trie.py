@@ -0,0 +1,80 @@
+# benchmarks/bench_word_trie.py — WordTrie vs. WordIndex on pattern turns
+#
+# Queries mimic the game variants: two- or three-letter prefixes, substring
+# includes, exact / maximum lengths and banned letters. Both engines answer
+# every query; a result from either that breaks a constraint, or an empty
+# answer where the other found a word, fails the run before timing.
+#
+# Usage: python -m benchmarks.bench_word_trie [words.txt] [lookups]
+import random
+import sys
+import time
+
+from benchmarks.bench_word_index import load_words
+from userbots.word_index import WordIndex
+from userbots.word_trie import WordTrie
+
+
+def make_queries(words, n):
+    rng = random.Random(42)
+    queries = []
+    for _ in range(n):
+        word = rng.choice(words)
+        other = rng.choice(words)
+        prefix = word[:rng.randint(2, 3)]
+        start = rng.randrange(len(other))
+        include = other[start:start + rng.randint(2, 3)] if rng.random() < 0.6 else ""
+        banned = [c for c in rng.sample("etaoinshrdlu", rng.randint(0, 3)) if c not in prefix + include]
+        min_len, max_len = rng.randint(3, 6), None
+        roll = rng.random()
+        if roll < 0.3:
+            min_len = max_len = rng.randint(4, 9)
+        elif roll < 0.5:
+            max_len = min_len + rng.randint(0, 4)
+        queries.append((prefix, include, banned, min_len, None, 1, max_len))
+    return queries
+
+
+def check(index, engines, queries):
+    for q in queries:
+        prefix, include, banned, min_len, _, _, max_len = q
+        results = [engine.sample(*q) for engine in engines]
+        for ids in results:
+            for i in ids:
+                w = index.word(i)
+                assert w.startswith(prefix) and include in w and not any(b in w for b in banned), (q, w)
+                assert min_len <= len(w) <= (max_len or len(w)), (q, w)
+        assert len({bool(ids) for ids in results}) == 1, f"engines disagree on {q}"
+
+
+def bench(label, fn, queries):
+    start = time.perf_counter()
+    hits = sum(1 for q in queries if fn(*q))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {len(queries):>6} lookups  {elapsed * 1000 / len(queries):8.3f} ms/lookup  ({hits} answered)")
+    return elapsed
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "words.txt"
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    words = load_words(path)
+
+    start = time.perf_counter()
+    index = WordIndex.build(words)
+    print(f"WordIndex  {len(index)} words in {time.perf_counter() - start:.2f}s ({index.nbytes() // 1024} KiB)")
+    start = time.perf_counter()
+    trie = WordTrie.build(index)
+    print(f"WordTrie   {len(trie)} nodes in {time.perf_counter() - start:.2f}s (+{trie.nbytes() // 1024} KiB)")
+
+    queries = make_queries(sorted(set(words)), lookups)
+    check(index, (index, trie), queries[:500])
+    print("Results agree")
+
+    scan = bench("WordIndex", index.sample, queries)
+    indexed = bench("WordTrie", trie.sample, queries)
+    print(f"Speedup: {scan / indexed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# benchmarks/simulator.py — Offline WordChain game host and fake Telethon client
+#
+# GameHost plays the game bot's side of one chat: it announces rounds and
+# turns in the same wording as the real bot ("Turn: ...", "start with",
+# "include", "Banned letters", "at least N letters", "You have Ns to
+# answer"), checks answers against the dictionary, eliminates players who
+# time out and starts a new round when one player is left.
+#
+# FakeClient is just enough of a TelegramClient for start_game_logic():
+# get_me(), on(event) and send_message(). Every message posted in a chat is
+# delivered to every client in it, each handler call in its own task, as
+# Telethon does.
+import asyncio
+import random
+import string
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from userbots.word_index import WordIndex
+
+
+class FakeUser:
+    def __init__(self, user_id: int, first_name: str, last_name: Optional[str] = None):
+        self.id = user_id
+        self.first_name = first_name
+        self.last_name = last_name
+
+
+class FakeMessage:
+    def __init__(self, text: str):
+        self.date = datetime.now(timezone.utc)
+        self.message = text
+
+
+class FakeEvent:
+    def __init__(self, chat_id: int, text: str, sender: Optional[FakeUser]):
+        self.chat_id = chat_id
+        self.raw_text = text
+        self.sender = sender
+        self.sender_id = sender.id if sender else None
+        self.message = FakeMessage(text)
+
+    async def get_sender(self):
+        return self.sender
+
+
+class FakeClient:
+    def __init__(self, network, user: FakeUser, rtt=(0.0, 0.0)):
+        self.network = network
+        self.user = user
+        self.rtt = rtt
+        self.handlers = []
+        self.sent = 0
+
+    async def get_me(self):
+        return self.user
+
+    def on(self, _event_builder):
+        def decorator(fn):
+            self.handlers.append(fn)
+            return fn
+        return decorator
+
+    def deliver(self, event: FakeEvent):
+        for handler in self.handlers:
+            self.network.track(asyncio.create_task(handler(event)))
+
+    async def send_message(self, chat_id: int, text: str):
+        if self.rtt[1]:
+            await asyncio.sleep(random.uniform(*self.rtt) / 2)
+        self.sent += 1
+        self.network.post(chat_id, text, sender=self.user)
+        if self.rtt[1]:
+            await asyncio.sleep(random.uniform(*self.rtt) / 2)
+
+
+class Network:
+    """Routes chat messages between the game hosts and the fake clients."""
+
+    def __init__(self):
+        self.chats: Dict[int, List[FakeClient]] = {}
+        self.hosts: Dict[int, "GameHost"] = {}
+        self._tasks = set()
+
+    def track(self, task: asyncio.Task):
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def join(self, chat_id: int, client: FakeClient):
+        self.chats.setdefault(chat_id, []).append(client)
+
+    def post(self, chat_id: int, text: str, sender: Optional[FakeUser] = None):
+        event = FakeEvent(chat_id, text, sender)
+        for client in self.chats.get(chat_id, ()):
+            client.deliver(event)
+        host = self.hosts.get(chat_id)
+        if host is not None and sender is not None:
+            host.on_answer(sender, text)
+
+
+class HostStats:
+    def __init__(self):
+        self.turns = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.rounds = 0
+        self.answer_latency: List[float] = []  # prompt posted → answer received
+
+
+class GameHost:
+    """Runs rounds in one chat until stop() is called.
+
+    time_limit   seconds stated in each turn prompt
+    timeout      seconds the host actually waits (shorter, to keep runs fast)
+    afk_pause    pause after an elimination, matching the player's AFK back-off
+    """
+
+    def __init__(
+        self,
+        network: Network,
+        chat_id: int,
+        players: List[FakeUser],
+        index: WordIndex,
+        stats: HostStats,
+        time_limit: int = 30,
+        timeout: float = 5.0,
+        afk_pause: float = 5.5,
+        length_step: int = 10,
+        seed: Optional[int] = None,
+    ):
+        self.network = network
+        self.chat_id = chat_id
+        self.players = players
+        self.index = index
+        self.stats = stats
+        self.time_limit = time_limit
+        self.timeout = timeout
+        self.afk_pause = afk_pause
+        self.length_step = length_step
+        self.rng = random.Random(seed)
+        self._expected: Optional[FakeUser] = None
+        self._answer: Optional[asyncio.Future] = None
+        self._stopped = False
+        network.hosts[chat_id] = self
+
+    def on_answer(self, sender: FakeUser, text: str):
+        if sender is self._expected and self._answer is not None and not self._answer.done():
+            self._answer.set_result(text.strip().lower())
+
+    def _prompt(self, player: FakeUser, nxt: FakeUser, prefix: str, include: str, banned: List[str], min_len: int):
+        rule = f"Your word must start with {prefix.upper()}"
+        if include:
+            rule += f", include {include.upper()}"
+        lines = [f"Turn: {player.first_name} (Next: {nxt.first_name})", f"{rule} and include at least {min_len} letters."]
+        if banned:
+            lines.append(f"Banned letters: {', '.join(b.upper() for b in banned)}")
+        lines.append(f"You have {self.time_limit}s to answer.")
+        lines.append(f"Players remaining: {len(self.players)}")
+        return "\n".join(lines)
+
+    def _valid(self, word: str, prefix: str, include: str, banned: List[str], min_len: int, used: set) -> bool:
+        return (
+            word.startswith(prefix) and include in word and len(word) >= min_len
+            and not any(b in word for b in banned) and word not in used and word in self.index
+        )
+
+    async def run(self):
+        while not self._stopped:
+            await self.play_round()
+
+    def stop(self):
+        """Finish after the current turn (a cancel can be lost inside wait_for)."""
+        self._stopped = True
+
+    async def play_round(self):
+        alive = list(self.players)
+        used = set()
+        self.stats.rounds += 1
+        self.network.post(self.chat_id, f"Starting a new game with {len(alive)} players!")
+        await asyncio.sleep(0)
+        word = self.index.word(self.rng.randrange(len(self.index)))
+        turn = 0
+        while len(alive) > 1 and not self._stopped:
+            player, nxt = alive[turn % len(alive)], alive[(turn + 1) % len(alive)]
+            prefix = word[-1] if word[-1] in string.ascii_lowercase else self.rng.choice(string.ascii_lowercase)
+            include = self.rng.choice(string.ascii_lowercase) if self.rng.random() < 0.2 else ""
+            banned = [c for c in self.rng.sample(string.ascii_lowercase, self.rng.randint(0, 2))
+                      if c not in (prefix, include)] if self.rng.random() < 0.3 else []
+            min_len = 3 + turn // self.length_step
+
+            loop = asyncio.get_running_loop()
+            self._expected, self._answer = player, loop.create_future()
+            posted = time.perf_counter()
+            self.stats.turns += 1
+            self.network.post(self.chat_id, self._prompt(player, nxt, prefix, include, banned, min_len))
+            try:
+                answer = await asyncio.wait_for(self._answer, self.timeout)
+            except asyncio.TimeoutError:
+                answer = None
+            self._expected = self._answer = None
+
+            if answer is not None and self._valid(answer, prefix, include, banned, min_len, used):
+                self.stats.accepted += 1
+                self.stats.answer_latency.append(time.perf_counter() - posted)
+                used.add(answer)
+                word = answer
+                turn += 1
+                continue
+
+            if answer is None:
+                self.stats.timeouts += 1
+                self.network.post(self.chat_id, f"No word given. {player.first_name} is eliminated!")
+            else:
+                self.stats.rejected += 1
+                self.network.post(self.chat_id, f"{answer} is not accepted. {player.first_name} is eliminated!")
+            alive.remove(player)
+            await asyncio.sleep(self.afk_pause)
+
+        if self._stopped:
+            return
+        self.network.post(self.chat_id, f"{alive[0].first_name} won the game out of {len(self.players)} players!")
+        await asyncio.sleep(0)
@@ -1,14 +1,27 @@
-# bot.py - Controller bot using Pyrogram (SQLite version) (Pyrogram v2.x compatible)
+# bot.py - Controller bot using Pyrogram (async MongoDB / SQLite storage) (Pyrogram v2.x compatible)
 import asyncio
+import html
 import logging
-from typing import List
+from datetime import datetime, timezone
+from typing import List, Optional
 
-from pyrogram import Client, filters
-from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton, Message
+from pyrogram import Client, filters, idle
+from pyrogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, Message
 from pyrogram.enums import ParseMode  # ✅ Required for Pyrogram v2+
 
+from activity import CONNECT, DAY, DISCONNECT, GAME, RECONNECT, WORD, ActivityLog, install as install_activity, record
+from broadcast import Broadcaster, BroadcastJob
 from db import DBSessionManager
-from userbots.wordchain_player import start_userbot
+import loop_monitor
+import metrics
+from notifier import LogNotifier, install as install_notifier, notify
+from session_cache import SessionCache
+from userbots.dictionary import watch_dictionary
+from userbots.learned_words import compact as compact_learned_words
+from user_profiles import ProfileCache
+from userbots.settings import KEYS, LATENCY_PROFILES, PlayerSettings, settings_for
+from userbots.strategy import STRATEGIES
+from userbots.supervisor import DEFAULT_PERMANENT, DEFAULT_RUNNER, UserbotSupervisor
 import config
 
 # ------------------------ Logging ------------------------
@@ -23,10 +36,60 @@ app = Client(
     api_hash=config.API_HASH,
 )
 
-db = DBSessionManager(config.DB_PATH)
+
+# ------------------------ Services ------------------------
+# Created by init_services() at startup, not on import: importing bot opens
+# no database, and the storage backend, worker pool and Telethon player are
+# only imported once they are actually used.
+db: Optional[SessionCache] = None
+log_notifier: Optional[LogNotifier] = None
+activity_log: Optional[ActivityLog] = None
+profiles_cache: Optional[ProfileCache] = None
+supervisor = None
+
+
+# Every log-group message goes through one batched, rate-limited notifier
+async def _send_log(text: str):
+    await app.send_message(config.LOG_GROUP_ID, text, parse_mode=ParseMode.HTML, disable_web_page_preview=True)
+
+
+def init_services():
+    """Create the session store, log notifier, activity log, profile cache and userbot supervisor once."""
+    global db, log_notifier, activity_log, profiles_cache, supervisor
+    if db is not None:
+        return
+    db = SessionCache(DBSessionManager(config.DB_PATH), max_entries=config.SESSION_CACHE_SIZE)
+
+    log_notifier = LogNotifier(_send_log, window=config.LOG_BATCH_WINDOW)
+    install_notifier(log_notifier.notify)
+
+    # Connects, games and words for /stats, written to the database in batches
+    activity_log = ActivityLog(db.save_activity, db.activity_counts, interval=config.ACTIVITY_FLUSH_INTERVAL)
+    install_activity(activity_log)
+
+    # Display names for /listusers, resolved in batches and refreshed in the background
+    profiles_cache = ProfileCache(app.get_users, ttl=config.PROFILE_CACHE_TTL)
+
+    # Owns every running userbot, either in this process or sharded over workers
+    if config.USERBOT_WORKERS > 0:
+        from userbots.workers import WorkerPool
+        supervisor = WorkerPool(config.USERBOT_WORKERS, warmup=config.WORDS_PATH, on_state=db.mark_running)
+    else:
+        supervisor = UserbotSupervisor(DEFAULT_RUNNER, DEFAULT_PERMANENT, on_state=db.mark_running)
 
 
 # ------------------------ Helpers ------------------------
+_background = set()
+
+
+def spawn(coro) -> asyncio.Task:
+    """Run `coro` in the background, keeping a reference until it finishes."""
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+
 def mask_session(session: str, keep_chars: int = 6) -> str:
     """Return a masked preview of the session token."""
     if not session:
@@ -80,17 +143,7 @@ async def start_cmd(client: Client, message: Message):
     await message.reply_text(caption, reply_markup=buttons, parse_mode=ParseMode.HTML)
 
 
-# bot_connect.py — fixed /connect handler
-
-import asyncio
-from pyrogram import Client, filters
-from pyrogram.enums import ParseMode
-from userbots.wordchain_player import start_userbot
-from db_mongo import MongoDBSessionManager
-import config
-
-db = MongoDBSessionManager()
-
+# ------------------------ CONNECT ------------------------
 @app.on_message(filters.command("connect") & filters.private)
 async def connect_cmd(client, message):
     args = message.text.split(maxsplit=1)
@@ -106,22 +159,16 @@ async def connect_cmd(client, message):
     user = message.from_user
     user_id = user.id
 
-    db.save_session(user_id, session_string)
+    new = await db.save_session(user_id, session_string)
+    record(CONNECT if new else RECONNECT, user_id)
     await message.reply_text("✅ Session saved! Starting your userbot...", parse_mode=ParseMode.HTML)
 
     # Log connection to private log group
-    try:
-        await client.send_message(
-            config.LOG_GROUP_ID,
-            f"🧾 <b>New Connection</b>\n👤 {user.mention}\n🆔 <code>{user_id}</code>",
-            parse_mode=ParseMode.HTML,
-        )
-    except Exception as e:
-        print(f"⚠️ Could not log connection: {e}")
+    notify(f"👤 {user.mention} — <code>{user_id}</code>", group="🧾 <b>New Connections</b>")
 
-    # Start the userbot safely (runs in background loop)
+    # Start the userbot in the background (replaces any running instance)
     try:
-        start_userbot(session_string, user_id)
+        await supervisor.start(user_id, session_string)
         await message.reply_text("🤖 Your userbot is now active and ready to play WordChain!", parse_mode=ParseMode.HTML)
     except Exception as e:
         await message.reply_text(f"❌ Failed to start userbot.\nError: <code>{e}</code>", parse_mode=ParseMode.HTML)
@@ -139,118 +186,487 @@ async def disconnect_cmd(client: Client, message: Message):
             await message.reply_text("❌ Invalid user ID format.")
             return
 
-        if db.get_session(target_id):
-            db.delete_session(target_id)
+        if await db.delete_session(target_id):
+            record(DISCONNECT, target_id)
+            await supervisor.stop(target_id)
+            await supervisor.set_settings(target_id, None)
             await message.reply_text(
                 f"✅ Disconnected user <code>{target_id}</code>.", parse_mode=ParseMode.HTML
             )
-            try:
-                await client.send_message(
-                    config.LOG_GROUP_ID,
-                    f"❌ <b>Userbot Disconnected by Owner</b>\nTarget ID: <code>{target_id}</code>",
-                    parse_mode=ParseMode.HTML,
-                )
-            except Exception:
-                pass
+            notify(f"🆔 <code>{target_id}</code>", group="❌ <b>Userbots Disconnected by Owner</b>")
         else:
             await message.reply_text("⚠️ User not found in database.")
         return
 
-    session = db.get_session(user.id)
-    if not session:
+    if not await db.delete_session(user.id):
         await message.reply_text("⚠️ You don't have an active session.")
         return
 
-    db.delete_session(user.id)
+    record(DISCONNECT, user.id)
+    await supervisor.stop(user.id)
+    await supervisor.set_settings(user.id, None)
     await message.reply_text("🛑 Your userbot has been terminated successfully.")
 
+    notify(
+        f"👤 <b>{html.escape(user.first_name or 'Unknown')}</b> — <code>{user.id}</code>",
+        group="🧹 <b>Users Disconnected</b>",
+    )
+
+
+# ------------------------ SETTINGS ------------------------
+async def update_settings(user_id: int, change) -> bool:
+    """Apply `change(settings)` to `user_id`'s settings, store them and push them to the userbot.
+
+    Returns False if the user has no session; `change` may raise ValueError.
+    """
+    settings = PlayerSettings.from_dict(settings_for(user_id).to_dict())
+    change(settings)
+    data = settings.to_dict()
+    if not await db.save_settings(user_id, data):
+        return False
+    await supervisor.set_settings(user_id, data)
+    return True
+
+
+def _settings_target(user, parts: List[str]):
+    """(target user id, remaining args); the owner may name a user id first."""
+    if user.id == config.OWNER_ID and len(parts) > 1 and parts[1].isdigit():
+        return int(parts[1]), parts[2:]
+    return user.id, parts[1:]
+
+
+SETTINGS_HELP = (
+    "<code>/settings groups -100123 -100456</code> — groups to play in (none = default)\n"
+    "<code>/settings dictionary|strategy|latency NAME</code> — defaults (<code>default</code> clears)\n"
+    "<code>/settings chat -100123 strategy aggressive</code> — override for one group\n"
+    "<code>/settings reset</code> — back to the defaults\n\n"
+    f"Dictionaries: <code>{', '.join(config.DICTIONARIES)}</code>\n"
+    f"Strategies: <code>{', '.join(STRATEGIES)}</code>\n"
+    f"Latency: <code>{', '.join(LATENCY_PROFILES)}</code>"
+)
+
+
+@app.on_message(filters.command("settings") & filters.private)
+async def settings_cmd(client: Client, message: Message):
+    target_id, args = _settings_target(message.from_user, message.text.split())
+
+    if not args:
+        lines = "\n".join(settings_for(target_id).describe())
+        await message.reply_text(
+            f"⚙️ <b>Settings for</b> <code>{target_id}</code>\n<code>{lines}</code>\n\n{SETTINGS_HELP}",
+            parse_mode=ParseMode.HTML,
+        )
+        return
+
+    key, values = args[0].lower(), args[1:]
+    chat_id = None
+    if key == "chat":
+        if len(values) < 2:
+            await message.reply_text("❌ Usage: <code>/settings chat CHAT_ID KEY [VALUE]</code>",
+                                     parse_mode=ParseMode.HTML)
+            return
+        chat_id, key, values = values[0], values[1].lower(), values[2:]
+
+    def change(settings: PlayerSettings):
+        if key == "reset":
+            for name in KEYS:
+                settings.set(name, None)
+            settings.chats.clear()
+        elif key == "groups":
+            settings.set("groups", [int(v) for v in values])
+        else:
+            value = values[0] if values and values[0].lower() != "default" else None
+            settings.set(key, value, int(chat_id) if chat_id is not None else None)
+
     try:
-        await client.send_message(
-            config.LOG_GROUP_ID,
-            f"🧹 <b>User Disconnected</b>\n👤 <b>{user.first_name or 'Unknown'}</b>\n🆔 <code>{user.id}</code>",
+        saved = await update_settings(target_id, change)
+    except ValueError as e:
+        await message.reply_text(f"❌ {e}")
+        return
+    except Exception as e:
+        await message.reply_text(f"❌ Could not change settings.\nError: <code>{e}</code>", parse_mode=ParseMode.HTML)
+        return
+    if not saved:
+        await message.reply_text("⚠️ No session found. Use /connect first.")
+        return
+    lines = "\n".join(settings_for(target_id).describe())
+    await message.reply_text(f"✅ Settings updated.\n<code>{lines}</code>", parse_mode=ParseMode.HTML)
+
+
+@app.on_message(filters.command("strategy") & filters.private)
+async def strategy_cmd(client: Client, message: Message):
+    # Owner may set it for anyone: /strategy <user_id> <name>
+    target_id, args = _settings_target(message.from_user, message.text.split())
+
+    if not args:
+        current = settings_for(target_id).strategy or config.WORD_STRATEGY
+        await message.reply_text(
+            f"🧠 Current strategy: <b>{current}</b>\n\n"
+            f"Available: <code>{', '.join(STRATEGIES)}</code>\n"
+            "Example: <code>/strategy aggressive</code>",
             parse_mode=ParseMode.HTML,
         )
+        return
+
+    name = args[0].lower()
+    if name not in STRATEGIES:
+        await message.reply_text(f"❌ Unknown strategy. Choose one of: <code>{', '.join(STRATEGIES)}</code>",
+                                 parse_mode=ParseMode.HTML)
+        return
+
+    try:
+        saved = await update_settings(target_id, lambda settings: settings.set("strategy", name))
+    except Exception as e:
+        await message.reply_text(f"❌ Could not change strategy.\nError: <code>{e}</code>", parse_mode=ParseMode.HTML)
+        return
+    if not saved:
+        await message.reply_text("⚠️ No session found. Use /connect first.")
+        return
+    await message.reply_text(
+        f"✅ Strategy for <code>{target_id}</code> set to <b>{name}</b>.", parse_mode=ParseMode.HTML
+    )
+
+
+# ------------------------ BROADCAST ------------------------
+async def _prune_user(user_id: int):
+    """Drop a recipient that blocked the bot or no longer exists."""
+    if await db.delete_session(user_id):
+        record(DISCONNECT, user_id)
+    await supervisor.stop(user_id)
+    await supervisor.set_settings(user_id, None)
+
+
+async def run_broadcast(job: BroadcastJob):
+    async def send(user_id: int):
+        await app.copy_message(user_id, job.from_chat_id, job.message_id)
+
+    async def on_progress(job: BroadcastJob):
+        if job.status_message_id:
+            await app.edit_message_text(job.status_chat_id, job.status_message_id, job.summary())
+
+    broadcaster = Broadcaster(
+        send,
+        rate=config.BROADCAST_RATE,
+        concurrency=config.BROADCAST_CONCURRENCY,
+        state_path=config.BROADCAST_STATE_PATH,
+        prune=_prune_user,
+        on_progress=on_progress,
+    )
+    await broadcaster.run(job)
+
+    result = job.summary(finished=True)
+    try:
+        if job.status_message_id:
+            await app.edit_message_text(job.status_chat_id, job.status_message_id, result)
     except Exception:
         pass
+    notify(result)
 
 
-# ------------------------ BROADCAST ------------------------
 @app.on_message(filters.command("broadcast") & filters.user(config.OWNER_ID) & filters.private)
 async def broadcast_cmd(client: Client, message: Message):
     if not message.reply_to_message:
         await message.reply_text("📢 Reply to a message to broadcast it to all connected users.")
         return
 
-    users: List[int] = db.list_sessions()
+    users: List[int] = await db.list_sessions()
     if not users:
         await message.reply_text("📭 No connected users to broadcast to.")
         return
 
-    await message.reply_text(f"📣 Broadcasting to {len(users)} users...")
+    status = await message.reply_text(f"📣 Broadcasting to {len(users)} users...")
+    job = BroadcastJob(
+        message.reply_to_message.chat.id,
+        message.reply_to_message.id,
+        users,
+        status_chat_id=status.chat.id,
+        status_message_id=status.id,
+    )
+    # Runs in the background; progress is edited into the status message
+    spawn(run_broadcast(job))
 
-    success, failed = 0, 0
-    for user_id in users:
-        try:
-            await message.reply_to_message.copy(user_id)
-            success += 1
-            await asyncio.sleep(0.06)
-        except Exception:
-            failed += 1
-
-    result = f"✅ Broadcast Completed!\n📬 Sent: {success}\n⚠️ Failed: {failed}"
-    await message.reply_text(result)
-    try:
-        await client.send_message(config.LOG_GROUP_ID, result)
-    except Exception:
-        pass
+
+async def resume_broadcast():
+    """Continue a broadcast interrupted by a restart, if a checkpoint exists."""
+    job = Broadcaster.load(config.BROADCAST_STATE_PATH)
+    if job is None or not job.pending:
+        return
+    logger.info(f"📣 Resuming broadcast: {len(job.pending)} recipients left")
+    await run_broadcast(job)
 
 
 # ------------------------ LIST USERS ------------------------
+LIST_PAGE_SIZE = 25
+
+
+async def render_users_page(page: int):
+    """Text and navigation buttons for one page of /listusers."""
+    users = await db.list_sessions()
+    pages = max(1, -(-len(users) // LIST_PAGE_SIZE))
+    page = min(max(page, 0), pages - 1)
+    start = page * LIST_PAGE_SIZE
+    chunk = users[start:start + LIST_PAGE_SIZE]
+    profiles = await profiles_cache.get_many(chunk)
+
+    lines = [f"👥 <b>Connected Users:</b> {len(users)} (page {page + 1}/{pages})\n"]
+    for index, user_id in enumerate(chunk, start=start + 1):
+        profile = profiles.get(user_id)
+        if profile:
+            name, username = profile
+            lines.append(f"{index}. {name} ({f'@{username}' if username else 'N/A'}) — <code>{user_id}</code>")
+        else:
+            lines.append(f"{index}. ❓ Unknown — <code>{user_id}</code>")
+
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"listusers:{page - 1}"))
+    if page < pages - 1:
+        nav.append(InlineKeyboardButton("Next ➡️", callback_data=f"listusers:{page + 1}"))
+    return "\n".join(lines), InlineKeyboardMarkup([nav]) if nav else None
+
+
 @app.on_message(filters.command("listusers") & filters.user(config.OWNER_ID) & filters.private)
 async def list_users_cmd(client: Client, message: Message):
-    users = db.list_sessions()
-    if not users:
+    if not await db.list_sessions():
         await message.reply_text("📭 No connected users found.")
         return
 
-    lines = ["👥 <b>Connected Users:</b>\n"]
-    for index, user_id in enumerate(users, start=1):
-        try:
-            info = await client.get_users(user_id)
-            name = info.first_name or "Unknown"
-            username = f"@{info.username}" if info.username else "N/A"
-            lines.append(f"{index}. {name} ({username}) — <code>{user_id}</code>")
-        except Exception:
-            lines.append(f"{index}. ❓ Unknown — <code>{user_id}</code>")
+    text, buttons = await render_users_page(0)
+    await message.reply_text(text, reply_markup=buttons, parse_mode=ParseMode.HTML)
+
 
-    text = "\n".join(lines)
-    for chunk in [text[i:i + 4000] for i in range(0, len(text), 4000)]:
-        await message.reply_text(chunk, parse_mode=ParseMode.HTML)
+@app.on_callback_query(filters.regex(r"^listusers:(\d+)$") & filters.user(config.OWNER_ID))
+async def list_users_page_cb(client: Client, query: CallbackQuery):
+    text, buttons = await render_users_page(int(query.matches[0].group(1)))
+    await query.message.edit_text(text, reply_markup=buttons, parse_mode=ParseMode.HTML)
+    await query.answer()
 
 
 # ------------------------ STATS ------------------------
+def _stats_range(parts: List[str], now: float):
+    """(label, start, end) for `/stats`, `/stats <days>` or `/stats YYYY-MM-DD [YYYY-MM-DD]` (UTC)."""
+    today = int(now) - int(now) % DAY
+    if not parts:
+        return "Today", today, now
+    if len(parts) == 1 and parts[0].isdigit():
+        days = max(int(parts[0]), 1)
+        return f"Last {days} days", today - (days - 1) * DAY, now
+    first, last = (datetime.strptime(p, "%Y-%m-%d").replace(tzinfo=timezone.utc) for p in (parts + parts)[:2])
+    if last < first:
+        raise ValueError("the range ends before it starts")
+    label = first.strftime("%Y-%m-%d") + (f" → {last.strftime('%Y-%m-%d')}" if last != first else "")
+    return label, first.timestamp(), min(last.timestamp() + DAY, now)
+
+
 @app.on_message(filters.command("stats") & filters.user(config.OWNER_ID) & filters.private)
 async def stats_cmd(client: Client, message: Message):
     try:
-        total, new_today, reconnected_today = db.stats()
+        label, start, end = _stats_range(message.text.split()[1:], message.date.timestamp())
+    except ValueError:
+        await message.reply_text(
+            "Usage: <code>/stats</code>, <code>/stats 7</code> (days) or "
+            "<code>/stats 2024-01-01 2024-01-31</code>",
+            parse_mode=ParseMode.HTML,
+        )
+        return
+
+    try:
+        total = (await db.stats())[0]
     except Exception:
-        total, new_today, reconnected_today = len(db.list_sessions()), 0, 0
+        total = len(await db.list_sessions())
+
+    try:
+        activity = await activity_log.counts(start, end)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read activity: {e}")
+        activity = {}
+
+    try:
+        families = await supervisor.metrics()
+    except Exception as e:
+        logger.warning(f"⚠️ Could not collect metrics: {e}")
+        families = {}
+
+    def fmt_seconds(value):
+        return f"≤{value:g}s" if value is not None else "n/a"
+
+    running = metrics.total(families, "userbots_running", "")
+    rss = metrics.total(families, "process_resident_memory_bytes", "")
+    turns = metrics.total(families, "wordchain_turns_total")
+    sent = metrics.total(families, "wordchain_words_sent_total")
+    misses = metrics.total(families, "wordchain_no_word_total")
+    lookups = metrics.total(families, "wordchain_lookup_seconds", "_count")
+    lookup_avg = metrics.total(families, "wordchain_lookup_seconds", "_sum") / lookups if lookups else 0.0
+    uptime = int(message.date.timestamp() - metrics.STARTED_AT)
 
     text = (
         "📊 <b>TNC WordChain Bot Stats</b>\n\n"
-        f"👥 Total Connected Users: <b>{total}</b>\n"
-        f"🆕 New Connections Today: <b>{new_today}</b>\n"
-        f"🔁 Reconnected Today: <b>{reconnected_today}</b>\n"
+        f"👥 Total Connected Users: <b>{total}</b>\n\n"
+        f"📅 <b>{label}</b> (UTC)\n"
+        f"🆕 Connects: <b>{activity.get(CONNECT, 0)}</b> · "
+        f"🔁 Reconnects: <b>{activity.get(RECONNECT, 0)}</b> · "
+        f"🔌 Disconnects: <b>{activity.get(DISCONNECT, 0)}</b>\n"
+        f"🎮 Games played: <b>{activity.get(GAME, 0)}</b> · Words sent: <b>{activity.get(WORD, 0)}</b>\n\n"
+        f"🤖 Running Userbots: <b>{running:.0f}</b>\n"
+        f"🎯 Turns: <b>{turns:.0f}</b> · Sent: <b>{sent:.0f}</b> · No word: <b>{misses:.0f}</b>\n"
+        f"🔎 Lookup: avg <b>{lookup_avg * 1000:.2f}ms</b>, "
+        f"p95 <b>{fmt_seconds(metrics.quantile(families, 'wordchain_lookup_seconds', 0.95))}</b>\n"
+        f"⏱️ Turn latency: p50 <b>{fmt_seconds(metrics.quantile(families, 'wordchain_turn_latency_seconds', 0.5))}</b>, "
+        f"p95 <b>{fmt_seconds(metrics.quantile(families, 'wordchain_turn_latency_seconds', 0.95))}</b>\n"
+        f"🌊 FloodWaits: <b>{metrics.total(families, 'telegram_flood_waits_total'):.0f}</b> · "
+        f"Reconnects: <b>{metrics.total(families, 'userbot_reconnects_total'):.0f}</b>\n"
+        f"💾 Memory: <b>{rss / 2**20:.0f} MiB</b> "
+        f"(~{rss / max(running, 1) / 2**20:.1f} MiB per userbot)\n"
+        f"⌛ Uptime: <code>{uptime // 3600}h {uptime % 3600 // 60}m</code>\n"
         f"🕒 Updated: <code>{message.date.strftime('%Y-%m-%d %H:%M:%S')}</code>"
     )
 
     await message.reply_text(text, parse_mode=ParseMode.HTML)
 
 
+# ------------------------ PROFILE ------------------------
+def _profile_text(report: dict, now: float) -> str:
+    lines = [f"🔬 <b>Profiler</b>: {'on' if report['profiling'] else 'off'}"]
+    if report["since"] is not None:
+        lines[0] += f" · {int(now - report['since'])}s of data"
+
+    calls = sorted(report["calls"].items(), key=lambda item: item[1][1], reverse=True)
+    if calls:
+        lines.append("\n⏱️ <b>Hot paths</b> (calls · avg · max · total)")
+        for name, (count, total, longest) in calls[:12]:
+            lines.append(
+                f"<code>{html.escape(name)}</code>: {count} · {total / count * 1000:.2f}ms · "
+                f"{longest * 1000:.1f}ms · {total:.2f}s"
+            )
+
+    samples = report["samples"]
+    taken = sum(samples.values())
+    if taken:
+        lines.append(f"\n📈 <b>Loop time</b> ({taken} samples)")
+        for name, n in sorted(samples.items(), key=lambda item: item[1], reverse=True)[:8]:
+            lines.append(f"<code>{html.escape(name)}</code>: {n * 100 / taken:.1f}%")
+        busy = sum(report["frames"].values())
+        if busy:
+            lines.append("\n🔥 <b>Top frames</b>")
+            for where, n in sorted(report["frames"].items(), key=lambda item: item[1], reverse=True)[:8]:
+                lines.append(f"<code>{html.escape(where)}</code>: {n * 100 / taken:.1f}%")
+
+    if report["blocks"]:
+        lines.append("\n🐢 <b>Worst stalls</b>")
+        for at, lag, handler, user_id, where in report["blocks"][:8]:
+            who = f" · user <code>{user_id}</code>" if user_id else ""
+            lines.append(
+                f"<b>{lag:.2f}s</b> in <code>{html.escape(handler)}</code>{who}\n"
+                f"   <code>{html.escape(where)}</code> "
+                f"({datetime.fromtimestamp(at, timezone.utc).strftime('%H:%M:%S')})"
+            )
+    elif config.LOOP_LAG_THRESHOLD > 0:
+        lines.append(f"\n✅ No event-loop stalls over {config.LOOP_LAG_THRESHOLD:g}s")
+    return "\n".join(lines)
+
+
+@app.on_message(filters.command("profile") & filters.user(config.OWNER_ID) & filters.private)
+async def profile_cmd(client: Client, message: Message):
+    parts = message.text.split()
+    arg = parts[1].lower() if len(parts) > 1 else ""
+    if arg not in ("", "on", "off"):
+        await message.reply_text("Usage: <code>/profile [on|off]</code>", parse_mode=ParseMode.HTML)
+        return
+    enabled = {"on": True, "off": False}.get(arg)
+    try:
+        report = await supervisor.profile(enabled)
+    except Exception as e:
+        await message.reply_text(f"❌ Could not collect profile.\nError: <code>{e}</code>", parse_mode=ParseMode.HTML)
+        return
+    await message.reply_text(_profile_text(report, message.date.timestamp()), parse_mode=ParseMode.HTML)
+
+
+# ------------------------ DICTIONARY ------------------------
+async def reload_words(path: str) -> int:
+    started = asyncio.get_running_loop().time()
+    count = await supervisor.reload_dictionary(path)
+    elapsed = asyncio.get_running_loop().time() - started
+    notify(f"📚 <b>Dictionary reloaded</b>\n🔤 Words: <b>{count}</b>\n⏱️ {elapsed:.1f}s")
+    return count
+
+
+@app.on_message(filters.command("reloadwords") & filters.user(config.OWNER_ID) & filters.private)
+async def reload_words_cmd(client: Client, message: Message):
+    status = await message.reply_text("🔄 Rebuilding dictionary… userbots keep playing meanwhile.")
+    try:
+        count = await reload_words(config.WORDS_PATH)
+    except Exception as e:
+        await status.edit_text(f"❌ Reload failed.\nError: <code>{e}</code>", parse_mode=ParseMode.HTML)
+        return
+    await status.edit_text(f"✅ Dictionary reloaded: <b>{count}</b> words.", parse_mode=ParseMode.HTML)
+
+
 # ------------------------ RUN ------------------------
+async def restore_sessions():
+    """Reconnect stored sessions in the background, staggered to avoid floods."""
+    def on_progress(progress):
+        done = progress.restored + progress.failed
+        if done % 25 == 0 or not progress.pending:
+            logger.info(progress.summary())
+
+    try:
+        progress = await supervisor.restore(
+            db,
+            concurrency=config.RESTORE_CONCURRENCY,
+            jitter=config.RESTORE_JITTER,
+            on_progress=on_progress,
+        )
+    except Exception as e:
+        logger.error(f"❌ Failed to restore sessions: {e}")
+        return
+    notify(progress.summary())
+
+
+async def main():
+    init_services()
+    await app.start()
+    log_notifier.start()
+    activity_log.start()
+    loop_monitor.start(config.LOOP_LAG_THRESHOLD)
+    try:
+        compact_learned_words(config.LEARNED_WORDS_PATH)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not compact learned words: {e}")
+    if config.USERBOT_WORKERS > 0:
+        await supervisor.start_workers()
+    await db.warm()
+    try:
+        await supervisor.load_settings(await db.all_settings())
+    except Exception as e:
+        logger.warning(f"⚠️ Could not load user settings: {e}")
+    restore = spawn(restore_sessions())
+    spawn(resume_broadcast())
+    spawn(profiles_cache.refresh_loop(db.list_sessions))
+    if config.DICTIONARY_WATCH_INTERVAL > 0:
+        spawn(watch_dictionary(config.WORDS_PATH, reload_words, config.DICTIONARY_WATCH_INTERVAL))
+    metrics_server = None
+    if config.METRICS_PORT:
+        metrics_server = metrics.MetricsServer(supervisor.metrics, config.METRICS_HOST, config.METRICS_PORT)
+        try:
+            await metrics_server.start()
+        except OSError as e:
+            logger.warning(f"⚠️ Could not start metrics endpoint: {e}")
+            metrics_server = None
+    await idle()
+    restore.cancel()
+    if metrics_server is not None:
+        await metrics_server.stop()
+    await supervisor.stop_all()
+    loop_monitor.stop()
+    await activity_log.stop()
+    await log_notifier.stop()
+    await db.close()
+    await app.stop()
+
+
 def run():
     logger.info("🚀 Starting TNC WordChain Controller Bot...")
-    app.run()
+    app.run(main())
     logger.info("✅ Bot stopped.")
 
 
@@ -0,0 +1,221 @@
+# broadcast.py — Concurrent, flood-aware, resumable broadcast engine
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Awaitable, Callable, Iterable, Optional
+
+log = logging.getLogger("broadcast")
+
+# Errors after which a recipient will never accept messages from the bot
+PERMANENT_ERRORS = {
+    "UserIsBlocked",
+    "InputUserDeactivated",
+    "UserDeactivated",
+    "UserDeactivatedBan",
+    "PeerIdInvalid",
+    "UserIsBot",
+}
+
+
+def flood_wait_seconds(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, or None if this is not a FloodWait."""
+    if type(error).__name__ in ("FloodWait", "FloodWaitError", "SlowmodeWait"):
+        return float(getattr(error, "value", None) or getattr(error, "seconds", 0) or 1)
+    return None
+
+
+def is_permanent(error: BaseException) -> bool:
+    return type(error).__name__ in PERMANENT_ERRORS
+
+
+class TokenBucket:
+    """Allows `rate` operations per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Drain the bucket so nobody sends for `seconds` (global flood wait)."""
+        self._tokens = -seconds * self.rate
+        self._updated = time.monotonic()
+
+
+class BroadcastJob:
+    """Persistent description of one broadcast; enough to resume after a restart."""
+
+    def __init__(self, from_chat_id: int, message_id: int, recipients: Iterable[int],
+                 status_chat_id: Optional[int] = None, status_message_id: Optional[int] = None):
+        self.from_chat_id = from_chat_id
+        self.message_id = message_id
+        self.pending = list(dict.fromkeys(recipients))
+        self.status_chat_id = status_chat_id
+        self.status_message_id = status_message_id
+        self.total = len(self.pending)
+        self.sent = 0
+        self.failed = 0
+        self.pruned = 0
+        self.started_at = time.time()
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BroadcastJob":
+        job = cls.__new__(cls)
+        job.__dict__.update(data)
+        return job
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.failed + self.pruned
+
+    def summary(self, finished: bool = False) -> str:
+        head = "✅ Broadcast Completed!" if finished else f"📣 Broadcasting… {self.done}/{self.total}"
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        return (
+            f"{head}\n📬 Sent: {self.sent}\n⚠️ Failed: {self.failed}\n"
+            f"🧹 Pruned: {self.pruned}\n⚡ {self.done / elapsed:.1f} msg/s"
+        )
+
+
+class Broadcaster:
+    """Runs a BroadcastJob with bounded concurrency and a shared rate limit.
+
+    send(user_id)       performs one delivery (e.g. client.copy_message)
+    prune(user_id)      called for recipients that can never be reached
+    on_progress(job)    called at most every `progress_interval` seconds
+    state_path          job checkpoint file; removed when the job finishes
+    """
+
+    def __init__(
+        self,
+        send: Callable[[int], Awaitable[None]],
+        rate: float = 25.0,
+        concurrency: int = 10,
+        max_retries: int = 3,
+        state_path: Optional[str] = None,
+        prune: Optional[Callable[[int], Awaitable[None]]] = None,
+        on_progress: Optional[Callable[[BroadcastJob], Awaitable[None]]] = None,
+        progress_interval: float = 3.0,
+    ):
+        self.send = send
+        self.bucket = TokenBucket(rate)
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.state_path = state_path
+        self.prune = prune
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+
+    # ------------------------ Checkpoints ------------------------
+    def save(self, job: BroadcastJob):
+        if not self.state_path:
+            return
+        # Renamed over the checkpoint, so a crash mid-write leaves the old one
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=os.path.dirname(self.state_path) or ".",
+            prefix=f"{os.path.basename(self.state_path)}.", suffix=".tmp", delete=False,
+        ) as f:
+            try:
+                json.dump(job.to_dict(), f)
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        os.replace(f.name, self.state_path)
+
+    @staticmethod
+    def load(state_path: str) -> Optional[BroadcastJob]:
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                return BroadcastJob.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError) as e:
+            log.warning(f"⚠️ Ignoring unreadable broadcast checkpoint {state_path}: {e}")
+            return None
+
+    # ------------------------ Delivery ------------------------
+    async def _deliver(self, job: BroadcastJob, user_id: int):
+        for _ in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                await self.send(user_id)
+                job.sent += 1
+                return
+            except Exception as e:
+                wait = flood_wait_seconds(e)
+                if wait is not None:
+                    log.warning(f"🌊 FloodWait {wait:.0f}s during broadcast")
+                    self.bucket.pause(wait)
+                    continue
+                if is_permanent(e):
+                    job.pruned += 1
+                    if self.prune is not None:
+                        try:
+                            await self.prune(user_id)
+                        except Exception as prune_err:
+                            log.warning(f"⚠️ Could not prune {user_id}: {prune_err}")
+                    return
+                log.debug(f"Broadcast to {user_id} failed: {e}")
+                break
+        job.failed += 1
+
+    async def run(self, job: BroadcastJob) -> BroadcastJob:
+        queue: asyncio.Queue = asyncio.Queue()
+        for user_id in job.pending:
+            queue.put_nowait(user_id)
+        remaining = set(job.pending)
+        last_report = 0.0
+
+        async def report(force: bool = False):
+            nonlocal last_report
+            now = time.monotonic()
+            if not force and now - last_report < self.progress_interval:
+                return
+            last_report = now
+            job.pending = list(remaining)
+            self.save(job)
+            if self.on_progress is not None:
+                try:
+                    await self.on_progress(job)
+                except Exception as e:
+                    log.debug(f"Progress callback failed: {e}")
+
+        async def worker():
+            while True:
+                try:
+                    user_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self._deliver(job, user_id)
+                remaining.discard(user_id)
+                await report()
+
+        await report(force=True)
+        await asyncio.gather(*(worker() for _ in range(max(1, self.concurrency))))
+        job.pending = []
+        if self.state_path:
+            try:
+                os.remove(self.state_path)
+            except FileNotFoundError:
+                pass
+        return job
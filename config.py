@@ -18,4 +18,58 @@ LOG_GROUP_ID = int(os.getenv("LOG_GROUP_ID", "-1003111446920"))
 SUPPORT_CHAT = os.getenv("SUPPORT_CHAT", "https://t.me/TNCmeetup")
 SUPPORT_CHANNEL = os.getenv("SUPPORT_CHANNEL", "https://t.me/TechNodeCoders")
 START_IMAGE = os.getenv("START_IMAGE", "assets/start_banner.jpg")
-WORDCHAIN_GROUP = int(os.getenv("WORDCHAIN_GROUP", "-1001234567890"))
\ No newline at end of file
+WORDCHAIN_GROUP = int(os.getenv("WORDCHAIN_GROUP", "-1001234567890"))
+
+# Seconds of log-group events (connections, failures, ...) collected into one message
+LOG_BATCH_WINDOW = float(os.getenv("LOG_BATCH_WINDOW", "5"))
+
+# Seconds between activity-log writes (connects, games, words sent for /stats)
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "10"))
+
+# Event-loop lag (s) after which the blocking handler's stack is logged; 0 disables the watchdog
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))
+
+# Userbot worker processes (0 = run every userbot in the controller process)
+USERBOT_WORKERS = int(os.getenv("USERBOT_WORKERS", "0"))
+
+# Startup restore: clients connecting at once, and max random delay per start (s)
+RESTORE_CONCURRENCY = int(os.getenv("RESTORE_CONCURRENCY", "5"))
+RESTORE_JITTER = float(os.getenv("RESTORE_JITTER", "1.5"))
+
+# Max users whose session metadata is kept in memory (LRU)
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+
+# Broadcast: messages per second, parallel sends, and resume checkpoint file
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "10"))
+BROADCAST_STATE_PATH = os.getenv("BROADCAST_STATE_PATH", "broadcast_state.json")
+
+# Seconds before a cached user name/username is refreshed (/listusers)
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "3600"))
+
+# Default word-selection strategy: random, aggressive or safe
+WORD_STRATEGY = os.getenv("WORD_STRATEGY", "random")
+
+# Name of the WORDS_PATH dictionary, plus extra ones users can pick per group ("de=words_de.txt,...")
+DEFAULT_DICTIONARY = os.getenv("DEFAULT_DICTIONARY") or "en"
+DICTIONARIES = {DEFAULT_DICTIONARY: WORDS_PATH}
+DICTIONARIES.update(p.strip().split("=", 1) for p in os.getenv("EXTRA_DICTIONARIES", "").split(",") if "=" in p)
+
+# Default answer timing profile: fast, normal (the TURN_* values below) or human
+LATENCY_PROFILE = os.getenv("LATENCY_PROFILE", "normal")
+
+# Answer timing: aim at this fraction of the turn's time limit, never
+# faster than TURN_MIN_DELAY; TURN_DEFAULT_LIMIT when the limit isn't shown
+TURN_DELAY_FRACTION = float(os.getenv("TURN_DELAY_FRACTION", "0.08"))
+TURN_MIN_DELAY = float(os.getenv("TURN_MIN_DELAY", "1.0"))
+TURN_DEFAULT_LIMIT = float(os.getenv("TURN_DEFAULT_LIMIT", "30"))
+
+# Prometheus-style metrics endpoint (GET /metrics); 0 disables it
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# Poll WORDS_PATH every N seconds and hot-reload it on change (0 = off; /reloadwords still works)
+DICTIONARY_WATCH_INTERVAL = float(os.getenv("DICTIONARY_WATCH_INTERVAL", "0"))
+
+# Words learned from game feedback (accepted additions and refused words)
+LEARNED_WORDS_PATH = os.getenv("LEARNED_WORDS_PATH", "learned_words.txt")
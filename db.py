@@ -1,108 +1,394 @@
-# db.py — Hybrid Database Manager (MongoDB + SQLite fallback)
+# db.py — Async session storage (MongoDB via motor, SQLite fallback)
+import asyncio
+import importlib.util
+import json
 import os
 import sqlite3
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
 
-# Try to import Mongo; fallback if unavailable
-try:
-    from pymongo import MongoClient
-    MONGO_AVAILABLE = True
-except ImportError:
-    MONGO_AVAILABLE = False
+from activity import rollups
+from loop_monitor import section
 
+# motor (and pymongo under it) is only imported by db_mongo, when MongoDB is used
+MONGO_AVAILABLE = importlib.util.find_spec("motor") is not None
 
-class DBSessionManager:
-    def __init__(self, path="sessions.db"):
+PAGE_SIZE = 500
+
+
+def _start_of_day(now: datetime) -> datetime:
+    return datetime(now.year, now.month, now.day)
+
+
+# ------------------------ SQLite schema ------------------------
+_SESSIONS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        user_id INTEGER PRIMARY KEY,
+        session_text TEXT NOT NULL,
+        created_at TEXT,
+        updated_at TEXT NOT NULL,
+        settings TEXT
+    )
+"""
+
+PAGE_FIRST_SQL = (
+    "SELECT updated_at, user_id FROM sessions ORDER BY updated_at DESC, user_id DESC LIMIT ?"
+)
+PAGE_AFTER_SQL = (
+    "SELECT updated_at, user_id FROM sessions WHERE (updated_at, user_id) < (?, ?) "
+    "ORDER BY updated_at DESC, user_id DESC LIMIT ?"
+)
+
+
+def _migrate_sessions(con: sqlite3.Connection):
+    """Rebuild an older sessions table (no settings, nullable or missing updated_at)."""
+    info = {row[1]: row[3] for row in con.execute("PRAGMA table_info(sessions)")}  # name → notnull
+    if info.get("updated_at") and "settings" in info:
+        return
+    updated = "COALESCE(updated_at, created_at, '')" if "updated_at" in info else "COALESCE(created_at, '')"
+    settings = "settings" if "settings" in info else "NULL"
+    with con:
+        con.execute("DROP TABLE IF EXISTS sessions_new")
+        con.execute(_SESSIONS_SCHEMA.format(table="sessions_new"))
+        con.execute(
+            "INSERT INTO sessions_new (user_id, session_text, created_at, updated_at, settings) "
+            f"SELECT user_id, session_text, created_at, {updated}, {settings} FROM sessions"
+        )
+        con.execute("DROP TABLE sessions")
+        con.execute("ALTER TABLE sessions_new RENAME TO sessions")
+
+
+# ------------------------ SQLite Backend ------------------------
+class SQLiteSessionBackend:
+    """One persistent WAL-mode connection, used only from a dedicated thread.
+
+    Every call is shipped to a single-worker executor, so sqlite never
+    blocks the event loop and the connection is never shared across threads.
+    """
+
+    def __init__(self, path: str = "sessions.db"):
         self.path = path
-        self.mongo_uri = os.getenv("MONGO_URL") or os.getenv("MONGO_URI")
-        self.use_mongo = bool(self.mongo_uri and MONGO_AVAILABLE)
-
-        if self.use_mongo:
-            try:
-                self.client = MongoClient(self.mongo_uri)
-                self.db = self.client["TNC_WordChain"]
-                self.collection = self.db["sessions"]
-                self.collection.create_index("user_id", unique=True)
-                print("✅ Connected to MongoDB successfully.")
-            except Exception as e:
-                print(f"⚠️ MongoDB connection failed: {e}. Falling back to SQLite.")
-                self.use_mongo = False
-
-        if not self.use_mongo:
-            print("💾 Using SQLite database instead.")
-            self._init_sqlite()
-
-    # ------------------------ SQLite Setup ------------------------
-    def _init_sqlite(self):
-        with sqlite3.connect(self.path) as con:
-            cur = con.cursor()
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS sessions (
-                    user_id INTEGER PRIMARY KEY,
-                    session_text TEXT NOT NULL,
-                    created_at TEXT
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._con: Optional[sqlite3.Connection] = None
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._con is None:
+            con = sqlite3.connect(self.path, check_same_thread=False)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute(_SESSIONS_SCHEMA.format(table="sessions"))
+            _migrate_sessions(con)
+            con.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at, user_id)")
+            # Append-only activity log and its hourly / daily rollups (see activity.py)
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS activity (
+                    hour INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    n INTEGER NOT NULL
                 )
             """)
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS activity_rollup (
+                    period INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    n INTEGER NOT NULL,
+                    PRIMARY KEY (period, bucket, kind)
+                ) WITHOUT ROWID
+            """)
             con.commit()
+            self._con = con
+        return self._con
 
-    # ------------------------ Save Session ------------------------
-    def save_session(self, user_id: int, session_text: str):
-        timestamp = datetime.utcnow().isoformat()
-
-        if self.use_mongo:
-            self.collection.update_one(
-                {"user_id": user_id},
-                {"$set": {"session_text": session_text, "created_at": timestamp}},
-                upsert=True
+    # --- blocking implementations (executor thread only) ---
+    def _save(self, user_id: int, session_text: str):
+        con = self._connect()
+        now = datetime.utcnow().isoformat()
+        con.execute(
+            "INSERT INTO sessions (user_id, session_text, created_at, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET session_text = excluded.session_text, "
+            "updated_at = excluded.updated_at",
+            (user_id, session_text, now, now),
+        )
+        con.commit()
+
+    def _get_many(self, user_ids: Tuple[int, ...]) -> Dict[int, str]:
+        con = self._connect()
+        out: Dict[int, str] = {}
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(user_ids), 500):
+            chunk = user_ids[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = con.execute(
+                f"SELECT user_id, session_text FROM sessions WHERE user_id IN ({marks})", chunk
             )
+            out.update(rows)
+        return out
+
+    def _delete(self, user_id: int) -> bool:
+        con = self._connect()
+        cur = con.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+        con.commit()
+        return cur.rowcount > 0
+
+    def _save_settings(self, user_id: int, settings: str) -> bool:
+        con = self._connect()
+        cur = con.execute("UPDATE sessions SET settings = ? WHERE user_id = ?", (settings, user_id))
+        con.commit()
+        return cur.rowcount > 0
+
+    def _all_settings(self) -> Dict[int, dict]:
+        con = self._connect()
+        rows = con.execute("SELECT user_id, settings FROM sessions WHERE settings IS NOT NULL")
+        return {user_id: json.loads(text) for user_id, text in rows}
+
+    def _page(self, after: Optional[Tuple[str, int]], limit: int) -> List[Tuple[str, int]]:
+        # Plain columns in WHERE / ORDER BY, so each page is a seek into
+        # idx_sessions_updated rather than a sort of the whole table.
+        con = self._connect()
+        if after is None:
+            rows = con.execute(PAGE_FIRST_SQL, (limit,))
         else:
-            with sqlite3.connect(self.path) as con:
-                cur = con.cursor()
-                cur.execute(
-                    "REPLACE INTO sessions (user_id, session_text, created_at) VALUES (?, ?, ?)",
-                    (user_id, session_text, timestamp),
-                )
-                con.commit()
+            rows = con.execute(PAGE_AFTER_SQL, (*after, limit))
+        return rows.fetchall()
+
+    def _stats(self):
+        con = self._connect()
+        today = _start_of_day(datetime.utcnow()).isoformat()
+        total = con.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        new_today = con.execute("SELECT COUNT(*) FROM sessions WHERE created_at >= ?", (today,)).fetchone()[0]
+        reconnected_today = con.execute(
+            "SELECT COUNT(*) FROM sessions WHERE updated_at >= ? AND created_at < ?", (today, today)
+        ).fetchone()[0]
+        return total, new_today, reconnected_today
+
+    def _active_today(self):
+        con = self._connect()
+        today = _start_of_day(datetime.utcnow()).isoformat()
+        rows = con.execute(
+            "SELECT user_id, created_at >= ? FROM sessions WHERE updated_at >= ? AND created_at IS NOT NULL",
+            (today, today),
+        ).fetchall()
+        return {uid for uid, new in rows if new}, {uid for uid, new in rows if not new}
+
+    def _save_activity(self, events: List[tuple]):
+        con = self._connect()
+        with con:
+            con.executemany("INSERT INTO activity (hour, kind, user_id, n) VALUES (?, ?, ?, ?)", events)
+            con.executemany(
+                "INSERT INTO activity_rollup (period, bucket, kind, n) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(period, bucket, kind) DO UPDATE SET n = n + excluded.n",
+                [(*key, n) for key, n in rollups(events).items()],
+            )
+
+    def _activity_counts(self, period: int, start: int, end: int) -> Dict[str, int]:
+        con = self._connect()
+        rows = con.execute(
+            "SELECT kind, SUM(n) FROM activity_rollup WHERE period = ? AND bucket >= ? AND bucket < ? GROUP BY kind",
+            (period, start, end),
+        )
+        return dict(rows)
+
+    def _close(self):
+        if self._con is not None:
+            self._con.close()
+            self._con = None
+
+    # --- async interface ---
+    async def save_session(self, user_id: int, session_text: str):
+        await self._run(self._save, user_id, session_text)
+
+    async def get_many(self, user_ids: Iterable[int]) -> Dict[int, str]:
+        return await self._run(self._get_many, tuple(user_ids))
+
+    async def delete_session(self, user_id: int) -> bool:
+        return await self._run(self._delete, user_id)
+
+    async def save_settings(self, user_id: int, settings: dict) -> bool:
+        return await self._run(self._save_settings, user_id, json.dumps(settings) if settings else None)
+
+    async def all_settings(self) -> Dict[int, dict]:
+        return await self._run(self._all_settings)
+
+    async def iter_sessions(self, page_size: int = PAGE_SIZE) -> AsyncIterator[List[int]]:
+        after = None
+        while True:
+            rows = await self._run(self._page, after, page_size)
+            if not rows:
+                return
+            yield [user_id for _, user_id in rows]
+            if len(rows) < page_size:
+                return
+            after = rows[-1]
+
+    async def stats(self):
+        return await self._run(self._stats)
+
+    async def active_today(self) -> Tuple[Set[int], Set[int]]:
+        return await self._run(self._active_today)
+
+    async def save_activity(self, events: List[tuple]):
+        await self._run(self._save_activity, events)
+
+    async def activity_counts(self, period: int, start: int, end: int) -> Dict[str, int]:
+        return await self._run(self._activity_counts, period, start, end)
+
+    async def close(self):
+        await self._run(self._close)
+        self._executor.shutdown(wait=False)
+
+
+# ------------------------ In-memory Backend ------------------------
+class MemorySessionBackend:
+    """Dict-backed backend with the same interface; for local runs and tests."""
+
+    def __init__(self):
+        self._rows: Dict[int, dict] = {}
+        self._activity: List[tuple] = []
+        self._rollups: Dict[tuple, int] = {}
+
+    async def save_session(self, user_id: int, session_text: str):
+        now = datetime.utcnow()
+        row = self._rows.setdefault(user_id, {"created_at": now})
+        row.update(session_text=session_text, updated_at=now)
+
+    async def get_many(self, user_ids: Iterable[int]) -> Dict[int, str]:
+        return {uid: self._rows[uid]["session_text"] for uid in user_ids if uid in self._rows}
+
+    async def delete_session(self, user_id: int) -> bool:
+        return self._rows.pop(user_id, None) is not None
+
+    async def save_settings(self, user_id: int, settings: dict) -> bool:
+        row = self._rows.get(user_id)
+        if row is None:
+            return False
+        row["settings"] = dict(settings) if settings else None
+        return True
+
+    async def all_settings(self) -> Dict[int, dict]:
+        return {uid: dict(row["settings"]) for uid, row in self._rows.items() if row.get("settings")}
+
+    async def iter_sessions(self, page_size: int = PAGE_SIZE) -> AsyncIterator[List[int]]:
+        ordered = sorted(self._rows, key=lambda uid: (self._rows[uid]["updated_at"], uid), reverse=True)
+        for i in range(0, len(ordered), page_size):
+            yield ordered[i:i + page_size]
+
+    async def stats(self):
+        today = _start_of_day(datetime.utcnow())
+        rows = self._rows.values()
+        new_today = sum(1 for r in rows if r["created_at"] >= today)
+        reconnected = sum(1 for r in rows if r["updated_at"] >= today and r["created_at"] < today)
+        return len(self._rows), new_today, reconnected
+
+    async def active_today(self) -> Tuple[Set[int], Set[int]]:
+        today = _start_of_day(datetime.utcnow())
+        new = {uid for uid, r in self._rows.items() if r["created_at"] >= today}
+        reconnected = {uid for uid, r in self._rows.items() if r["updated_at"] >= today and r["created_at"] < today}
+        return new, reconnected
+
+    async def save_activity(self, events: List[tuple]):
+        self._activity.extend(events)
+        for key, n in rollups(events).items():
+            self._rollups[key] = self._rollups.get(key, 0) + n
+
+    async def activity_counts(self, period: int, start: int, end: int) -> Dict[str, int]:
+        out: Dict[str, int] = {}
+        for (p, bucket, kind), n in self._rollups.items():
+            if p == period and start <= bucket < end:
+                out[kind] = out.get(kind, 0) + n
+        return out
+
+    async def close(self):
+        pass
+
+
+# ------------------------ Manager ------------------------
+class DBSessionManager:
+    """Async session store; picks MongoDB when MONGO_URI is set, else SQLite."""
+
+    def __init__(self, path="sessions.db", backend=None):
+        self.path = path
+        self.mongo_uri = os.getenv("MONGO_URL") or os.getenv("MONGO_URI")
+        self.use_mongo = backend is None and bool(self.mongo_uri and MONGO_AVAILABLE)
+
+        if backend is not None:
+            self.backend = backend
+        elif self.use_mongo:
+            from db_mongo import MongoSessionBackend
+            self.backend = MongoSessionBackend(self.mongo_uri)
+            print("✅ Using MongoDB session storage.")
+        else:
+            print("💾 Using SQLite database instead.")
+            self.backend = SQLiteSessionBackend(path)
+
+    # ------------------------ Save Session ------------------------
+    async def save_session(self, user_id: int, session_text: str):
+        with section("db.save_session"):
+            await self.backend.save_session(user_id, session_text)
 
     # ------------------------ Get Session ------------------------
-    def get_session(self, user_id: int) -> Optional[str]:
-        if self.use_mongo:
-            doc = self.collection.find_one({"user_id": user_id})
-            return doc["session_text"] if doc else None
-        with sqlite3.connect(self.path) as con:
-            cur = con.cursor()
-            cur.execute("SELECT session_text FROM sessions WHERE user_id = ?", (user_id,))
-            row = cur.fetchone()
-            return row[0] if row else None
+    async def get_session(self, user_id: int) -> Optional[str]:
+        with section("db.get_many"):
+            return (await self.backend.get_many([user_id])).get(user_id)
+
+    async def get_many(self, user_ids: Iterable[int]) -> Dict[int, str]:
+        with section("db.get_many"):
+            return await self.backend.get_many(user_ids)
 
     # ------------------------ Delete Session ------------------------
-    def delete_session(self, user_id: int):
-        if self.use_mongo:
-            self.collection.delete_one({"user_id": user_id})
-        else:
-            with sqlite3.connect(self.path) as con:
-                cur = con.cursor()
-                cur.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
-                con.commit()
+    async def delete_session(self, user_id: int) -> bool:
+        """Delete a session; returns False if there was none."""
+        with section("db.delete_session"):
+            return await self.backend.delete_session(user_id)
+
+    # ------------------------ Settings ------------------------
+    async def save_settings(self, user_id: int, settings: dict) -> bool:
+        """Store `user_id`'s game settings with their session; False if there is no session."""
+        with section("db.save_settings"):
+            return await self.backend.save_settings(user_id, settings)
+
+    async def all_settings(self) -> Dict[int, dict]:
+        """Settings of every user that has any, keyed by user id."""
+        with section("db.all_settings"):
+            return await self.backend.all_settings()
 
     # ------------------------ List All Sessions ------------------------
-    def list_sessions(self):
-        if self.use_mongo:
-            return [doc["user_id"] for doc in self.collection.find({}, {"user_id": 1})]
-        with sqlite3.connect(self.path) as con:
-            cur = con.cursor()
-            cur.execute("SELECT user_id FROM sessions")
-            return [r[0] for r in cur.fetchall()]
+    def iter_sessions(self, page_size: int = PAGE_SIZE) -> AsyncIterator[List[int]]:
+        """Yield pages of user ids, most recently active first."""
+        return self.backend.iter_sessions(page_size)
+
+    async def list_sessions(self) -> List[int]:
+        users: List[int] = []
+        async for page in self.iter_sessions():
+            users.extend(page)
+        return users
 
     # ------------------------ Stats ------------------------
-    def stats(self):
-        if self.use_mongo:
-            total = self.collection.count_documents({})
-            # Simplified: You can extend this for daily tracking
-            return total, 0, 0
-        with sqlite3.connect(self.path) as con:
-            cur = con.cursor()
-            cur.execute("SELECT COUNT(*) FROM sessions")
-            total = cur.fetchone()[0]
-            return total, 0, 0
\ No newline at end of file
+    async def stats(self):
+        """(total, new today, reconnected today)."""
+        with section("db.stats"):
+            return await self.backend.stats()
+
+    async def active_today(self) -> Tuple[Set[int], Set[int]]:
+        """(user ids new today, user ids created earlier that reconnected today), as counted by stats()."""
+        with section("db.active_today"):
+            return await self.backend.active_today()
+
+    # ------------------------ Activity ------------------------
+    async def save_activity(self, events: List[tuple]):
+        """Append (hour, kind, user_id, n) rows to the activity log and add them to its rollups."""
+        with section("db.save_activity"):
+            await self.backend.save_activity(events)
+
+    async def activity_counts(self, period: int, start: int, end: int) -> Dict[str, int]:
+        """{kind: total} over rollup buckets of `period` seconds starting in [start, end)."""
+        with section("db.activity_counts"):
+            return await self.backend.activity_counts(period, start, end)
+
+    async def close(self):
+        await self.backend.close()
@@ -1,67 +1,125 @@
-# db_mongo.py - MongoDB session manager (hybrid safe)
-import motor.motor_asyncio
+# db_mongo.py - MongoDB session backend (native motor, fully async)
 import datetime
-import asyncio
+from typing import AsyncIterator, Dict, Iterable, List, Set, Tuple
+
+import motor.motor_asyncio
+from pymongo import UpdateOne
+
 import config
+from activity import rollups
 
 
-class MongoDBSessionManager:
-    def __init__(self):
-        self.client = motor.motor_asyncio.AsyncIOMotorClient(config.MONGO_URI)
-        self.db = self.client[config.DB_NAME]
+class MongoSessionBackend:
+    def __init__(self, uri: str = None, db_name: str = None):
+        self.client = motor.motor_asyncio.AsyncIOMotorClient(uri or config.MONGO_URI)
+        self.db = self.client[db_name or config.DB_NAME]
         self.sessions = self.db["sessions"]
-        self.loop = asyncio.get_event_loop()
-        self.loop.create_task(self.init_indexes())
-        print("✅ MongoDB connected successfully.")
+        self.activity = self.db["activity"]
+        self.rollups = self.db["activity_rollup"]
+        self._indexed = False
 
-    async def init_indexes(self):
-        """Ensure indexes exist for user_id."""
+    async def _ensure_indexes(self):
+        """Create indexes once, on first use (inside the running loop)."""
+        if self._indexed:
+            return
         await self.sessions.create_index("user_id", unique=True)
+        await self.sessions.create_index([("updated_at", -1), ("user_id", -1)])
+        await self.sessions.create_index("created_at")
+        await self.rollups.create_index([("period", 1), ("bucket", 1), ("kind", 1)], unique=True)
+        self._indexed = True
 
-    # ------------- Internal Async Methods -------------
-    async def _save(self, user_id: int, string_session: str):
+    async def save_session(self, user_id: int, string_session: str):
+        await self._ensure_indexes()
+        now = datetime.datetime.utcnow()
         await self.sessions.update_one(
             {"user_id": user_id},
             {
-                "$set": {
-                    "string_session": string_session,
-                    "updated_at": datetime.datetime.utcnow(),
-                },
-                "$setOnInsert": {"created_at": datetime.datetime.utcnow()},
+                "$set": {"string_session": string_session, "updated_at": now},
+                "$setOnInsert": {"created_at": now},
             },
             upsert=True,
         )
 
-    async def _get(self, user_id: int):
-        session = await self.sessions.find_one({"user_id": user_id})
-        return session["string_session"] if session else None
+    async def get_many(self, user_ids: Iterable[int]) -> Dict[int, str]:
+        await self._ensure_indexes()
+        cursor = self.sessions.find(
+            {"user_id": {"$in": list(user_ids)}}, {"user_id": 1, "string_session": 1}
+        )
+        return {doc["user_id"]: doc["string_session"] async for doc in cursor}
+
+    async def delete_session(self, user_id: int) -> bool:
+        await self._ensure_indexes()
+        result = await self.sessions.delete_one({"user_id": user_id})
+        return result.deleted_count > 0
 
-    async def _delete(self, user_id: int):
-        await self.sessions.delete_one({"user_id": user_id})
+    async def save_settings(self, user_id: int, settings: dict) -> bool:
+        await self._ensure_indexes()
+        update = {"$set": {"settings": settings}} if settings else {"$unset": {"settings": ""}}
+        result = await self.sessions.update_one({"user_id": user_id}, update)
+        return result.matched_count > 0
 
-    async def _list(self):
-        return await self.sessions.distinct("user_id")
+    async def all_settings(self) -> Dict[int, dict]:
+        await self._ensure_indexes()
+        cursor = self.sessions.find({"settings": {"$exists": True}}, {"user_id": 1, "settings": 1})
+        return {doc["user_id"]: doc["settings"] async for doc in cursor}
 
-    async def _stats(self):
+    async def iter_sessions(self, page_size: int = 500) -> AsyncIterator[List[int]]:
+        # Most recently active first, so restores bring them back first
+        await self._ensure_indexes()
+        cursor = (
+            self.sessions.find({}, {"user_id": 1})
+            .sort([("updated_at", -1), ("user_id", -1)])
+            .batch_size(page_size)
+        )
+        page: List[int] = []
+        async for doc in cursor:
+            page.append(doc["user_id"])
+            if len(page) >= page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    async def stats(self):
+        await self._ensure_indexes()
         total = await self.sessions.count_documents({})
         now = datetime.datetime.utcnow()
         start_of_day = datetime.datetime(now.year, now.month, now.day)
         new_today = await self.sessions.count_documents({"created_at": {"$gte": start_of_day}})
-        reconnected_today = await self.sessions.count_documents({"updated_at": {"$gte": start_of_day}})
+        reconnected_today = await self.sessions.count_documents(
+            {"updated_at": {"$gte": start_of_day}, "created_at": {"$lt": start_of_day}}
+        )
         return total, new_today, reconnected_today
 
-    # ------------- Safe Synchronous Wrappers -------------
-    def save_session(self, user_id: int, string_session: str):
-        return self.loop.run_until_complete(self._save(user_id, string_session))
-
-    def get_session(self, user_id: int):
-        return self.loop.run_until_complete(self._get(user_id))
+    async def active_today(self) -> Tuple[Set[int], Set[int]]:
+        await self._ensure_indexes()
+        now = datetime.datetime.utcnow()
+        start_of_day = datetime.datetime(now.year, now.month, now.day)
+        new, reconnected = set(), set()
+        cursor = self.sessions.find({"updated_at": {"$gte": start_of_day}}, {"user_id": 1, "created_at": 1})
+        async for doc in cursor:
+            if doc.get("created_at") is not None:  # stats() counts neither way without it
+                (new if doc["created_at"] >= start_of_day else reconnected).add(doc["user_id"])
+        return new, reconnected
 
-    def delete_session(self, user_id: int):
-        return self.loop.run_until_complete(self._delete(user_id))
+    async def save_activity(self, events: List[tuple]):
+        await self._ensure_indexes()
+        await self.activity.insert_many(
+            [{"hour": hour, "kind": kind, "user_id": user_id, "n": n} for hour, kind, user_id, n in events],
+            ordered=False,
+        )
+        await self.rollups.bulk_write([
+            UpdateOne({"period": period, "bucket": bucket, "kind": kind}, {"$inc": {"n": n}}, upsert=True)
+            for (period, bucket, kind), n in rollups(events).items()
+        ], ordered=False)
 
-    def list_sessions(self):
-        return self.loop.run_until_complete(self._list())
+    async def activity_counts(self, period: int, start: int, end: int) -> Dict[str, int]:
+        await self._ensure_indexes()
+        cursor = self.rollups.aggregate([
+            {"$match": {"period": period, "bucket": {"$gte": start, "$lt": end}}},
+            {"$group": {"_id": "$kind", "n": {"$sum": "$n"}}},
+        ])
+        return {doc["_id"]: doc["n"] async for doc in cursor}
 
-    def stats(self):
-        return self.loop.run_until_complete(self._stats())
\ No newline at end of file
+    async def close(self):
+        self.client.close()
@@ -0,0 +1,285 @@
+# loop_monitor.py — Event-loop lag watchdog and hot-path profiler
+#
+# Every userbot in a process shares one asyncio loop, so one slow handler
+# delays every turn. A watchdog thread posts a heartbeat to the loop every
+# HEARTBEAT seconds and records how late it runs (event_loop_lag_seconds).
+# If a heartbeat is still waiting after the threshold, the thread grabs the
+# loop thread's stack at that moment. It attributes the stall to the
+# handler and user of the running task (see section()), then logs it and
+# reports it to the log group.
+#
+# Hot paths are wrapped in `with section(name, user_id):`. While the owner
+# has profiling switched on (/profile on), sections are also timed. The
+# watchdog thread then samples which section and function the loop is in
+# every SAMPLE_INTERVAL seconds, giving both call timings and each path's
+# share of loop time.
+import asyncio
+import html
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+from metrics import REGISTRY
+from notifier import notify
+
+log = logging.getLogger("loop_monitor")
+
+HEARTBEAT = 0.1
+SAMPLE_INTERVAL = 0.005
+# Stalls kept for /profile
+MAX_BLOCKS = 20
+
+LOOP_LAG = REGISTRY.histogram(
+    "event_loop_lag_seconds", "How late the event loop runs a scheduled callback",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+LOOP_BLOCKS = REGISTRY.counter(
+    "event_loop_blocks_total", "Event-loop stalls over the watchdog threshold", ("handler",)
+)
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# (handler, user_id) of the section each task is in; read by the watchdog
+_labels: Dict[asyncio.Task, Tuple[str, Optional[int]]] = {}
+_profiler: Optional["Profiler"] = None
+
+
+def _current_task() -> Optional[asyncio.Task]:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:  # no running loop, e.g. in an executor thread
+        return None
+
+
+class section:
+    """Label the running task as `name` (for `user_id`) and time it while profiling."""
+
+    __slots__ = ("name", "user_id", "task", "prev", "started")
+
+    def __init__(self, name: str, user_id: Optional[int] = None):
+        self.name = name
+        self.user_id = user_id
+
+    def __enter__(self):
+        self.task = task = _current_task()
+        if task is not None:
+            self.prev = _labels.get(task)
+            user_id = self.user_id if self.user_id is not None else self.prev and self.prev[1]
+            _labels[task] = (self.name, user_id)
+        self.started = time.perf_counter() if _profiler is not None else None
+        return self
+
+    def __exit__(self, *exc):
+        task = self.task
+        if task is not None:
+            if self.prev is None:
+                _labels.pop(task, None)
+            else:
+                _labels[task] = self.prev
+        if self.started is not None and _profiler is not None:
+            _profiler.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Profiler:
+    """Per-section call timings plus loop samples, collected while profiling is on."""
+
+    def __init__(self):
+        self.since = time.time()
+        self.calls: Dict[str, List[float]] = {}  # name → [count, total seconds, max seconds]
+        self.samples: Counter = Counter()  # section (or "idle") → samples
+        self.frames: Counter = Counter()  # "file:line function" → samples
+
+    def add(self, name: str, seconds: float):
+        row = self.calls.get(name)
+        if row is None:
+            row = self.calls[name] = [0, 0.0, 0.0]
+        row[0] += 1
+        row[1] += seconds
+        if seconds > row[2]:
+            row[2] = seconds
+
+
+def _where(frame) -> str:
+    """The innermost frame of this repository's code, as "file:line function"."""
+    fallback = None
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if fallback is None:
+            fallback = frame
+        if path.startswith(_ROOT) and os.path.basename(path) != "loop_monitor.py":
+            break
+        frame = frame.f_back
+    frame = frame or fallback
+    if frame is None:
+        return "?"
+    return f"{os.path.relpath(frame.f_code.co_filename, _ROOT)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+class LoopWatchdog:
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold: float = 0.25):
+        """
+        loop       the loop to watch; start() must be called from its thread
+        threshold  seconds of lag after which the blocking stack is captured
+        """
+        self.loop = loop
+        self.threshold = threshold
+        self.blocks: deque = deque(maxlen=MAX_BLOCKS)
+        self._loop_thread = threading.get_ident()
+        self._beat = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ack(self):
+        self._beat.set()
+
+    def _snapshot(self):
+        """(stack lines, "file:line function", (handler, user_id)) of the loop thread right now."""
+        frame = sys._current_frames().get(self._loop_thread)
+        try:
+            task = asyncio.current_task(self.loop)
+        except Exception:
+            task = None
+        label = _labels.get(task, ("?", None)) if task is not None else ("?", None)
+        return traceback.format_stack(frame) if frame is not None else [], _where(frame), label
+
+    def _sample(self):
+        frame = sys._current_frames().get(self._loop_thread)
+        profiler = _profiler
+        if profiler is None or frame is None:
+            return
+        try:
+            task = asyncio.current_task(self.loop)
+        except Exception:
+            task = None
+        if task is None:
+            # Between tasks: waiting in the selector, or running plain callbacks
+            profiler.samples["idle" if frame.f_code.co_filename.endswith("selectors.py") else "callbacks"] += 1
+            return
+        profiler.samples[_labels.get(task, ("other", None))[0]] += 1
+        profiler.frames[_where(frame)] += 1
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._beat.clear()
+            sent = time.monotonic()
+            try:
+                self.loop.call_soon_threadsafe(self._ack)
+            except RuntimeError:  # loop closed
+                return
+            # Sample the loop while waiting for the heartbeat when profiling
+            deadline = sent + self.threshold
+            while not self._beat.wait(SAMPLE_INTERVAL if _profiler is not None else self.threshold):
+                self._sample()
+                if time.monotonic() >= deadline:
+                    break
+            stalled = None
+            if not self._beat.is_set():
+                stalled = self._snapshot()
+                while not self._beat.wait(1.0) and not self._stopped.is_set():
+                    pass
+            lag = time.monotonic() - sent
+            LOOP_LAG.observe(lag)
+            if stalled is not None:
+                self._report(lag, *stalled)
+            self._pause(HEARTBEAT - lag)
+
+    def _pause(self, seconds: float):
+        """Sleep until the next heartbeat, sampling the loop meanwhile when profiling."""
+        end = time.monotonic() + seconds
+        while _profiler is not None and time.monotonic() < end:
+            self._sample()
+            if self._stopped.wait(SAMPLE_INTERVAL):
+                return
+        self._stopped.wait(max(end - time.monotonic(), 0))
+
+    def _report(self, lag: float, stack: List[str], where: str, label: Tuple[str, Optional[int]]):
+        handler, user_id = label
+        LOOP_BLOCKS.inc(handler=handler)
+        self.blocks.append((time.time(), lag, handler, user_id, where))
+        who = f" (user {user_id})" if user_id else ""
+        log.warning(f"🐢 Event loop blocked {lag:.2f}s in {handler}{who} at {where}\n{''.join(stack[-12:])}")
+        self.loop.call_soon_threadsafe(
+            notify,
+            f"⏱️ <b>{lag:.2f}s</b> in <code>{html.escape(handler)}</code>{who} — <code>{html.escape(where)}</code>",
+            "🐢 <b>Event loop stalls</b>",
+        )
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._beat.set()
+        self._thread = None
+
+
+# ------------------------ Process-wide controls ------------------------
+_watchdog: Optional[LoopWatchdog] = None
+
+
+def start(threshold: float):
+    """Watch the running loop; a threshold <= 0 disables the watchdog."""
+    global _watchdog
+    if threshold > 0 and _watchdog is None:
+        _watchdog = LoopWatchdog(asyncio.get_running_loop(), threshold)
+        _watchdog.start()
+
+
+def stop():
+    global _watchdog
+    if _watchdog is not None:
+        _watchdog.stop()
+        _watchdog = None
+
+
+_last_profiler: Optional[Profiler] = None
+
+
+def set_profiling(enabled: bool):
+    """Switch the profiler on (starting from empty) or off (keeping the last results)."""
+    global _profiler, _last_profiler
+    if enabled:
+        _profiler = Profiler()
+    elif _profiler is not None:
+        _last_profiler, _profiler = _profiler, None
+
+
+def report() -> dict:
+    """This process's stalls and profile (current, or the last one if switched off)."""
+    profiler = _profiler or _last_profiler
+    return {
+        "profiling": _profiler is not None,
+        "since": profiler.since if profiler else None,
+        "calls": {name: list(row) for name, row in profiler.calls.items()} if profiler else {},
+        "samples": dict(profiler.samples) if profiler else {},
+        "frames": dict(profiler.frames) if profiler else {},
+        "blocks": list(_watchdog.blocks) if _watchdog else [],
+    }
+
+
+def merge_reports(reports: List[dict]) -> dict:
+    """Combine reports from several processes (see userbots/workers.py)."""
+    merged = {"profiling": False, "since": None, "calls": {}, "samples": Counter(), "frames": Counter(), "blocks": []}
+    for r in reports:
+        merged["profiling"] |= r["profiling"]
+        if r["since"] is not None:
+            merged["since"] = min(merged["since"] or r["since"], r["since"])
+        for name, (count, total, longest) in r["calls"].items():
+            row = merged["calls"].setdefault(name, [0, 0.0, 0.0])
+            row[0] += count
+            row[1] += total
+            row[2] = max(row[2], longest)
+        merged["samples"].update(r["samples"])
+        merged["frames"].update(r["frames"])
+        merged["blocks"].extend(r["blocks"])
+    merged["blocks"].sort(key=lambda b: b[1], reverse=True)
+    merged["samples"], merged["frames"] = dict(merged["samples"]), dict(merged["frames"])
+    return merged
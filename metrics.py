@@ -0,0 +1,285 @@
+# metrics.py — In-process counters/histograms with a Prometheus text endpoint
+import asyncio
+import bisect
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+log = logging.getLogger("metrics")
+
+# A snapshot is plain data so worker processes can send it over their pipe:
+#   {name: {"type": str, "help": str, "samples": [(suffix, labels, value)]}}
+# where `labels` is a tuple of (label, value) pairs.
+Labels = Tuple[Tuple[str, str], ...]
+Families = Dict[str, dict]
+
+LOOKUP_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict) -> Labels:
+        return tuple((n, str(labels[n])) for n in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, Labels, float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def remove(self, **labels):
+        self._values.pop(self._key(labels), None)
+
+    def samples(self):
+        return [("", key, value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """A gauge set directly, or computed at collection time by `fn`."""
+
+    kind = "gauge"
+
+    def __init__(self, *args, fn: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fn = fn
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def remove(self, **labels):
+        self._values.pop(self._key(labels), None)
+
+    def samples(self):
+        if self.fn is not None:
+            return [("", (), float(self.fn()))]
+        return [("", key, value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Iterable[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket..., +Inf count, sum]
+        self._values: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        row = self._values.get(key)
+        if row is None:
+            row = self._values[key] = [0] * (len(self.buckets) + 2)
+        row[bisect.bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def samples(self):
+        out = []
+        for key, row in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), row):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                out.append(("_bucket", key + (("le", le),), cumulative))
+            out.append(("_count", key, cumulative))
+            out.append(("_sum", key, row[-1]))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = (), fn=None) -> Gauge:
+        return self._add(Gauge(name, help, labelnames, fn=fn))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets=buckets))
+
+    def collect(self) -> Families:
+        families = {}
+        for metric in self._metrics.values():
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                log.debug(f"Could not collect {metric.name}: {e}")
+                continue
+            families[metric.name] = {"type": metric.kind, "help": metric.help, "samples": samples}
+        return families
+
+
+# ------------------------ Process-wide registry ------------------------
+REGISTRY = Registry()
+
+STARTED_AT = time.time()
+
+
+def resident_memory() -> int:
+    """Resident set size of this process in bytes (0 if unknown)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # peak, in KiB on Linux
+    except (ImportError, OSError):
+        return 0
+
+
+TURNS = REGISTRY.counter("wordchain_turns_total", "Turn prompts addressed to the userbot", ("user",))
+WORDS_SENT = REGISTRY.counter("wordchain_words_sent_total", "Words sent", ("user",))
+NO_WORD = REGISTRY.counter("wordchain_no_word_total", "Turns with no valid word in the dictionary", ("user",))
+SEND_ERRORS = REGISTRY.counter("wordchain_send_errors_total", "Words that failed to send", ("user",))
+FLOOD_WAITS = REGISTRY.counter("telegram_flood_waits_total", "FloodWait errors received", ("user",))
+RECONNECTS = REGISTRY.counter("userbot_reconnects_total", "Automatic restarts after a crash", ("user",))
+MESSAGES_PARSED = REGISTRY.counter("wordchain_messages_parsed_total", "Group messages parsed (once per process)")
+MESSAGES_DUPLICATE = REGISTRY.counter(
+    "wordchain_messages_duplicate_total", "Copies of an already parsed message received by other userbots"
+)
+LOOKUP_SECONDS = REGISTRY.histogram(
+    "wordchain_lookup_seconds", "Time to choose a word", buckets=LOOKUP_BUCKETS
+)
+TURN_SECONDS = REGISTRY.histogram(
+    "wordchain_turn_latency_seconds", "Turn message receipt to answer sent"
+)
+SEND_SECONDS = REGISTRY.histogram("wordchain_send_seconds", "send_message round trip")
+REGISTRY.gauge("process_resident_memory_bytes", "Resident memory", fn=resident_memory)
+REGISTRY.gauge("process_start_time_seconds", "Process start (UNIX time)", fn=lambda: STARTED_AT)
+
+
+def forget_user(user_id: int):
+    """Drop a stopped userbot's labelled series."""
+    for metric in (TURNS, WORDS_SENT, NO_WORD, SEND_ERRORS, FLOOD_WAITS, RECONNECTS):
+        metric.remove(user=user_id)
+
+
+# ------------------------ Snapshots ------------------------
+def merge(snapshots: Iterable[Tuple[Labels, Families]]) -> Families:
+    """Combine snapshots, adding `extra` labels to each one's samples."""
+    merged: Families = {}
+    for extra, families in snapshots:
+        for name, family in families.items():
+            target = merged.setdefault(name, {"type": family["type"], "help": family["help"], "samples": []})
+            target["samples"].extend((suffix, tuple(extra) + tuple(labels), value)
+                                     for suffix, labels, value in family["samples"])
+    return merged
+
+
+def _number(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(families: Families) -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for name, family in sorted(families.items()):
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for suffix, labels, value in family["samples"]:
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{name}{suffix}{{{label_text}}} {_number(value)}" if labels else f"{name}{suffix} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def total(families: Families, name: str, suffix: str = "") -> float:
+    """Sum of every sample of `name` with the given suffix."""
+    family = families.get(name)
+    if family is None:
+        return 0.0
+    return sum(value for s, _, value in family["samples"] if s == suffix)
+
+
+def series(families: Families, name: str, suffix: str = "") -> List[Tuple[dict, float]]:
+    family = families.get(name)
+    if family is None:
+        return []
+    return [(dict(labels), value) for s, labels, value in family["samples"] if s == suffix]
+
+
+def quantile(families: Families, name: str, q: float) -> Optional[float]:
+    """Upper bucket bound below which `q` of all observations of `name` fall."""
+    counts: Dict[float, float] = {}
+    for labels, value in series(families, name, "_bucket"):
+        bound = float(labels["le"])
+        counts[bound] = counts.get(bound, 0) + value
+    if not counts:
+        return None
+    bounds = sorted(counts)
+    n = counts[bounds[-1]]
+    if not n:
+        return None
+    for bound in bounds:
+        if counts[bound] >= q * n:
+            return bound
+    return bounds[-1]
+
+
+# ------------------------ HTTP endpoint ------------------------
+class MetricsServer:
+    """Serves GET /metrics from `collect()` on a local port."""
+
+    def __init__(self, collect: Callable[[], Awaitable[Families]], host: str = "127.0.0.1", port: int = 9464):
+        self.collect = collect
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        log.info(f"📈 Metrics on http://{self.host}:{self.port}/metrics")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", render(await self.collect()).encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except Exception as e:
+            log.debug(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
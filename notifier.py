@@ -0,0 +1,174 @@
+# notifier.py — One shared, batched, flood-aware sender for the log group
+#
+# Anything worth telling the admins (connections, userbot failures, reload
+# results) goes through notify(). Events are queued and, after a short
+# window, sent as one digest message; events with the same `group` title
+# are merged under it, so a burst of 200 failing sessions costs one or two
+# API calls instead of 200 client handshakes. Sends are rate limited and
+# a FloodWait pauses the notifier instead of dropping the digest.
+#
+# notify() is process-wide: the controller installs its LogNotifier, and
+# worker processes install a sink that forwards events to the controller.
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from broadcast import TokenBucket, flood_wait_seconds
+
+log = logging.getLogger("notifier")
+
+# Telegram's message length limit
+MAX_MESSAGE = 4096
+
+# Lines listed under one group title before "… and N more"
+MAX_GROUP_LINES = 20
+
+Event = Tuple[str, Optional[str]]  # (text, group)
+
+
+class LogNotifier:
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[object]],
+        window: float = 5.0,
+        rate: float = 0.5,
+        max_queue: int = 10_000,
+        retries: int = 3,
+    ):
+        """
+        send       coroutine function sending one (HTML) message to the log group
+        window     seconds to collect events before sending a digest
+        rate       digest messages per second at most
+        max_queue  events kept while sending is blocked; older ones are dropped
+        """
+        self.send = send
+        self.window = window
+        self.bucket = TokenBucket(rate, capacity=1)
+        self.retries = retries
+        self._queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self._batch: List[Event] = []
+        self._task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0
+
+    # ------------------------ Producers ------------------------
+    def notify(self, text: str, group: Optional[str] = None):
+        """Queue an event; never blocks. Same-`group` events share one section of the digest."""
+        try:
+            self._queue.put_nowait((text, group))
+        except asyncio.QueueFull:
+            self._queue.get_nowait()
+            self._queue.put_nowait((text, group))
+            self.dropped += 1
+
+    # ------------------------ Digest ------------------------
+    @staticmethod
+    def digest(events: List[Event]) -> List[str]:
+        """Render events as messages no longer than MAX_MESSAGE."""
+        groups: Dict[str, List[str]] = {}
+        sections: List[Event] = []  # first appearance order; (text, None) or (None, group)
+        for text, group in events:
+            if group is None:
+                sections.append((text, None))
+            elif group in groups:
+                groups[group].append(text)
+            else:
+                groups[group] = [text]
+                sections.append((None, group))
+
+        blocks = []
+        for text, group in sections:
+            if group is None:
+                blocks.append(text)
+                continue
+            lines = groups[group]
+            title = group if len(lines) == 1 else f"{group} ({len(lines)})"
+            shown = lines[:MAX_GROUP_LINES]
+            if len(lines) > len(shown):
+                shown.append(f"… and {len(lines) - len(shown)} more")
+            blocks.append("\n".join([title] + shown))
+
+        messages, current = [], ""
+        for block in blocks:
+            block = block[:MAX_MESSAGE]
+            if current and len(current) + 2 + len(block) > MAX_MESSAGE:
+                messages.append(current)
+                current = ""
+            current = f"{current}\n\n{block}" if current else block
+        if current:
+            messages.append(current)
+        return messages
+
+    async def _deliver(self, text: str):
+        for _ in range(self.retries):
+            await self.bucket.acquire()
+            try:
+                await self.send(text)
+                self.sent += 1
+                return
+            except Exception as e:
+                wait = flood_wait_seconds(e)
+                if wait is None:
+                    log.warning(f"⚠️ Could not send to the log group: {e}")
+                    return
+                log.warning(f"🌊 Log group FloodWait {wait:.0f}s")
+                self.bucket.pause(wait)
+        log.warning("⚠️ Gave up on a log digest after repeated FloodWaits")
+
+    def _drain(self):
+        while not self._queue.empty():
+            self._batch.append(self._queue.get_nowait())
+
+    async def run(self):
+        while True:
+            self._batch.append(await self._queue.get())
+            await asyncio.sleep(self.window)  # let the rest of a burst arrive
+            self._drain()
+            batch, self._batch = self._batch, []
+            await self._flush(batch)
+
+    # ------------------------ Lifecycle ------------------------
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(), name="log-notifier")
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop collecting and send whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._drain()
+        batch, self._batch = self._batch, []
+        try:
+            await asyncio.wait_for(self._flush(batch), timeout)
+        except asyncio.TimeoutError:
+            log.warning("⚠️ Log digest not sent before shutdown")
+
+    async def _flush(self, events: List[Event]):
+        for text in self.digest(events):
+            await self._deliver(text)
+
+
+# ------------------------ Process-wide sink ------------------------
+_sink: Optional[Callable[[str, Optional[str]], None]] = None
+
+
+def install(sink: Optional[Callable[[str, Optional[str]], None]]):
+    """Route notify() to `sink(text, group)`, e.g. LogNotifier.notify; None only logs."""
+    global _sink
+    _sink = sink
+
+
+def notify(text: str, group: Optional[str] = None):
+    """Report an event to the log group through this process's notifier."""
+    if _sink is None:
+        log.info(f"📝 {group + ': ' if group else ''}{text}")
+        return
+    try:
+        _sink(text, group)
+    except Exception as e:
+        log.warning(f"⚠️ Could not queue log notification: {e}")
@@ -0,0 +1,183 @@
+# session_cache.py — Write-through in-memory cache in front of DBSessionManager
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from db import PAGE_SIZE, DBSessionManager
+
+
+class SessionMeta:
+    __slots__ = ("user_id", "session_text", "connected_at", "last_active", "running")
+
+    def __init__(self, user_id: int, session_text: Optional[str] = None):
+        self.user_id = user_id
+        self.session_text = session_text
+        self.connected_at: Optional[float] = None
+        self.last_active: Optional[float] = None
+        self.running = False
+
+
+class SessionCache:
+    """Same async interface as DBSessionManager, with reads served from memory.
+
+    - every stored user id is kept in recency order, so list_sessions()
+      and iter_sessions() never touch the database after warm()
+    - per-user metadata (session text, connected_at, last_active, running)
+      lives in an LRU bounded by `max_entries`
+    - writes go to the database first, then update memory (write-through)
+    - stats() loads who is new and who reconnected today once per day and
+      then keeps both sets up to date in memory, by the rules of db.stats()
+    """
+
+    def __init__(self, db: DBSessionManager, max_entries: int = 10_000):
+        self.db = db
+        self.max_entries = max_entries
+        self._meta: "OrderedDict[int, SessionMeta]" = OrderedDict()
+        self._ids: "OrderedDict[int, None]" = OrderedDict()  # least → most recent
+        self._running = set()
+        self._warm = False
+        self._warm_lock = asyncio.Lock()
+        self._stats_day = None
+        self._new_today: Set[int] = set()
+        self._reconnected_today: Set[int] = set()
+
+    # ------------------------ Internals ------------------------
+    async def warm(self):
+        """Load every user id once; later listings are served from memory."""
+        ids: List[int] = []
+        async for page in self.db.iter_sessions():
+            ids.extend(page)
+        self._ids = OrderedDict((uid, None) for uid in reversed(ids))
+        self._warm = True
+
+    async def _ensure_warm(self):
+        if not self._warm:
+            async with self._warm_lock:
+                if not self._warm:
+                    await self.warm()
+
+    async def _ensure_stats(self):
+        today = datetime.utcnow().date()
+        if self._stats_day != today:
+            self._new_today, self._reconnected_today = await self.db.active_today()
+            self._stats_day = today
+
+    def _entry(self, user_id: int) -> SessionMeta:
+        meta = self._meta.get(user_id)
+        if meta is not None:
+            self._meta.move_to_end(user_id)
+        else:
+            meta = self._meta[user_id] = SessionMeta(user_id)
+            while len(self._meta) > self.max_entries:
+                self._meta.popitem(last=False)
+        return meta
+
+    # ------------------------ Writes ------------------------
+    async def save_session(self, user_id: int, session_text: str) -> bool:
+        """Store a session; True if the user is new, False for a reconnect."""
+        await self._ensure_warm()
+        await self._ensure_stats()
+        await self.db.save_session(user_id, session_text)
+
+        new = user_id not in self._ids
+        if new:
+            self._new_today.add(user_id)
+        elif user_id not in self._new_today:
+            self._reconnected_today.add(user_id)
+        self._ids[user_id] = None
+        self._ids.move_to_end(user_id)
+
+        meta = self._entry(user_id)
+        meta.session_text = session_text
+        meta.connected_at = meta.last_active = time.time()
+        return new
+
+    async def delete_session(self, user_id: int) -> bool:
+        await self._ensure_warm()
+        deleted = await self.db.delete_session(user_id)
+        self._ids.pop(user_id, None)
+        self._meta.pop(user_id, None)
+        self._running.discard(user_id)
+        self._new_today.discard(user_id)
+        self._reconnected_today.discard(user_id)
+        return deleted
+
+    async def save_settings(self, user_id: int, settings: dict) -> bool:
+        await self._ensure_warm()
+        if user_id not in self._ids:
+            return False
+        return await self.db.save_settings(user_id, settings)
+
+    async def all_settings(self) -> Dict[int, dict]:
+        return await self.db.all_settings()
+
+    async def save_activity(self, events: List[tuple]):
+        await self.db.save_activity(events)
+
+    async def activity_counts(self, period: int, start: int, end: int) -> Dict[str, int]:
+        return await self.db.activity_counts(period, start, end)
+
+    def touch(self, user_id: int):
+        """Record activity; moves the user to the front of list_sessions()."""
+        if user_id in self._ids:
+            self._ids.move_to_end(user_id)
+            self._entry(user_id).last_active = time.time()
+
+    def mark_running(self, user_id: int, running: bool):
+        if user_id not in self._ids:
+            return
+        meta = self._entry(user_id)
+        meta.running = running
+        if running:
+            self._running.add(user_id)
+            meta.last_active = time.time()
+        else:
+            self._running.discard(user_id)
+
+    # ------------------------ Reads ------------------------
+    async def get_session(self, user_id: int) -> Optional[str]:
+        return (await self.get_many([user_id])).get(user_id)
+
+    async def get_many(self, user_ids: Iterable[int]) -> Dict[int, str]:
+        await self._ensure_warm()
+        found: Dict[int, str] = {}
+        missing = []
+        for uid in user_ids:
+            if uid not in self._ids:
+                continue
+            meta = self._meta.get(uid)
+            if meta is not None and meta.session_text is not None:
+                found[uid] = meta.session_text
+            else:
+                missing.append(uid)
+        if missing:
+            for uid, text in (await self.db.get_many(missing)).items():
+                self._entry(uid).session_text = text
+                found[uid] = text
+        return found
+
+    def meta(self, user_id: int) -> Optional[SessionMeta]:
+        return self._meta.get(user_id)
+
+    async def iter_sessions(self, page_size: int = PAGE_SIZE) -> AsyncIterator[List[int]]:
+        users = await self.list_sessions()
+        for i in range(0, len(users), page_size):
+            yield users[i:i + page_size]
+
+    async def list_sessions(self) -> List[int]:
+        """User ids, most recently active first (from memory)."""
+        await self._ensure_warm()
+        return list(reversed(self._ids))
+
+    def running_count(self) -> int:
+        return len(self._running)
+
+    async def stats(self):
+        await self._ensure_warm()
+        await self._ensure_stats()
+        return len(self._ids), len(self._new_today), len(self._reconnected_today)
+
+    async def close(self):
+        await self.db.close()
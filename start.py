@@ -1,6 +1,6 @@
 # start.py - Heroku entrypoint
-from bot import app
+from bot import run
 
 if __name__ == "__main__":
     print("🚀 Starting TNC-WordChain Userbot controller...")
-    app.run()
+    run()
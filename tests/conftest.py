@@ -0,0 +1,40 @@
+# tests/conftest.py — session stores shared by the db and cache tests
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from db import MemorySessionBackend, SQLiteSessionBackend
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        backend = SQLiteSessionBackend(str(tmp_path / "sessions.db"))
+    else:
+        backend = MemorySessionBackend()
+    yield backend
+    asyncio.run(backend.close())
+
+
+async def set_times(backend, user_id: int, created_at: datetime, updated_at: datetime):
+    """Overwrite a stored session's timestamps, as if it had been saved then."""
+    if isinstance(backend, MemorySessionBackend):
+        backend._rows[user_id].update(created_at=created_at, updated_at=updated_at)
+        return
+
+    def update():
+        con = backend._connect()
+        con.execute(
+            "UPDATE sessions SET created_at = ?, updated_at = ? WHERE user_id = ?",
+            (created_at.isoformat(), updated_at.isoformat(), user_id),
+        )
+        con.commit()
+
+    await backend._run(update)
+
+
+async def backdate(backend, user_id: int, days: float):
+    """Move a stored session back `days`."""
+    when = datetime.utcnow() - timedelta(days=days)
+    await set_times(backend, user_id, when, when)
@@ -0,0 +1,12 @@
+# tests/fake_runner.py — a stand-in userbot runner for worker processes
+# Used as "tests.fake_runner:run"; the session string picks the behaviour.
+import asyncio
+
+
+async def run(session_string, user_id, ready):
+    if session_string == "crash":
+        raise RuntimeError("crashed before connecting")
+    if session_string == "slow":
+        await asyncio.sleep(0.5)
+    ready()
+    await asyncio.Event().wait()
@@ -0,0 +1,90 @@
+# tests/test_activity.py — activity totals assembled from hour and day rollups
+import asyncio
+import random
+
+import pytest
+
+from activity import DAY, GAME, HOUR, KINDS, WORD, ActivityLog, ceil_to, floor_to
+from db import MemorySessionBackend
+
+START = 20000 * DAY  # a UTC midnight
+
+
+def _log(backend, queries=None):
+    async def counts(period, start, end):
+        if queries is not None:
+            queries.append((period, start, end))
+        return await backend.activity_counts(period, start, end)
+
+    return ActivityLog(backend.save_activity, counts)
+
+
+def _expected(events, start, end):
+    start, end = floor_to(start, HOUR), ceil_to(end, HOUR)
+    totals = dict.fromkeys(KINDS, 0)
+    for hour, kind, _, n in events:
+        if start <= hour < end:
+            totals[kind] += n
+    return totals
+
+
+def test_ranges_match_the_raw_log():
+    rng = random.Random(7)
+    events = [
+        (START + rng.randrange(4 * 24) * HOUR, rng.choice(KINDS), rng.randrange(1, 4), rng.randrange(1, 5))
+        for _ in range(300)
+    ]
+    ranges = [(START + rng.uniform(0, 4 * DAY), rng.uniform(0, 3 * DAY)) for _ in range(100)]
+    ranges += [(START, DAY), (START, 4 * DAY), (START + HOUR, 2 * DAY - 2 * HOUR), (START + 30, 1)]
+
+    async def run():
+        backend = MemorySessionBackend()
+        activity_log = _log(backend)
+        activity_log.record_many(events)
+        await activity_log.flush()
+        return [await activity_log.counts(start, start + length) for start, length in ranges]
+
+    for (start, length), totals in zip(ranges, asyncio.run(run())):
+        assert totals == _expected(events, start, start + length)
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    # Inside one day: hour rows only
+    (START + 2 * HOUR, START + 5 * HOUR, [(HOUR, START + 2 * HOUR, START + 5 * HOUR)]),
+    # Whole days: day rows only
+    (START, START + 3 * DAY, [(DAY, START, START + 3 * DAY)]),
+    # Partial days at either end around whole days
+    (START + 20 * HOUR, START + 2 * DAY + 3 * HOUR, [
+        (DAY, START + DAY, START + 2 * DAY),
+        (HOUR, START + 20 * HOUR, START + DAY),
+        (HOUR, START + 2 * DAY, START + 2 * DAY + 3 * HOUR),
+    ]),
+    # Across one midnight only: hour rows on both sides
+    (START + 20 * HOUR, START + DAY + 3 * HOUR, [(HOUR, START + 20 * HOUR, START + DAY + 3 * HOUR)]),
+])
+def test_rollups_queried(start, end, expected):
+    queries = []
+    asyncio.run(_log(MemorySessionBackend(), queries).counts(start, end))
+    assert queries == expected
+
+
+def test_unflushed_and_failed_batches_still_count():
+    async def failing(events):
+        raise RuntimeError("database is down")
+
+    async def run():
+        backend = MemorySessionBackend()
+        activity_log = ActivityLog(failing, backend.activity_counts)
+        activity_log.record(WORD, 1, n=3, at=START + 10)
+        activity_log.record(WORD, 1, at=START + 20)
+        await activity_log.flush()  # fails; kept for the next one
+        activity_log.record(GAME, 2, at=START + HOUR)
+        before = await activity_log.counts(START, START + DAY)
+
+        activity_log.save = backend.save_activity
+        await activity_log.flush()
+        return before, await activity_log.counts(START, START + DAY), backend._activity
+
+    before, after, rows = asyncio.run(run())
+    assert before == after == {**dict.fromkeys(KINDS, 0), WORD: 4, GAME: 1}
+    assert sorted(rows) == [(START, WORD, 1, 4), (START + HOUR, GAME, 2, 1)]
@@ -0,0 +1,101 @@
+# tests/test_broadcast.py — pacing, flood waits and checkpoints of the broadcaster
+import asyncio
+import time
+
+from broadcast import Broadcaster, BroadcastJob, TokenBucket
+
+
+class FloodWait(Exception):
+    def __init__(self, value):
+        super().__init__(f"wait {value}s")
+        self.value = value
+
+
+class UserIsBlocked(Exception):
+    pass
+
+
+def test_token_bucket_paces_after_the_burst():
+    async def run():
+        bucket = TokenBucket(rate=50, capacity=5)
+        started = time.monotonic()
+        for _ in range(15):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # 5 tokens up front, then 10 more at 50/s
+    assert 0.18 <= asyncio.run(run()) < 0.5
+
+
+def test_flood_wait_pauses_everyone_and_retries():
+    sends = []
+
+    async def send(user_id):
+        sends.append((user_id, time.monotonic()))
+        if len(sends) == 1:
+            raise FloodWait(0.3)
+
+    async def run():
+        broadcaster = Broadcaster(send, rate=100, concurrency=2)
+        started = time.monotonic()
+        job = await broadcaster.run(BroadcastJob(1, 2, [10, 11, 12]))
+        return job, started
+
+    job, started = asyncio.run(run())
+    assert (job.sent, job.failed, job.pruned) == (3, 0, 0)
+    assert [user_id for user_id, _ in sends].count(10) == 2
+    # Nothing else went out until the flood wait was over
+    assert all(at - started >= 0.25 for _, at in sends[1:])
+
+
+def test_unreachable_recipients_are_pruned():
+    pruned = []
+
+    async def send(user_id):
+        if user_id == 11:
+            raise UserIsBlocked()
+
+    async def prune(user_id):
+        pruned.append(user_id)
+
+    job = asyncio.run(Broadcaster(send, rate=100, prune=prune).run(BroadcastJob(1, 2, [10, 11, 12])))
+    assert (job.sent, job.failed, job.pruned) == (2, 0, 1)
+    assert pruned == [11]
+
+
+def test_checkpoint_tracks_pending_and_is_removed(tmp_path):
+    state = tmp_path / "broadcast.json"
+    checkpoints = []
+
+    async def send(user_id):
+        pass
+
+    async def on_progress(job):
+        checkpoints.append(sorted(Broadcaster.load(str(state)).pending))
+
+    broadcaster = Broadcaster(send, rate=100, concurrency=1, state_path=str(state),
+                              on_progress=on_progress, progress_interval=0)
+    job = asyncio.run(broadcaster.run(BroadcastJob(1, 2, [10, 11, 12])))
+    assert job.sent == 3
+    assert checkpoints == [[10, 11, 12], [11, 12], [12], []]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_resume_from_checkpoint(tmp_path):
+    state = str(tmp_path / "broadcast.json")
+    job = BroadcastJob(1, 2, [10, 11, 12])
+    job.pending, job.sent = [12], 2
+    broadcaster = Broadcaster(lambda user_id: asyncio.sleep(0), rate=100, state_path=state)
+    broadcaster.save(job)
+
+    resumed = Broadcaster.load(state)
+    assert (resumed.pending, resumed.sent, resumed.total) == ([12], 2, 3)
+    asyncio.run(broadcaster.run(resumed))
+    assert (resumed.sent, resumed.done) == (3, 3)
+    assert Broadcaster.load(state) is None
+
+
+def test_unreadable_checkpoint_is_ignored(tmp_path):
+    state = tmp_path / "broadcast.json"
+    state.write_text("{not json")
+    assert Broadcaster.load(str(state)) is None
@@ -0,0 +1,166 @@
+# tests/test_db.py — the session store contract, run against every backend
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta
+
+from activity import DAY, HOUR
+from db import PAGE_AFTER_SQL, PAGE_FIRST_SQL, SQLiteSessionBackend
+from tests.conftest import set_times
+
+
+async def _pages(backend, page_size):
+    return [page async for page in backend.iter_sessions(page_size)]
+
+
+def test_pages_most_recent_first(backend):
+    async def run():
+        for user_id in range(1, 24):
+            await backend.save_session(user_id, f"session-{user_id}")
+        await backend.save_session(5, "session-5b")  # reconnect moves it to the front
+        return await _pages(backend, 5)
+
+    pages = asyncio.run(run())
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    users = [user_id for page in pages for user_id in page]
+    assert users == [5] + [user_id for user_id in range(23, 0, -1) if user_id != 5]
+
+
+def test_pages_empty_and_exact(backend):
+    async def run():
+        empty = await _pages(backend, 4)
+        for user_id in range(8):
+            await backend.save_session(user_id, "s")
+        return empty, await _pages(backend, 4)
+
+    empty, pages = asyncio.run(run())
+    assert empty == []
+    assert [len(page) for page in pages] == [4, 4]
+
+
+def test_get_many(backend):
+    async def run():
+        for user_id in range(1, 1201):  # more than one SQLite parameter chunk
+            await backend.save_session(user_id, f"s{user_id}")
+        await backend.save_session(7, "s7b")
+        return (
+            await backend.get_many([7, 1200, 5000]),
+            await backend.get_many(range(1, 1301)),
+            await backend.get_many([]),
+        )
+
+    some, many, none = asyncio.run(run())
+    assert some == {7: "s7b", 1200: "s1200"}
+    assert len(many) == 1200 and many[600] == "s600"
+    assert none == {}
+
+
+def test_delete(backend):
+    async def run():
+        await backend.save_session(1, "a")
+        await backend.save_session(2, "b")
+        deleted = await backend.delete_session(1), await backend.delete_session(1)
+        return deleted, await backend.get_many([1, 2]), await _pages(backend, 10), await backend.stats()
+
+    deleted, found, pages, stats = asyncio.run(run())
+    assert deleted == (True, False)
+    assert found == {2: "b"}
+    assert pages == [[2]]
+    assert stats[0] == 1
+
+
+def test_settings_round_trip(backend):
+    settings = {"strategy": "hard", "chats": {"-100": {"enabled": False}}, "delay": [0.1, 0.2]}
+
+    async def run():
+        unknown = await backend.save_settings(1, settings)
+        await backend.save_session(1, "a")
+        await backend.save_session(2, "b")
+        saved = await backend.save_settings(1, settings)
+        await backend.save_session(1, "a2")  # reconnecting keeps them
+        stored = await backend.all_settings()
+        await backend.save_settings(1, None)
+        return unknown, saved, stored, await backend.all_settings()
+
+    unknown, saved, stored, cleared = asyncio.run(run())
+    assert (unknown, saved) == (False, True)
+    assert stored == {1: settings}
+    assert cleared == {}
+
+
+def test_stats_day_boundaries(backend):
+    midnight = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    just_before = midnight - timedelta(microseconds=1)
+
+    async def run():
+        for user_id in range(1, 6):
+            await backend.save_session(user_id, "s")
+        await set_times(backend, 1, midnight, midnight)  # new today
+        await set_times(backend, 2, just_before, just_before)  # yesterday, idle since
+        await set_times(backend, 3, just_before, midnight)  # yesterday, back today
+        await set_times(backend, 4, midnight - timedelta(days=30), just_before)  # back yesterday
+        # 5 was created just now
+        return await backend.stats(), await backend.active_today()
+
+    stats, (new, reconnected) = asyncio.run(run())
+    assert stats == (5, 2, 1)
+    assert (new, reconnected) == ({1, 5}, {3})
+
+
+def test_activity_rollups(backend):
+    day = 20000 * DAY
+    events = [
+        (day, "word", 1, 3),
+        (day, "word", 2, 2),
+        (day + HOUR, "game", 1, 1),
+        (day + 23 * HOUR, "word", 1, 4),
+        (day + DAY, "word", 1, 10),
+    ]
+
+    async def run():
+        await backend.save_activity(events[:3])
+        await backend.save_activity(events[3:])
+        counts = backend.activity_counts
+        return [
+            await counts(HOUR, day, day + HOUR),
+            await counts(HOUR, day, day + 2 * HOUR),
+            await counts(HOUR, day + HOUR, day + DAY),
+            await counts(DAY, day, day + DAY),
+            await counts(DAY, day, day + 2 * DAY),
+            await counts(DAY, day + 2 * DAY, day + 3 * DAY),
+        ]
+
+    assert asyncio.run(run()) == [
+        {"word": 5},
+        {"word": 5, "game": 1},
+        {"game": 1, "word": 4},
+        {"word": 9, "game": 1},
+        {"word": 19, "game": 1},
+        {},
+    ]
+
+
+def test_page_queries_use_index(tmp_path):
+    backend = SQLiteSessionBackend(str(tmp_path / "sessions.db"))
+    con = backend._connect()
+    try:
+        for sql, args in ((PAGE_FIRST_SQL, (10,)), (PAGE_AFTER_SQL, ("2024-01-01", 1, 10))):
+            plan = " ".join(row[-1] for row in con.execute(f"EXPLAIN QUERY PLAN {sql}", args))
+            assert "idx_sessions_updated" in plan
+            assert "TEMP B-TREE" not in plan
+    finally:
+        backend._close()
+
+
+def test_legacy_table_migrated(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE sessions (user_id INTEGER PRIMARY KEY, session_text TEXT NOT NULL, created_at TEXT)")
+    con.executemany("INSERT INTO sessions VALUES (?, ?, ?)", [(1, "a", "2024-01-02"), (2, "b", None)])
+    con.commit()
+    con.close()
+
+    backend = SQLiteSessionBackend(path)
+    notnull = {row[1]: row[3] for row in backend._connect().execute("PRAGMA table_info(sessions)")}
+    assert notnull["updated_at"] == 1 and "settings" in notnull
+    assert asyncio.run(_pages(backend, 10)) == [[1, 2]]
+    asyncio.run(backend.close())
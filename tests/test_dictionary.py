@@ -0,0 +1,43 @@
+# tests/test_dictionary.py — hot reload releases the old index
+import asyncio
+import gc
+import weakref
+
+from userbots import dictionary
+from userbots.game_state import GameRegistry
+from userbots.learned_words import LearnedWords
+from userbots.strategy import difficulty_table
+from userbots.word_trie import word_trie
+
+
+def test_reload_releases_old_index(tmp_path):
+    words = tmp_path / "words.txt"
+    words.write_text("apple\napricot\nbanana\nthistle\nthorn\n")
+    path = str(words)
+    learned = LearnedWords(str(tmp_path / "learned.txt"))
+    learned.reject("apple")
+
+    async def run():
+        old = await dictionary.load_dictionary(path)
+        games = GameRegistry(old)
+        dictionary.subscribe(games)
+        games.get(-100).used.add("banana")
+        # Everything that caches per index during play
+        word_trie(old).sample("th", k=2)
+        difficulty_table(old)
+        learned.exclude(old)
+        ref = weakref.ref(old)
+        del old
+
+        words.write_text("apple\napricot\nbanana\nthistle\nthorn\ncherry\n")
+        new = await dictionary.reload_dictionary(path)
+        return ref, new, games
+
+    try:
+        ref, new, games = asyncio.run(run())
+        gc.collect()
+        assert ref() is None
+        assert games.index is new and games.get(-100).used.played("banana")
+        assert word_trie(new).index is new
+    finally:
+        dictionary._indexes.pop(path, None)
@@ -0,0 +1,46 @@
+# tests/test_dispatcher.py — routing turn prompts to seats
+from userbots.dispatcher import ChatDispatcher, Seat
+from userbots.game_parser import PlayerIdentity, parse_message
+
+CHAT = -100
+
+
+class _Settings:
+    def plays_in(self, chat_id):
+        return True
+
+
+class _Seat(Seat):
+    settings = _Settings()
+
+
+def _dispatcher(*seats):
+    dispatcher = ChatDispatcher(handle=None)
+    for seat in seats:
+        dispatcher.register(seat)
+    return dispatcher
+
+
+def _seat(user_id, name="Alice"):
+    return _Seat(None, PlayerIdentity(name, None, user_id), None)
+
+
+TURN = parse_message("Turn: Alice\nYour word must start with A.")
+
+
+def test_single_match_is_routed():
+    seat = _seat(1)
+    assert _dispatcher(seat).owner(CHAT, TURN) is seat
+
+
+def test_same_name_prefers_seat_seen_in_chat():
+    first, second = _seat(1), _seat(2)
+    dispatcher = _dispatcher(first, second)
+    dispatcher._chats[CHAT] = {2}
+    assert dispatcher.owner(CHAT, TURN) is second
+
+
+def test_same_name_none_seen_in_chat():
+    dispatcher = _dispatcher(_seat(1), _seat(2))
+    dispatcher._chats[CHAT] = {3}
+    assert dispatcher.owner(CHAT, TURN) is None
@@ -0,0 +1,79 @@
+# tests/test_game_parser.py — parse_message against a corpus of real game messages
+import pytest
+
+from userbots.game_parser import (
+    ACCEPTED, AFK, ANSWER, NEW_ROUND, REJECTED, TURN, USED, PlayerIdentity, parse_message,
+)
+
+# (message, expected kind, expected fields); also timed by benchmarks/bench_game_parser.py
+CORPUS = [
+    (
+        "Turn: Alice ✨ (Next: Bob)\nYour word must start with E and include at least 4 letters.\n"
+        "You have 30s to answer.\nPlayers remaining: 3/4\nTotal words: 12",
+        TURN, {"turn_owner": "alice", "prefix": "e", "include": "", "min_len": 4, "banned": None,
+               "time_limit": 30},
+    ),
+    (
+        "Turn: Bob (Next: Alice)\nYour word must start with T, include R and include at least 5 letters.\n"
+        "You have 25s to answer.",
+        TURN, {"turn_owner": "bob", "prefix": "t", "include": "r", "min_len": 5, "time_limit": 25},
+    ),
+    (
+        "Turn: Carol\nYour word must start with A and include at least 3 letters.\n"
+        "Banned letters: E, I, O\nYou have 40s to answer.",
+        TURN, {"turn_owner": "carol", "prefix": "a", "banned": ["e", "i", "o"], "min_len": 3,
+               "time_limit": 40},
+    ),
+    (
+        "Turn: Dave (Next: Alice)\nYour word must start with TH, include ING and include at least 6 letters.\n"
+        "You have 30s to answer.",
+        TURN, {"turn_owner": "dave", "prefix": "th", "include": "ing", "min_len": 6, "max_len": None},
+    ),
+    (
+        "Turn: Erin\nYour word must start with QU and contain exactly 5 letters.",
+        TURN, {"turn_owner": "erin", "prefix": "qu", "include": "", "min_len": 5, "max_len": 5},
+    ),
+    (
+        "Turn: Frank\nYour word must start with S, include at least 4 letters and at most 7 letters.",
+        TURN, {"turn_owner": "frank", "prefix": "s", "min_len": 4, "max_len": 7},
+    ),
+    (
+        "Turn: Grace\nYour word must start with B and include the letter X.",
+        TURN, {"turn_owner": "grace", "prefix": "b", "include": "x"},
+    ),
+    (
+        "Turn: Heidi\nYour word must start with P and contain the letters ST.",
+        TURN, {"turn_owner": "heidi", "prefix": "p", "include": "st"},
+    ),
+    ("Alice won the game out of 5 players!", NEW_ROUND, {}),
+    ("Starting a new game in 30 seconds", NEW_ROUND, {}),
+    ("Bob skipped due to AFK.\nTurn: Carol\nYour word must start with S.", AFK, {}),
+    ("No word given. Bob is eliminated!", AFK, {}),
+    ("Elephant", ANSWER, {"word": "elephant"}),
+    ("  tomato ", ANSWER, {"word": "tomato"}),
+    ("lol nice one", None, {}),
+    ("Qwzx is not in my list of words.", REJECTED, {"word": "qwzx"}),
+    ("Apple has been used.", USED, {"word": "apple"}),
+    ("Zymurgy is accepted.", ACCEPTED, {"word": "zymurgy"}),
+    ("gg 👍", None, {}),
+    ("42", None, {}),
+    ("", None, {}),
+]
+
+
+@pytest.mark.parametrize("text, kind, fields", CORPUS, ids=[text[:30] or "empty" for text, _, _ in CORPUS])
+def test_corpus(text, kind, fields):
+    event = parse_message(text)
+    assert (event.kind if event else None) == kind
+    for name, value in fields.items():
+        assert getattr(event, name) == value, name
+
+
+def test_turn_owner():
+    me = PlayerIdentity("Alice ✨", None, 1001)
+    assert me.owns(parse_message(CORPUS[0][0]))
+    assert not me.owns(parse_message(CORPUS[1][0]))
+
+
+def test_turn_owner_by_id():
+    assert PlayerIdentity("🔥", None, 777).owns(parse_message("Turn: 777\nstart with a"))
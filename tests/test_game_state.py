@@ -0,0 +1,64 @@
+# tests/test_game_state.py — which unknown words may be learned from a turn
+import pytest
+
+from userbots.game_parser import PlayerIdentity, parse_message
+from userbots.game_state import GameState
+from userbots.word_index import WordIndex
+
+ALICE = PlayerIdentity("Alice", None, 1001)
+BOB = PlayerIdentity("Bob", None, 1002)
+
+
+@pytest.fixture
+def game():
+    game = GameState(WordIndex.build(["tomato", "turnip"]))
+    game.turn = parse_message(
+        "Turn: Alice (Next: Bob)\nYour word must start with T, include R and include at least 5 letters.\n"
+        "Banned letters: Z\nYou have 30s to answer."
+    )
+    return game
+
+
+def test_turn_owner_answer_is_accepted(game):
+    assert game.answers_turn("trellis", ALICE)
+
+
+@pytest.mark.parametrize("word, sender", [
+    ("trellis", BOB),  # not this player's turn
+    ("lol", ALICE),  # chatter: wrong prefix, too short
+    ("trek", ALICE),  # too short
+    ("tiles", ALICE),  # lacks the include
+    ("trapeze", ALICE),  # banned letter
+])
+def test_chatter_is_rejected(game, word, sender):
+    assert not game.answers_turn(word, sender)
+
+
+def test_no_turn_announced():
+    game = GameState(WordIndex.build(["tomato"]))
+    assert not game.answers_turn("lol", ALICE)
+    game.turn = parse_message("Turn: Alice\nYour word must start with L.")
+    game.new_round()
+    assert not game.answers_turn("lollipop", ALICE)
+
+
+def test_rejected_word_is_not_played_again(game):
+    game.record_rejected("turnip")
+    game.record_rejected("trellis")  # unknown to the dictionary
+    assert game.used.played("turnip") and game.used.played("trellis")
+
+
+def test_exact_length_applies_to_its_turn_only():
+    game = GameState(WordIndex.build(["tomato"]))
+    exact = parse_message("Turn: Alice\nYour word must start with QU and contain exactly 5 letters.")
+    game.apply_turn(exact)
+    assert game.min_length_for(exact) == 5
+
+    following = parse_message("Turn: Bob\nYour word must start with E.")
+    game.apply_turn(following)
+    assert game.min_length_for(following) == 3
+
+    longer = parse_message("Turn: Alice\nYour word must start with E and include at least 6 letters.")
+    game.apply_turn(longer)
+    game.apply_turn(following)
+    assert game.min_length_for(following) == 6
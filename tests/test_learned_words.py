@@ -0,0 +1,36 @@
+# tests/test_learned_words.py — the blacklist overlay
+import gc
+import weakref
+
+from userbots.learned_words import LearnedWords, compact
+from userbots.word_index import WordIndex
+
+
+def test_refused_words_excluded(tmp_path):
+    learned = LearnedWords(str(tmp_path / "learned.txt"))
+    index = WordIndex.build(["apple", "apricot"])
+    learned.reject("apple")
+    excluded = learned.exclude(index)
+    assert index.find("apple") in excluded and index.find("apricot") not in excluded
+
+
+def test_overlay_does_not_pin_old_index(tmp_path):
+    learned = LearnedWords(str(tmp_path / "learned.txt"))
+    learned.reject("apple")
+    old = WordIndex.build(["apple", "apricot"])
+    learned.exclude(old)
+    ref = weakref.ref(old)
+    del old
+    gc.collect()
+    assert ref() is None
+
+    new = WordIndex.build(["apple", "banana"])
+    assert new.find("apple") in learned.exclude(new)
+
+
+def test_compact_keeps_last_verdict(tmp_path):
+    path = tmp_path / "learned.txt"
+    path.write_text("+zyzzyva\n-zyzzyva\n+quokka\n-apple\n+apple\n")
+    compact(str(path))
+    assert sorted(path.read_text().split()) == ["+apple", "+quokka", "-zyzzyva"]
+    assert [p.name for p in tmp_path.iterdir()] == ["learned.txt"]
@@ -0,0 +1,71 @@
+# tests/test_loop_monitor.py — stall detection and the section profiler
+import asyncio
+import time
+
+import pytest
+
+import loop_monitor
+import notifier
+from loop_monitor import LoopWatchdog, section
+
+
+@pytest.fixture
+def notified():
+    events = []
+    notifier.install(lambda text, group=None: events.append((text, group)))
+    yield events
+    notifier.install(None)
+
+
+def _blocking_lookup(seconds):
+    time.sleep(seconds)
+
+
+def test_stall_is_attributed_to_its_section(notified):
+    async def run():
+        watchdog = LoopWatchdog(asyncio.get_running_loop(), threshold=0.05)
+        watchdog.start()
+        try:
+            await asyncio.sleep(0.3)  # an idle loop is never late
+            quiet = list(watchdog.blocks)
+            with section("lookup", 42):
+                _blocking_lookup(0.3)
+            await asyncio.sleep(0.2)  # let the report reach the loop
+            return quiet, list(watchdog.blocks)
+        finally:
+            watchdog.stop()
+
+    quiet, blocks = asyncio.run(run())
+    assert quiet == []
+    assert len(blocks) == 1
+    _, lag, handler, user_id, where = blocks[0]
+    assert lag >= 0.15 and (handler, user_id) == ("lookup", 42)  # less up to one heartbeat
+    assert where.startswith("tests/test_loop_monitor.py:") and where.endswith("_blocking_lookup")
+    assert len(notified) == 1 and "lookup" in notified[0][0]
+
+
+def test_sections_nest_and_restore():
+    async def run():
+        task = asyncio.current_task()
+        with section("handler", 7):
+            with section("lookup"):
+                inner = loop_monitor._labels[task]
+            outer = loop_monitor._labels[task]
+        return inner, outer, task in loop_monitor._labels
+
+    assert asyncio.run(run()) == (("lookup", 7), ("handler", 7), False)
+
+
+def test_profiling_times_sections():
+    loop_monitor.set_profiling(True)
+    try:
+        for _ in range(3):
+            with section("lookup"):
+                time.sleep(0.01)
+    finally:
+        loop_monitor.set_profiling(False)
+    with section("lookup"):  # not profiled any more
+        pass
+    count, total, longest = loop_monitor.report()["calls"]["lookup"]
+    assert count == 3 and total >= 0.03 and longest >= 0.01
+    assert not loop_monitor.report()["profiling"]
@@ -0,0 +1,90 @@
+# tests/test_notifier.py — log group events batched into digests
+import asyncio
+
+import notifier
+from notifier import MAX_GROUP_LINES, MAX_MESSAGE, LogNotifier
+
+
+class FloodWait(Exception):
+    def __init__(self, value):
+        super().__init__(f"wait {value}s")
+        self.value = value
+
+
+def test_burst_is_sent_as_one_digest():
+    sent = []
+
+    async def send(text):
+        sent.append(text)
+
+    async def run():
+        log_notifier = LogNotifier(send, window=0.05, rate=100)
+        log_notifier.start()
+        log_notifier.notify("🟢 Bot started")
+        for user_id in range(30):
+            log_notifier.notify(f"{user_id}: session revoked", group="⛔ Userbots failed")
+        log_notifier.notify("♻️ Dictionary reloaded")
+        await asyncio.sleep(0.2)
+        log_notifier.notify("🔴 Bot stopping")
+        await log_notifier.stop()
+        return log_notifier
+
+    log_notifier = asyncio.run(run())
+    assert log_notifier.sent == 2 and len(sent) == 2
+    first = sent[0].split("\n\n")
+    assert first[0] == "🟢 Bot started"
+    assert first[1].startswith("⛔ Userbots failed (30)\n0: session revoked")
+    assert first[1].endswith(f"… and {30 - MAX_GROUP_LINES} more")
+    assert first[2] == "♻️ Dictionary reloaded"
+    assert sent[1] == "🔴 Bot stopping"
+
+
+def test_digest_splits_at_the_message_limit():
+    events = [("x" * 1000, None) for _ in range(10)]
+    messages = LogNotifier.digest(events)
+    assert len(messages) == 3
+    assert all(len(m) <= MAX_MESSAGE for m in messages)
+    assert sum(m.count("x" * 1000) for m in messages) == 10
+
+
+def test_flood_wait_delays_instead_of_dropping():
+    sent = []
+
+    async def send(text):
+        if not sent:
+            sent.append(None)
+            raise FloodWait(0.1)
+        sent.append(text)
+
+    async def run():
+        log_notifier = LogNotifier(send, window=0, rate=100)
+        log_notifier.notify("hello")
+        await log_notifier.stop()
+        return log_notifier
+
+    assert asyncio.run(run()).sent == 1
+    assert sent == [None, "hello"]
+
+
+def test_full_queue_drops_the_oldest():
+    async def run():
+        log_notifier = LogNotifier(lambda text: asyncio.sleep(0), max_queue=3)
+        for i in range(5):
+            log_notifier.notify(str(i))
+        log_notifier._drain()
+        return log_notifier
+
+    log_notifier = asyncio.run(run())
+    assert log_notifier.dropped == 2
+    assert [text for text, _ in log_notifier._batch] == ["2", "3", "4"]
+
+
+def test_process_sink():
+    events = []
+    notifier.install(lambda text, group=None: events.append((text, group)))
+    try:
+        notifier.notify("worker up", group="👷 Workers")
+    finally:
+        notifier.install(None)
+    notifier.notify("only logged")
+    assert events == [("worker up", "👷 Workers")]
@@ -0,0 +1,113 @@
+# tests/test_restore.py — staggered restore of stored sessions
+import asyncio
+import time
+
+import pytest
+
+import userbots.restore
+from db import MemorySessionBackend
+from userbots.restore import restore_sessions
+
+
+class FloodWait(Exception):
+    def __init__(self, seconds):
+        super().__init__(f"wait {seconds}s")
+        self.seconds = seconds
+
+
+class FakeSupervisor:
+    def __init__(self, connect=0.05, fail=None):
+        self.connect = connect
+        self.fail = fail or {}
+        self.started = []  # (user_id, monotonic time)
+        self.connecting = 0
+        self.most_connecting = 0
+
+    async def start(self, user_id, session, wait=False, timeout=60.0):
+        assert wait
+        self.started.append((user_id, time.monotonic()))
+        self.connecting += 1
+        self.most_connecting = max(self.most_connecting, self.connecting)
+        try:
+            await asyncio.sleep(self.connect)
+            error = self.fail.pop(user_id, None)
+            if error is not None:
+                raise error
+        finally:
+            self.connecting -= 1
+
+
+@pytest.fixture
+def jitters(monkeypatch):
+    calls = []
+
+    def uniform(low, high):
+        calls.append((low, high))
+        return 0.0
+
+    monkeypatch.setattr(userbots.restore.random, "uniform", uniform)
+    return calls
+
+
+async def _db(users):
+    backend = MemorySessionBackend()
+    for user_id in users:
+        await backend.save_session(user_id, f"session-{user_id}")
+        await asyncio.sleep(0.001)  # distinct updated_at, newest last
+    return backend
+
+
+def test_window_and_order(jitters):
+    supervisor = FakeSupervisor()
+
+    async def run():
+        return await restore_sessions(await _db(range(1, 13)), supervisor, concurrency=3, jitter=0.7)
+
+    progress = asyncio.run(run())
+    assert (progress.restored, progress.failed, progress.pending) == (12, 0, 0)
+    assert supervisor.most_connecting == 3
+    assert [user_id for user_id, _ in supervisor.started] == list(range(12, 0, -1))
+    assert jitters == [(0, 0.7)] * 12
+
+
+def test_jitter_spreads_starts():
+    supervisor = FakeSupervisor(connect=0)
+
+    async def run():
+        return await restore_sessions(await _db(range(1, 6)), supervisor, concurrency=5, jitter=0.2)
+
+    asyncio.run(run())
+    times = sorted(at for _, at in supervisor.started)
+    assert 0 < times[-1] - times[0] <= 0.3
+
+
+def test_flood_wait_pauses_the_window(jitters):
+    supervisor = FakeSupervisor(fail={6: FloodWait(0.3)})
+    seen = []
+
+    async def run():
+        return await restore_sessions(
+            await _db(range(1, 7)), supervisor, concurrency=2,
+            on_progress=lambda p: seen.append((p.restored, p.failed)),
+        )
+
+    progress = asyncio.run(run())
+    assert (progress.restored, progress.failed) == (5, 1)
+    flooded_at = dict(supervisor.started)[6] + supervisor.connect
+    # 5 was already connecting; everything after it waited out the flood
+    later = [at for user_id, at in supervisor.started if user_id < 5]
+    assert later and min(later) - flooded_at >= 0.29
+    assert seen[-1] == (5, 1) and len(seen) == 6
+
+
+def test_missing_session_counts_as_failed(jitters):
+    supervisor = FakeSupervisor(connect=0)
+
+    async def run():
+        backend = await _db([1, 2])
+        backend._rows[1]["session_text"] = ""
+        return await restore_sessions(backend, supervisor)
+
+    progress = asyncio.run(run())
+    assert (progress.restored, progress.failed) == (1, 1)
+    assert [user_id for user_id, _ in supervisor.started] == [2]
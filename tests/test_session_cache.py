@@ -0,0 +1,31 @@
+# tests/test_session_cache.py — the cache answers like the database it fronts
+import asyncio
+
+from db import DBSessionManager
+from session_cache import SessionCache
+from tests.conftest import backdate
+
+
+def test_stats_match_the_database(backend):
+    async def run():
+        db = DBSessionManager(backend=backend)
+        for user_id in (1, 2, 3):
+            await backend.save_session(user_id, "old")
+            await backdate(backend, user_id, days=2)
+        await backend.save_session(1, "again")  # reconnected before the cache loaded its stats
+
+        cache = SessionCache(db)
+        await cache.save_session(4, "new")
+        await cache.save_session(4, "new again")  # new today, not a reconnect
+        assert await cache.stats() == await db.stats() == (4, 1, 1)
+
+        await cache.save_session(1, "third")  # already counted
+        await cache.save_session(2, "back")
+        await cache.save_session(2, "back again")
+        assert await cache.stats() == await db.stats() == (4, 1, 2)
+
+        await cache.delete_session(2)
+        await cache.delete_session(4)
+        assert await cache.stats() == await db.stats() == (2, 0, 1)
+
+    asyncio.run(run())
@@ -0,0 +1,92 @@
+# tests/test_supervisor.py — restarts and backoff of supervised userbots
+import asyncio
+
+import pytest
+
+from userbots.supervisor import UserbotStartError, UserbotSupervisor
+
+
+class Revoked(Exception):
+    pass
+
+
+class Flood(Exception):
+    def __init__(self, seconds):
+        super().__init__(f"wait {seconds}s")
+        self.seconds = seconds
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff sleeps the supervisor asked for, skipped in real time."""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay, result=None):
+        if delay:  # not the test's own polling
+            delays.append(delay)
+        return await real_sleep(0, result)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    return delays
+
+
+def _crashing(errors):
+    """A runner raising each of `errors` in turn, then connecting."""
+    errors = iter(errors)
+
+    async def run(session_string, user_id, ready):
+        error = next(errors, None)
+        if error is not None:
+            raise error
+        ready()
+        await asyncio.Event().wait()
+
+    return run
+
+
+def test_backoff_doubles_up_to_the_cap(sleeps):
+    states = []
+
+    async def main():
+        supervisor = UserbotSupervisor(
+            _crashing([RuntimeError("down")] * 4), min_backoff=1, max_backoff=4,
+            on_state=lambda user_id, running: states.append(running),
+        )
+        await supervisor.start(1, "session")
+        while states[-1:] != [True]:
+            await asyncio.sleep(0)
+        assert supervisor.restarts[1] == 4
+        await supervisor.stop_all()
+
+    asyncio.run(main())
+    assert sleeps[:4] == [1, 2, 4, 4]
+
+
+def test_flood_wait_stretches_the_backoff(sleeps):
+    states = []
+
+    async def main():
+        supervisor = UserbotSupervisor(
+            _crashing([Flood(30), RuntimeError("down")]), min_backoff=1, max_backoff=300,
+            on_state=lambda user_id, running: states.append(running),
+        )
+        await supervisor.start(1, "session")
+        while states[-1:] != [True]:
+            await asyncio.sleep(0)
+        await supervisor.stop_all()
+
+    asyncio.run(main())
+    assert sleeps[:2] == [30, 60]
+
+
+def test_permanent_error_is_not_restarted(sleeps):
+    async def main():
+        supervisor = UserbotSupervisor(_crashing([Revoked("revoked")]), permanent_errors=(Revoked,))
+        with pytest.raises(UserbotStartError, match="revoked"):
+            await supervisor.start(1, "session", wait=True, timeout=5)
+        await supervisor.task(1)
+        assert not supervisor.is_running(1)
+
+    asyncio.run(main())
+    assert sleeps == []
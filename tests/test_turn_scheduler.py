@@ -0,0 +1,66 @@
+# tests/test_turn_scheduler.py — answer timing within a turn's time limit
+import asyncio
+import time
+
+from userbots.turn_scheduler import SAFETY_MARGIN, TurnScheduler, TurnTiming
+
+
+def test_resume_keeps_the_turn_deadline():
+    turns = TurnScheduler()
+    timing = turns.begin(30, received=time.monotonic() - 10, profile=(0.5, 1.0))
+    retry = turns.resume(timing)
+    assert retry is not timing
+    assert retry.received == timing.received
+    assert (retry.time_limit, retry.profile) == (30, (0.5, 1.0))
+    # 10s of the 15s ±20% target are already used up
+    assert 2 <= turns.delay(retry) <= 8
+
+
+def test_resume_too_late():
+    timing = TurnTiming(10, received=time.monotonic() - (10 - SAFETY_MARGIN))
+    assert TurnScheduler().resume(timing) is None
+
+
+def test_delay_never_reaches_the_safety_margin():
+    turns = TurnScheduler(fraction=2.0)  # aims past the end of the turn
+    timing = turns.begin(10)
+    assert turns.delay(timing) <= 10 - SAFETY_MARGIN
+
+
+def test_delay_counts_time_already_spent():
+    turns = TurnScheduler(fraction=0.5, min_delay=0)
+    timing = turns.begin(20, received=time.monotonic() - 4)
+    assert 4 <= turns.delay(timing) <= 8  # 10s ±20% target, 4s gone
+    late = turns.begin(20, received=time.monotonic() - 19)
+    assert turns.delay(late) == 0
+
+
+def test_min_delay_and_profile():
+    turns = TurnScheduler(fraction=0.01, min_delay=2)
+    assert 1.9 <= turns.delay(turns.begin(30)) <= 2
+    assert turns.delay(turns.begin(30, profile=(0.01, 0))) < 0.5
+
+
+def test_newer_turn_cancels_the_pending_answer():
+    sent = []
+
+    async def run():
+        turns = TurnScheduler(fraction=0, min_delay=0.2)
+        first = turns.schedule(1, turns.begin(30), lambda: _send(sent, "first"))
+        await asyncio.sleep(0)
+        second = turns.schedule(1, turns.begin(30, profile=(0, 0)), lambda: _send(sent, "second"))
+        other = turns.schedule(2, turns.begin(30, profile=(0, 0)), lambda: _send(sent, "other chat"))
+        await asyncio.gather(second, other)
+        assert first.cancelled()
+        assert not turns.cancel(1)  # already sent: nothing pending
+
+        turns.schedule(1, turns.begin(30), lambda: _send(sent, "dropped"))
+        assert turns.cancel(1)
+        await asyncio.sleep(0.3)
+
+    asyncio.run(run())
+    assert sent == ["second", "other chat"]
+
+
+async def _send(sent, word):
+    sent.append(word)
@@ -0,0 +1,72 @@
+# tests/test_user_profiles.py — batched resolution: FloodWait retries, bad peers bisect
+import asyncio
+from types import SimpleNamespace
+
+import user_profiles
+from user_profiles import ProfileCache
+
+
+class FloodWait(Exception):
+    def __init__(self, seconds):
+        super().__init__(f"wait {seconds}s")
+        self.value = seconds
+
+
+class PeerIdInvalid(Exception):
+    pass
+
+
+def _user(uid):
+    return SimpleNamespace(id=uid, first_name=f"User {uid}", username=None)
+
+
+def test_flood_wait_retries_same_chunk(monkeypatch):
+    calls, sleeps = [], []
+    floods = [FloodWait(7), FloodWait(3)]
+
+    async def fetch(ids):
+        calls.append(list(ids))
+        if floods:
+            raise floods.pop(0)
+        return [_user(uid) for uid in ids]
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(user_profiles.asyncio, "sleep", sleep)
+    profiles = asyncio.run(ProfileCache(fetch).get_many(range(1, 9)))
+    assert calls == [list(range(1, 9))] * 3
+    assert sleeps == [7, 3]
+    assert profiles[4] == ("User 4", None)
+
+
+def test_flood_wait_gives_up_without_caching(monkeypatch):
+    calls = []
+
+    async def fetch(ids):
+        calls.append(list(ids))
+        raise FloodWait(1)
+
+    async def sleep(seconds):
+        pass
+
+    monkeypatch.setattr(user_profiles.asyncio, "sleep", sleep)
+    cache = ProfileCache(fetch)
+    assert asyncio.run(cache.get_many([1, 2])) == {1: None, 2: None}
+    assert len(calls) == user_profiles.FLOOD_RETRIES + 1
+    assert all(ids == [1, 2] for ids in calls)
+    assert 1 not in cache._profiles  # retried on the next lookup
+
+
+def test_invalid_peer_is_isolated():
+    calls = []
+
+    async def fetch(ids):
+        calls.append(list(ids))
+        if 3 in ids:
+            raise PeerIdInvalid("bad peer")
+        return [_user(uid) for uid in ids]
+
+    profiles = asyncio.run(ProfileCache(fetch).get_many([1, 2, 3, 4]))
+    assert profiles == {1: ("User 1", None), 2: ("User 2", None), 3: None, 4: ("User 4", None)}
+    assert [1, 2, 3, 4] in calls and [3] in calls
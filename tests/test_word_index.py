@@ -0,0 +1,39 @@
+# tests/test_word_index.py — WordIndex / WordTrie sampling
+import random
+
+import pytest
+
+from userbots.word_index import WordIndex
+from userbots.word_trie import WordTrie
+
+WORDS = ["apple", "apricot", "avocado", "almond", "anchovy", "banana", "blueberry", "bean", "beret", "cherry"] + [
+    # Filler with no "e", so most random probes for "b" + "e" miss
+    f"b{a}{b}{c}" for a in "aiou" for b in "klmnprst" for c in "abcdfghijklmnopqrstuvwxyz"
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return WordIndex.build(WORDS)
+
+
+@pytest.fixture(params=["index", "trie"])
+def engine(request, index):
+    return index if request.param == "index" else WordTrie.build(index)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_sample_fills_k_when_matches_are_rare(engine, index, seed):
+    random.seed(seed)
+    # 3 of ~800 "b" words include "e": rejection sampling alone finds one or two
+    ids = engine.sample("b", include="e", k=3)
+    assert sorted(index.word(i) for i in ids) == ["bean", "beret", "blueberry"]
+
+    ids = engine.sample("a", k=5)
+    assert sorted(index.word(i) for i in ids) == sorted(w for w in WORDS if w.startswith("a"))
+
+
+def test_sample_k_respects_exclude_and_limits(engine, index):
+    exclude = {i for i in range(len(index)) if index.word(i) == "apple"}
+    words = {index.word(i) for i in engine.sample("a", k=10, exclude=exclude, max_len=7)}
+    assert words == {"apricot", "avocado", "almond", "anchovy"}
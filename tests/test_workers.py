@@ -0,0 +1,105 @@
+# tests/test_workers.py — WorkerPool against real worker processes
+import asyncio
+import time
+
+import pytest
+
+from userbots.supervisor import UserbotStartError
+from userbots.workers import WorkerPool
+
+RUNNER = "tests.fake_runner:run"
+
+
+async def _until(condition, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        met = condition()
+        if asyncio.iscoroutine(met):
+            met = await met
+        if met:
+            return
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.05)
+
+
+def _pool(**kwargs):
+    kwargs.setdefault("permanent", ())
+    return WorkerPool(2, runner=RUNNER, **kwargs)
+
+
+def test_start_status_stop():
+    states = []
+
+    async def main():
+        pool = _pool(on_state=lambda user_id, running: states.append((user_id, running)))
+        await pool.start_workers()
+        try:
+            assert await pool.start(1, "ready", wait=True, timeout=10)
+            assert await pool.start(2, "ready", wait=True, timeout=10)
+            status = await pool.status()
+            assert status["running"] == 2 and sorted(status["users"]) == [1, 2]
+            assert [w["running"] for w in status["workers"]] == [1, 1]
+
+            assert await pool.stop(1)
+            status = await pool.status()
+            assert status["users"] == [2]
+        finally:
+            await pool.stop_all()
+
+    asyncio.run(main())
+    assert states[:3] == [(1, True), (2, True), (1, False)]
+
+
+def test_state_reported_once_ready():
+    states = []
+
+    async def main():
+        pool = _pool(on_state=lambda user_id, running: states.append((user_id, running)))
+        await pool.start_workers()
+        try:
+            await pool.start(3, "slow")
+            assert states == []
+            await _until(lambda: (3, True) in states)
+        finally:
+            await pool.stop_all()
+
+    asyncio.run(main())
+
+
+def test_failed_start_raises():
+    async def main():
+        pool = _pool()
+        await pool.start_workers()
+        try:
+            with pytest.raises(UserbotStartError, match="crashed"):
+                await pool.start(4, "crash", wait=True, timeout=10)
+        finally:
+            await pool.stop_all()
+
+    asyncio.run(main())
+
+
+def test_dead_worker_is_respawned_with_its_sessions():
+    states = []
+
+    async def main():
+        pool = _pool(monitor_interval=0.1, on_state=lambda user_id, running: states.append((user_id, running)))
+        await pool.start_workers()
+        try:
+            await pool.start(5, "ready", wait=True, timeout=10)
+            worker = pool._workers[pool.shard(5)]
+            old_pid = worker.process.pid
+            worker.process.kill()
+
+            async def restarted():
+                status = await pool.status()
+                entry = status["workers"][worker.worker_id]
+                return entry["alive"] and entry["pid"] != old_pid and entry.get("users") == [5]
+
+            await _until(restarted)
+            await _until(lambda: states[-1] == (5, True))
+        finally:
+            await pool.stop_all()
+
+    asyncio.run(main())
+    assert (5, False) in states
@@ -0,0 +1,112 @@
+# user_profiles.py — Batched user resolution with a TTL profile cache
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from broadcast import flood_wait_seconds
+
+log = logging.getLogger("user_profiles")
+
+# (first_name, username) — username may be None
+Profile = Tuple[str, Optional[str]]
+
+# Telegram resolves at most this many users per users.getUsers call
+BATCH_SIZE = 200
+
+# FloodWaits sat out for one chunk before leaving it unresolved until next time
+FLOOD_RETRIES = 3
+
+
+class ProfileCache:
+    """Caches user display names for owner commands.
+
+    Misses are resolved with one batched call per BATCH_SIZE ids. Expired
+    entries are still served (stale-while-revalidate) and refreshed in the
+    background, so a page render costs at most one round trip.
+    """
+
+    def __init__(self, fetch: Callable[[List[int]], Awaitable[list]], ttl: float = 3600.0):
+        """`fetch(ids)` returns user objects with .id, .first_name and .username."""
+        self.fetch = fetch
+        self.ttl = ttl
+        self._profiles: Dict[int, Tuple[Optional[Profile], float]] = {}
+        self._refreshing: Optional[asyncio.Task] = None
+
+    async def _resolve(self, user_ids: List[int]):
+        for i in range(0, len(user_ids), BATCH_SIZE):
+            await self._resolve_chunk(user_ids[i:i + BATCH_SIZE])
+
+    async def _resolve_chunk(self, chunk: List[int]):
+        for attempt in range(FLOOD_RETRIES + 1):
+            try:
+                users = await self.fetch(chunk)
+                break
+            except Exception as e:
+                wait = flood_wait_seconds(e) or getattr(e, "seconds", None)
+                if wait is None:
+                    await self._split(chunk, e)
+                    return
+                # Splitting would only send more requests: wait, then retry as is
+                if attempt == FLOOD_RETRIES:
+                    log.warning(f"⚠️ FloodWait resolving {len(chunk)} users; leaving them for the next refresh")
+                    return
+                await asyncio.sleep(wait)
+        self._store(chunk, users)
+
+    async def _split(self, chunk: List[int], e: Exception):
+        # One unknown peer or username fails the whole call: split to isolate it.
+        if len(chunk) > 1:
+            mid = len(chunk) // 2
+            await self._resolve_chunk(chunk[:mid])
+            await self._resolve_chunk(chunk[mid:])
+            return
+        log.debug(f"Could not resolve user {chunk[0]}: {e}")
+        self._store(chunk, [])
+
+    def _store(self, chunk: List[int], users):
+        if not isinstance(users, list):
+            users = [users]
+        expires = time.monotonic() + self.ttl
+        for user in users:
+            self._profiles[user.id] = ((user.first_name or "Unknown", user.username), expires)
+        # Remember unresolvable users too, so they don't cost a call per page
+        for uid in chunk:
+            if uid not in self._profiles or self._profiles[uid][1] < expires:
+                self._profiles[uid] = (None, expires)
+
+    def _refresh_later(self, user_ids: List[int]):
+        if not user_ids or (self._refreshing is not None and not self._refreshing.done()):
+            return
+        self._refreshing = asyncio.create_task(self._resolve(user_ids))
+
+    async def get_many(self, user_ids: Iterable[int]) -> Dict[int, Optional[Profile]]:
+        """Profiles for `user_ids`; None for users Telegram could not resolve."""
+        user_ids = list(user_ids)
+        now = time.monotonic()
+        missing = [uid for uid in user_ids if uid not in self._profiles]
+        if missing:
+            await self._resolve(missing)
+        stale = [uid for uid in user_ids if uid in self._profiles and self._profiles[uid][1] <= now]
+        self._refresh_later(stale)
+        return {uid: self._profiles[uid][0] if uid in self._profiles else None for uid in user_ids}
+
+    def invalidate(self, user_id: int):
+        self._profiles.pop(user_id, None)
+
+    async def refresh_loop(self, list_ids: Callable[[], Awaitable[List[int]]], interval: Optional[float] = None):
+        """Periodically re-resolve every known user so pages rarely miss."""
+        interval = interval or self.ttl / 2
+        while True:
+            try:
+                user_ids = await list_ids()
+                deadline = time.monotonic() + interval
+                due = [uid for uid in user_ids if uid not in self._profiles or self._profiles[uid][1] <= deadline]
+                await self._resolve(due)
+                # Forget users who are no longer connected
+                known = set(user_ids)
+                for uid in [uid for uid in self._profiles if uid not in known]:
+                    del self._profiles[uid]
+            except Exception as e:
+                log.warning(f"⚠️ Profile refresh failed: {e}")
+            await asyncio.sleep(interval)
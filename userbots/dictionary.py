@@ -0,0 +1,174 @@
+# ==========================================================
+# userbots/dictionary.py — Process-wide shared dictionary
+# ==========================================================
+# Every userbot in the process reads from the same immutable WordIndex.
+# The dictionary file is parsed once per path; later callers get the
+# cached index back, so per-userbot dictionary overhead is one reference.
+#
+# A compiled artifact (`<words>.idx`) is memory-mapped when it matches the
+# source file's hash; otherwise it is rebuilt from the text and rewritten.
+# Build it ahead of time with:
+#
+#     python -m userbots.dictionary build words.txt [words.txt.idx]
+#
+# reload_dictionary() builds a new index off the event loop and swaps it in
+# with one assignment; GameRegistries subscribed with subscribe() are
+# rebound in the same step, so the old index is released right away.
+
+import asyncio
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+import weakref
+from typing import Awaitable, Callable, Dict, Optional
+
+from userbots.word_index import StaleIndexError, WordIndex
+
+log = logging.getLogger("wordchain_dictionary")
+
+_lock = threading.Lock()
+_indexes: Dict[str, WordIndex] = {}
+_registries: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def _read_words(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            w = line.strip().lower()
+            if w:
+                yield w
+
+
+def file_hash(path: str) -> bytes:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def index_path(path: str) -> str:
+    return f"{path}.idx"
+
+
+def build_index(path: str, out: Optional[str] = None) -> WordIndex:
+    """Compile the text dictionary at `path` into an index artifact."""
+    out = out or index_path(path)
+    digest = file_hash(path)
+    index = WordIndex.build(_read_words(path))
+    try:
+        index.save(out, digest)
+    except OSError as e:
+        log.warning(f"⚠️ Could not write dictionary index {out}: {e}")
+        return index
+    return WordIndex.open(out, digest)
+
+
+def import_words(path: str) -> WordIndex:
+    """Load the dictionary at `path`, preferring a fresh compiled artifact."""
+    artifact = index_path(path)
+    try:
+        digest = file_hash(path)
+    except FileNotFoundError:
+        # No source to compare against: trust the artifact if it exists.
+        return WordIndex.open(artifact)
+
+    try:
+        return WordIndex.open(artifact, digest)
+    except FileNotFoundError:
+        log.info(f"🛠️ No dictionary index for {path}, building one")
+    except (StaleIndexError, ValueError, OSError) as e:
+        log.info(f"🛠️ Rebuilding dictionary index for {path}: {e}")
+    return build_index(path, artifact)
+
+
+def get_dictionary(path: str) -> WordIndex:
+    """Return the shared index for `path`, loading it on first use."""
+    index = _indexes.get(path)
+    if index is not None:
+        return index
+    with _lock:
+        index = _indexes.get(path)
+        if index is None:
+            try:
+                index = import_words(path)
+            except (FileNotFoundError, StaleIndexError) as e:
+                log.error(f"❌ Could not load {path}: {e}")
+                return WordIndex.build([])
+            log.info(
+                f"📚 Loaded {len(index)} words from {path} "
+                f"({index.nbytes() // 1024} KiB, {'mmap' if index.mapped else 'heap'})"
+            )
+            _indexes[path] = index
+    return index
+
+
+async def load_dictionary(path: str) -> WordIndex:
+    """Async wrapper: load off the event loop so running userbots keep playing."""
+    index = _indexes.get(path)
+    if index is not None:
+        return index
+    return await asyncio.get_running_loop().run_in_executor(None, get_dictionary, path)
+
+
+# ------------------------ Hot reload ------------------------
+def subscribe(registry):
+    """Rebind `registry` (a GameRegistry) whenever its index is reloaded."""
+    _registries.add(registry)
+
+
+async def reload_dictionary(path: str, rebuild: bool = True) -> WordIndex:
+    """Load `path` again and swap it in for every subscribed game.
+
+    With `rebuild` the artifact is recompiled from the text file; without,
+    a fresh artifact written by another process is simply mapped.
+    """
+    started = time.monotonic()
+    loader = build_index if rebuild else import_words
+    index = await asyncio.get_running_loop().run_in_executor(None, loader, path)
+
+    # Swap on the event loop: handlers never see a half-rebound registry.
+    old = _indexes.get(path)
+    _indexes[path] = index
+    if old is not None:
+        for registry in list(_registries):
+            if registry.index is old:
+                registry.rebind(index)
+    log.info(f"🔄 Reloaded {len(index)} words from {path} in {time.monotonic() - started:.2f}s")
+    return index
+
+
+async def watch_dictionary(path: str, reload: Callable[[str], Awaitable[object]], interval: float = 10.0):
+    """Call `reload(path)` after the file at `path` changes and stays unchanged for `interval`."""
+    def stamp():
+        try:
+            st = os.stat(path)
+            return st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None
+
+    seen = stamp()
+    while True:
+        await asyncio.sleep(interval)
+        current = stamp()
+        if current is None or current == seen:
+            continue
+        await asyncio.sleep(interval)  # let the writer finish
+        if stamp() != current:
+            continue
+        seen = current
+        try:
+            await reload(path)
+        except Exception as e:
+            log.error(f"❌ Dictionary reload failed: {e}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "build":
+        sys.exit("usage: python -m userbots.dictionary build words.txt [out.idx]")
+    logging.basicConfig(level=logging.INFO)
+    built = build_index(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    print(f"✅ Indexed {len(built)} words ({built.nbytes() // 1024} KiB)")
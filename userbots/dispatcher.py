@@ -0,0 +1,128 @@
+# ==========================================================
+# userbots/dispatcher.py — One parse per group message, per process
+# ==========================================================
+# Every userbot in a group receives every message through its own client.
+# Instead of each client parsing it, all clients feed one ChatDispatcher:
+# the first copy of a message is parsed into a GameEvent and handled once;
+# later copies are dropped after a dictionary lookup. Turn prompts are
+# routed to the one seat whose player owns the turn, found through a
+# name / user-id map instead of asking every player. Each seat only takes
+# part in the chats its settings (userbots/settings.py) list.
+
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from loop_monitor import section
+from metrics import MESSAGES_DUPLICATE, MESSAGES_PARSED
+from userbots.game_parser import TURN, GameEvent, PlayerIdentity, parse_message
+from userbots.settings import PlayerSettings, settings_for
+
+# Recently seen messages remembered for de-duplication
+RECENT_MESSAGES = 4096
+
+
+class Seat:
+    """One userbot at the table: its client, identity and answer scheduler."""
+
+    def __init__(self, client, identity: PlayerIdentity, turns):
+        self.client = client
+        self.identity = identity
+        self.turns = turns
+
+    @property
+    def settings(self) -> PlayerSettings:
+        # Looked up on every use, so changed settings apply from the next message
+        return settings_for(self.identity.user_id)
+
+    def plays_in(self, chat_id: int) -> bool:
+        return self.settings.plays_in(chat_id)
+
+
+# handle(event, parsed, owner, received) — owner is the Seat whose turn it is, or None
+Handler = Callable[[object, GameEvent, Optional[Seat], float], Awaitable[None]]
+
+
+class ChatDispatcher:
+    def __init__(self, handle: Handler):
+        self.handle = handle
+        self._seats: Dict[int, Seat] = {}
+        self._by_name: Dict[str, List[Seat]] = {}
+        self._chats: Dict[int, Set[int]] = {}  # chat id → user ids of seats receiving it
+        self._recent: "OrderedDict[tuple, None]" = OrderedDict()
+        self.parsed = 0
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self._seats)
+
+    # ------------------------ Seats ------------------------
+    def register(self, seat: Seat):
+        self.unregister(seat.identity.user_id)
+        self._seats[seat.identity.user_id] = seat
+        self._by_name.setdefault(seat.identity.clean_name, []).append(seat)
+
+    def unregister(self, user_id: int):
+        seat = self._seats.pop(user_id, None)
+        if seat is None:
+            return
+        same = self._by_name.get(seat.identity.clean_name, [])
+        if seat in same:
+            same.remove(seat)
+        if not same:
+            self._by_name.pop(seat.identity.clean_name, None)
+        for members in self._chats.values():
+            members.discard(user_id)
+
+    def owner(self, chat_id: int, parsed: GameEvent) -> Optional[Seat]:
+        """The registered seat whose turn `parsed` announces, if any."""
+        if parsed.kind != TURN or not parsed.turn_owner:
+            return None
+        candidates = self._by_name.get(parsed.turn_owner)
+        if candidates is None:
+            # Decorated names ("Alice | clan") or ids: fall back to substring matching
+            candidates = [seat for seat in self._seats.values() if seat.identity.owns(parsed)]
+        candidates = [seat for seat in candidates if seat.plays_in(chat_id)]
+        if len(candidates) > 1:
+            # Only seats seen in this chat: another may not be in the group at all
+            members = self._chats.get(chat_id, ())
+            candidates = [seat for seat in candidates if seat.identity.user_id in members]
+        return candidates[0] if candidates else None
+
+    # ------------------------ Messages ------------------------
+    @staticmethod
+    def _key(event) -> tuple:
+        # Message ids differ per account in basic groups, so key on content.
+        date = event.message.date
+        return (event.chat_id, getattr(event, "sender_id", None), date.timestamp() if date else None, event.raw_text)
+
+    async def feed(self, seat: Seat, event):
+        """Called by every seat's client for every message it receives."""
+        received = time.monotonic()
+        chat_id = event.chat_id
+        if not seat.plays_in(chat_id):
+            return
+        members = self._chats.get(chat_id)
+        if members is None:
+            members = self._chats[chat_id] = set()
+        members.add(seat.identity.user_id)
+
+        key = self._key(event)
+        if key in self._recent:
+            self.duplicates += 1
+            MESSAGES_DUPLICATE.inc()
+            return
+        self._recent[key] = None
+        if len(self._recent) > RECENT_MESSAGES:
+            self._recent.popitem(last=False)
+
+        with section("parse", seat.identity.user_id):
+            parsed = parse_message(event.raw_text or "")
+        self.parsed += 1
+        MESSAGES_PARSED.inc()
+        if parsed is None:
+            return
+        owner = self.owner(chat_id, parsed)
+        # Stalls in a turn are blamed on the userbot whose turn it is
+        with section("on_message", (owner or seat).identity.user_id):
+            await self.handle(event, parsed, owner, received)
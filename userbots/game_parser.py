@@ -0,0 +1,143 @@
+# ==========================================================
+# userbots/game_parser.py — WordChain game message parser
+# ==========================================================
+# Turns a raw group message into a structured GameEvent in one pass.
+# All patterns are compiled once at import; messages that cannot be game
+# messages are rejected by a single trigger search.
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+NEW_ROUND = "new_round"
+AFK = "afk"
+TURN = "turn"
+ANSWER = "answer"
+# Game bot feedback on a word someone just played
+ACCEPTED = "accepted"
+REJECTED = "rejected"
+USED = "used"
+
+_NEW_ROUND = r"won the game|new round|starting a new game"
+_AFK = r"skipped due to afk|no word given"
+_FEEDBACK = r"is accepted|has been used|is not in my (?:list|dictionary)|is not accepted"
+_TRIGGER_RE = re.compile(
+    rf"(?P<new_round>{_NEW_ROUND})|(?P<afk>{_AFK})|(?P<turn>turn:)|(?P<feedback>{_FEEDBACK})",
+    re.IGNORECASE,
+)
+_NEW_ROUND_RE = re.compile(_NEW_ROUND, re.IGNORECASE)
+_AFK_RE = re.compile(_AFK, re.IGNORECASE)
+# "Turn: Alice (Next: Bob)" — the next player must not be mistaken for the owner.
+_TURN_RE = re.compile(r"turn:\s*(.+?)\s*(?:\(next:.*)?$", re.IGNORECASE | re.MULTILINE)
+# Variants ask for several letters: "start with TH", "include ING" / "contain ING"
+_PREFIX_RE = re.compile(r"start[^A-Za-z]*with[^A-Za-z]*([A-Za-z]+)", re.IGNORECASE)
+# "include the letter R" / "contain the letters ING": skip the wording.
+_INCLUDE_RE = re.compile(
+    r"\b(?:include|contain)s?\b(?!\s*(?:at\s+least|at\s+most|exactly|no\s+more|up\s+to)\b)"
+    r"[^A-Za-z]*(?:(?:the\s+)?letters?\b[^A-Za-z]*)?([A-Za-z]+)(?![A-Za-z])",
+    re.IGNORECASE,
+)
+_BANNED_RE = re.compile(r"banned letters:\s*([^\n]*)", re.IGNORECASE)
+_MIN_LEN_RE = re.compile(r"at least\s*(\d+)\s*letters", re.IGNORECASE)
+_MAX_LEN_RE = re.compile(r"(?:at most|no more than|up to)\s*(\d+)\s*letters", re.IGNORECASE)
+# "exactly 5 letters" / "a 5-letter word"
+_EXACT_LEN_RE = re.compile(r"exactly\s*(\d+)\s*letters|\b(\d+)-letter\b", re.IGNORECASE)
+# "You have 20s to answer" / "You have 20 seconds to answer"
+_TIME_LIMIT_RE = re.compile(r"(\d+)\s*(?:s|secs?|seconds?)\s+to\s+answer", re.IGNORECASE)
+_ANSWER_RE = re.compile(r"^\s*([^\W\d_]{2,})\s*$")
+# "Apple is accepted." / "apple has been used." / "Xyz is not in my list of words."
+_FEEDBACK_RE = re.compile(
+    r"([^\W\d_]{2,})\W*\s+(?:(?P<accepted>is accepted)|(?P<used>has been used)|is not (?:in my|accepted))",
+    re.IGNORECASE,
+)
+_LETTER_RE = re.compile(r"[A-Za-z]")
+_CLEAN_RE = re.compile(r"[^a-zA-Z0-9 ]")
+
+
+def normalize_name(text: str) -> str:
+    """Strip everything but ASCII letters, digits and spaces; lowercase."""
+    return _CLEAN_RE.sub("", text).strip().lower()
+
+
+@dataclass
+class GameEvent:
+    kind: str
+    turn_owner: str = ""
+    prefix: str = ""
+    include: str = ""
+    banned: Optional[List[str]] = None
+    min_len: Optional[int] = None
+    max_len: Optional[int] = None
+    time_limit: Optional[int] = None
+    word: str = ""
+    raw: str = field(default="", repr=False)
+
+
+def parse_message(text: str) -> Optional[GameEvent]:
+    """Parse one group message; returns None for anything that is not game traffic."""
+    if not text:
+        return None
+
+    trigger = _TRIGGER_RE.search(text)
+    if trigger is None:
+        m = _ANSWER_RE.match(text)
+        return GameEvent(ANSWER, word=m.group(1).lower(), raw=text) if m else None
+
+    # Round changes win over AFK notices, which win over turn prompts,
+    # wherever they appear in the message.
+    kind = trigger.lastgroup
+    if kind == "feedback":
+        m = _FEEDBACK_RE.search(text)
+        if m is None:
+            return None
+        kind = ACCEPTED if m.group("accepted") else USED if m.group("used") else REJECTED
+        return GameEvent(kind, word=m.group(1).lower(), raw=text)
+    if kind != NEW_ROUND and _NEW_ROUND_RE.search(text, trigger.end()):
+        kind = NEW_ROUND
+    elif kind == TURN and _AFK_RE.search(text, trigger.end()):
+        kind = AFK
+    if kind != TURN:
+        return GameEvent(kind, raw=text)
+
+    owner = _TURN_RE.search(text, trigger.start())
+    event = GameEvent(TURN, turn_owner=normalize_name(owner.group(1)) if owner else "", raw=text)
+
+    m = _PREFIX_RE.search(text)
+    if m:
+        event.prefix = m.group(1).lower()
+    m = _INCLUDE_RE.search(text)
+    if m:
+        event.include = m.group(1).lower()
+    m = _BANNED_RE.search(text)
+    if m:
+        event.banned = [b.lower() for b in _LETTER_RE.findall(m.group(1))]
+    m = _MIN_LEN_RE.search(text)
+    if m:
+        event.min_len = int(m.group(1))
+    m = _MAX_LEN_RE.search(text)
+    if m:
+        event.max_len = int(m.group(1))
+    m = _EXACT_LEN_RE.search(text)
+    if m:
+        event.min_len = event.max_len = int(m.group(1) or m.group(2))
+    m = _TIME_LIMIT_RE.search(text)
+    if m:
+        event.time_limit = int(m.group(1))
+    return event
+
+
+class PlayerIdentity:
+    """A player's name and id, normalized once for turn matching."""
+
+    def __init__(self, first_name: str, last_name: Optional[str], user_id: int):
+        self.name = (first_name + (f" {last_name}" if last_name else "")).strip().lower()
+        self.clean_name = normalize_name(self.name)
+        self.user_id = user_id
+        self._id_str = str(user_id)
+
+    def owns(self, event: GameEvent) -> bool:
+        """True if `event` is a turn announcement for this player."""
+        if event.kind != TURN or not event.turn_owner:
+            return False
+        owner = event.turn_owner
+        return (bool(self.clean_name) and self.clean_name in owner) or self._id_str in owner
@@ -0,0 +1,153 @@
+# ==========================================================
+# userbots/game_state.py — Per-chat WordChain game state
+# ==========================================================
+
+from typing import Dict, List, Optional, Set
+
+from userbots.game_parser import GameEvent, PlayerIdentity
+from userbots.word_index import WordIndex
+
+
+class UsedWords:
+    """Bitset of word ids already played this round.
+
+    Membership and insertion are O(1); clearing costs O(words played).
+    Words missing from the index (e.g. learned ones) are kept in a set.
+    """
+
+    def __init__(self, index: WordIndex):
+        self.index = index
+        self._bits = bytearray((len(index) + 7) // 8)
+        self._ids: List[int] = []
+        self._extra: Set[str] = set()
+
+    def __contains__(self, i: int) -> bool:
+        return bool(self._bits[i >> 3] & (1 << (i & 7)))
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._extra)
+
+    def played(self, word: str) -> bool:
+        if word in self._extra:
+            return True
+        i = self.index.find(word)
+        return i is not None and i in self
+
+    def add(self, word: str) -> bool:
+        """Mark `word` as played; returns False if it is not in the dictionary."""
+        i = self.index.find(word)
+        if i is None:
+            self._extra.add(word)
+            return False
+        if i not in self:
+            self._bits[i >> 3] |= 1 << (i & 7)
+            self._ids.append(i)
+        return True
+
+    def clear(self):
+        for i in self._ids:
+            self._bits[i >> 3] = 0
+        self._ids.clear()
+        self._extra.clear()
+
+    def rebound(self, index: WordIndex) -> "UsedWords":
+        """The same played words as ids in `index`; words it lacks are kept by text."""
+        used = UsedWords(index)
+        for i in self._ids:
+            used.add(self.index.word(i))
+        for word in self._extra:
+            used.add(word)
+        return used
+
+
+class GameState:
+    """Everything the player remembers about the current round in one chat."""
+
+    def __init__(self, index: WordIndex):
+        self.banned_letters: List[str] = []
+        self.min_length = 3
+        self.skip_cooldown = False
+        self.current_round = 0
+        self.used = UsedWords(index)
+        # Our last answer and the turn it was for, to retry if it is refused
+        self.last_sent: Optional[str] = None
+        self.last_turn: Optional[GameEvent] = None
+        self.last_timing = None  # that turn's TurnTiming, so a retry keeps its deadline
+        # The dispatcher seat that has an answer scheduled or just sent one
+        self.answering = None
+        self.retries = 0
+        # The last turn announced in this chat, whoever's it is
+        self.turn: Optional[GameEvent] = None
+        # A word the turn owner played that our dictionary doesn't know yet
+        self.unconfirmed: Optional[str] = None
+        # Our userbots that sent a word this round, counted as having played it
+        self.players: Set[int] = set()
+
+    def new_round(self):
+        self.banned_letters.clear()
+        self.skip_cooldown = False
+        self.used.clear()
+        self.players.clear()
+        self.last_sent = self.last_turn = self.last_timing = self.turn = self.unconfirmed = self.answering = None
+        self.current_round += 1
+
+    def apply_turn(self, turn: GameEvent):
+        """Carry a turn prompt's rules over to the round.
+
+        Banned letters and an open "at least N letters" minimum hold for later
+        turns; a bounded length ("exactly N", "at most N") only for this one.
+        """
+        if turn.banned is not None:
+            self.banned_letters[:] = turn.banned
+        if turn.min_len is not None and turn.max_len is None:
+            self.min_length = turn.min_len
+
+    def min_length_for(self, turn: GameEvent) -> int:
+        return turn.min_len if turn.min_len is not None else self.min_length
+
+    def record_answer(self, word: str) -> bool:
+        """Record a word played by any participant; False if it is unknown."""
+        return self.used.add(word)
+
+    def record_rejected(self, word: str):
+        """Keep a word the game bot refused out of this round's answers."""
+        self.used.add(word)
+
+    def answers_turn(self, word: str, sender: PlayerIdentity) -> bool:
+        """True if `sender` owns the announced turn and `word` meets its constraints.
+
+        Only such words may be learned once the game moves on; anything
+        else sent to the group is chatter.
+        """
+        turn = self.turn
+        if turn is None or not turn.prefix or not sender.owns(turn):
+            return False
+        min_len = self.min_length_for(turn)
+        banned = turn.banned if turn.banned is not None else self.banned_letters
+        return (
+            word.startswith(turn.prefix)
+            and len(word) >= min_len
+            and (turn.max_len is None or len(word) <= turn.max_len)
+            and (not turn.include or turn.include in word)
+            and not any(b in word for b in banned)
+        )
+
+
+class GameRegistry:
+    """Game states keyed by chat id, created on first message."""
+
+    def __init__(self, index: WordIndex):
+        self.index = index
+        self._games: Dict[int, GameState] = {}
+
+    def get(self, chat_id: int) -> GameState:
+        game = self._games.get(chat_id)
+        if game is None:
+            game = self._games[chat_id] = GameState(self.index)
+        return game
+
+    def rebind(self, index: WordIndex):
+        """Switch every game to a reloaded dictionary, keeping rounds in progress."""
+        for game in self._games.values():
+            game.used = game.used.rebound(index)
+        self.index = index
@@ -0,0 +1,199 @@
+# ==========================================================
+# userbots/learned_words.py — Self-learning dictionary overlay
+# ==========================================================
+# Words the game accepted that words.txt lacks, and words it refused, are
+# kept in a small overlay on top of the immutable WordIndex instead of
+# rebuilding it:
+#
+#   - refused words that are in the index become bits in a per-index
+#     bitset, checked together with the round's used words while sampling
+#   - learned additions live in per-letter lists, tried when the index has
+#     no valid word
+#
+# The overlay is an append-only log ("+word" learned, "-word" refused; the
+# last line for a word wins) shared by every userbot and worker process:
+# each process appends its own findings and picks up the others' by
+# reading the log's new tail now and then. compact() rewrites it at startup.
+
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Set
+
+from userbots.word_index import WordIndex, bucket_of
+
+log = logging.getLogger("wordchain_learned")
+
+# How often (seconds) to look for lines appended by other processes
+REFRESH_INTERVAL = 5.0
+
+
+class _Excluded:
+    """`i in excluded` if word i was played this round or refused by the game."""
+
+    __slots__ = ("used", "bits")
+
+    def __init__(self, used, bits: bytearray):
+        self.used = used
+        self.bits = bits
+
+    def __contains__(self, i: int) -> bool:
+        return bool(self.bits[i >> 3] & (1 << (i & 7))) or (self.used is not None and i in self.used)
+
+
+class LearnedWords:
+    def __init__(self, path: str):
+        self.path = path
+        self.added: Dict[int, List[str]] = {}
+        self.rejected: Set[str] = set()
+        self._added: Set[str] = set()
+        self._offset = 0
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        # Weak, so the overlay doesn't keep a replaced index mapped after a reload
+        self._bits_for: Optional["weakref.ref[WordIndex]"] = None
+        self._bits = bytearray()
+        self.refresh()
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._added or word in self.rejected
+
+    def __len__(self) -> int:
+        return len(self._added) + len(self.rejected)
+
+    # ------------------------ Log ------------------------
+    def _apply(self, line: str):
+        op, word = line[:1], line[1:].strip().lower()
+        if not word:
+            return
+        if op == "+":
+            if word in self.rejected:
+                self.rejected.discard(word)
+                self._ban(word, False)
+            if word not in self._added:
+                self._added.add(word)
+                self.added.setdefault(bucket_of(word[0]), []).append(word)
+        elif op == "-":
+            self.rejected.add(word)
+            if word in self._added:
+                self._added.discard(word)
+                self.added[bucket_of(word[0])].remove(word)
+            self._ban(word)
+
+    def refresh(self):
+        """Apply lines appended to the log since the last call."""
+        self._checked = time.monotonic()
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return
+        end = chunk.rfind(b"\n") + 1  # leave a partially written line for later
+        self._offset += end
+        for line in chunk[:end].decode("utf-8", "ignore").splitlines():
+            self._apply(line)
+
+    def _append(self, line: str):
+        with self._lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                log.warning(f"⚠️ Could not persist learned word: {e}")
+                return
+            self.refresh()  # applies our own line (and anyone else's)
+
+    # ------------------------ Feedback ------------------------
+    def learn(self, word: str, index: WordIndex) -> bool:
+        """The game accepted `word`; remember it if the dictionary lacks it."""
+        if word in self._added or (word not in self.rejected and word in index):
+            return False
+        log.info(f"📗 Learned new word: {word}")
+        self._append(f"+{word}")
+        return True
+
+    def reject(self, word: str) -> bool:
+        """The game refused `word`; never play it again."""
+        if word in self.rejected:
+            return False
+        log.info(f"📕 Blacklisted word: {word}")
+        self._append(f"-{word}")
+        return True
+
+    # ------------------------ Lookup ------------------------
+    def _ban(self, word: str, banned: bool = True):
+        index = self._bits_for() if self._bits_for is not None else None
+        if index is not None:
+            i = index.find(word)
+            if i is not None:
+                if banned:
+                    self._bits[i >> 3] |= 1 << (i & 7)
+                else:
+                    self._bits[i >> 3] &= ~(1 << (i & 7))
+
+    def exclude(self, index: WordIndex, used=None):
+        """A container for WordIndex.sample(exclude=...) that also skips refused words."""
+        if time.monotonic() - self._checked > REFRESH_INTERVAL:
+            self.refresh()
+        if not self.rejected:
+            return used
+        if self._bits_for is None or self._bits_for() is not index:
+            # New (or reloaded) index: map the blacklist onto its ids once
+            self._bits_for = weakref.ref(index)
+            self._bits = bytearray((len(index) + 7) // 8)
+            for word in self.rejected:
+                self._ban(word)
+        return _Excluded(used, self._bits)
+
+    def pick(self, prefix: str, include: str = "", banned=None, min_len: int = 3, used=None,
+             max_len: Optional[int] = None) -> Optional[str]:
+        """A random learned word matching the constraints, or None."""
+        if not prefix:
+            return None
+        banned = banned or []
+        valid = [
+            w for w in self.added.get(bucket_of(prefix[0]), ())
+            if w.startswith(prefix) and min_len <= len(w) <= (max_len or len(w)) and (not include or include in w)
+            and not any(b in w for b in banned) and (used is None or not used.played(w))
+        ]
+        return random.choice(valid) if valid else None
+
+
+def compact(path: str):
+    """Rewrite the log with one line per word; call before other processes start."""
+    learned = LearnedWords(path)
+    if not learned:
+        return
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=os.path.dirname(path) or ".", prefix=f"{os.path.basename(path)}.",
+        suffix=".tmp", delete=False,
+    ) as f:
+        try:
+            for words in learned.added.values():
+                f.writelines(f"+{w}\n" for w in words)
+            f.writelines(f"-{w}\n" for w in sorted(learned.rejected))
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+_learned: Dict[str, LearnedWords] = {}
+
+
+def get_learned(path: str) -> LearnedWords:
+    """The process-wide overlay for `path`."""
+    learned = _learned.get(path)
+    if learned is None:
+        learned = _learned[path] = LearnedWords(path)
+        log.info(
+            f"📚 {len(learned) - len(learned.rejected)} learned and "
+            f"{len(learned.rejected)} blacklisted words from {path}"
+        )
+    return learned
@@ -0,0 +1,91 @@
+# ==========================================================
+# userbots/restore.py — Staggered session restore at startup
+# ==========================================================
+# Reconnecting every stored session at once bursts auth traffic and earns
+# FloodWaits. Sessions are restored most-recently-active first through a
+# bounded window, each start delayed by a little jitter; a flood wait
+# reported by any client pauses the whole window for the requested time.
+
+import asyncio
+import logging
+import random
+import time
+from typing import Callable, Optional
+
+log = logging.getLogger("userbot_restore")
+
+
+class RestoreProgress:
+    def __init__(self, total: int):
+        self.total = total
+        self.restored = 0
+        self.failed = 0
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def pending(self) -> int:
+        return self.total - self.restored - self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def summary(self) -> str:
+        return (
+            f"♻️ Restore: {self.restored} restored, {self.failed} failed, "
+            f"{self.pending} pending of {self.total} ({self.elapsed:.0f}s)"
+        )
+
+
+async def restore_sessions(
+    db,
+    supervisor,
+    concurrency: int = 5,
+    jitter: float = 1.5,
+    ready_timeout: float = 60.0,
+    on_progress: Optional[Callable[[RestoreProgress], None]] = None,
+) -> RestoreProgress:
+    """Start every stored session via `supervisor.start(..., wait=True)`.
+
+    `db.iter_sessions()` yields pages of user ids most recently active
+    first; session strings are fetched one page at a time with get_many().
+    At most `concurrency` clients are connecting at a time.
+    """
+    pages = [page async for page in db.iter_sessions()]
+    progress = RestoreProgress(sum(len(page) for page in pages))
+    window = asyncio.Semaphore(max(1, concurrency))
+    resume_at = 0.0
+    loop = asyncio.get_running_loop()
+
+    def report():
+        if on_progress is not None:
+            on_progress(progress)
+
+    async def restore_one(user_id: int, session: Optional[str]):
+        nonlocal resume_at
+        async with window:
+            while loop.time() < resume_at:
+                await asyncio.sleep(resume_at - loop.time())
+            await asyncio.sleep(random.uniform(0, jitter))
+            try:
+                if not session:
+                    raise LookupError("no stored session")
+                await supervisor.start(user_id, session, wait=True, timeout=ready_timeout)
+                progress.restored += 1
+            except Exception as e:
+                progress.failed += 1
+                flood = getattr(e, "seconds", 0) or 0
+                if flood:
+                    resume_at = max(resume_at, loop.time() + flood)
+                    log.warning(f"🌊 Flood wait {flood}s while restoring {user_id}; pausing restores")
+                else:
+                    log.warning(f"⚠️ Could not restore {user_id}: {e}")
+            report()
+
+    for page in pages:
+        sessions = await db.get_many(page)
+        await asyncio.gather(*(restore_one(uid, sessions.get(uid)) for uid in page))
+    progress.finished_at = time.monotonic()
+    log.info(progress.summary())
+    return progress
@@ -0,0 +1,177 @@
+# ==========================================================
+# userbots/settings.py — Per-user and per-chat game settings
+# ==========================================================
+# Each user's settings are stored as a small JSON document next to their
+# session and loaded into this process-wide registry at startup, so the
+# dispatcher resolves them with a dictionary lookup per turn:
+#
+#   groups      chat ids the userbot plays in (empty = WORDCHAIN_GROUP)
+#   dictionary  dictionary name from DICTIONARIES (e.g. "en")
+#   strategy    word-selection strategy (see userbots/strategy.py)
+#   latency     answer timing profile from LATENCY_PROFILES
+#   chats       per-chat overrides of dictionary / strategy / latency
+#
+# Unset values fall back to the deployment defaults in config.py.
+
+from typing import Dict, List, Optional, Set, Tuple
+
+import config
+from userbots.strategy import STRATEGIES
+
+# name → (fraction of the turn's time limit, minimum delay in seconds);
+# "normal" keeps the scheduler's own TURN_DELAY_FRACTION / TURN_MIN_DELAY
+LATENCY_PROFILES: Dict[str, Optional[Tuple[float, float]]] = {
+    "fast": (0.03, 0.5),
+    "normal": None,
+    "human": (0.25, 3.0),
+}
+
+# Keys that may be overridden per chat
+CHAT_KEYS = ("dictionary", "strategy", "latency")
+KEYS = ("groups",) + CHAT_KEYS
+
+
+def _check(key: str, value: str) -> str:
+    value = value.lower()
+    choices = {"dictionary": config.DICTIONARIES, "strategy": STRATEGIES, "latency": LATENCY_PROFILES}[key]
+    if value not in choices:
+        raise ValueError(f"unknown {key} {value!r}; choose one of {', '.join(choices)}")
+    return value
+
+
+class ChatSettings:
+    """Effective settings of one userbot in one chat."""
+
+    __slots__ = ("dictionary", "strategy", "latency")
+
+    def __init__(self, dictionary: str, strategy: str, latency: str):
+        self.dictionary = dictionary
+        self.strategy = strategy
+        self.latency = latency
+
+    def timing(self) -> Optional[Tuple[float, float]]:
+        """(fraction, min_delay) for TurnScheduler.begin(), or None for the scheduler's own."""
+        return LATENCY_PROFILES.get(self.latency)
+
+
+class PlayerSettings:
+    def __init__(
+        self,
+        groups: Optional[List[int]] = None,
+        dictionary: Optional[str] = None,
+        strategy: Optional[str] = None,
+        latency: Optional[str] = None,
+        chats: Optional[Dict[int, Dict[str, str]]] = None,
+    ):
+        self.groups = frozenset(groups or ())
+        self.dictionary = dictionary
+        self.strategy = strategy
+        self.latency = latency
+        self.chats = chats or {}
+
+    # ------------------------ Storage ------------------------
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "PlayerSettings":
+        """Parse a stored document; unknown keys and invalid values are dropped."""
+        data = data or {}
+        settings = cls(groups=[int(g) for g in data.get("groups", ())])
+        for key in CHAT_KEYS:
+            if data.get(key):
+                try:
+                    setattr(settings, key, _check(key, data[key]))
+                except ValueError:
+                    pass
+        for chat_id, overrides in (data.get("chats") or {}).items():
+            for key, value in overrides.items():
+                try:
+                    settings.set(key, value, int(chat_id))
+                except ValueError:
+                    pass
+        return settings
+
+    def to_dict(self) -> dict:
+        data = {key: getattr(self, key) for key in CHAT_KEYS if getattr(self, key)}
+        if self.groups:
+            data["groups"] = sorted(self.groups)
+        if self.chats:
+            # String keys: JSON and MongoDB documents can't have int keys
+            data["chats"] = {str(chat_id): dict(o) for chat_id, o in self.chats.items()}
+        return data
+
+    # ------------------------ Changes ------------------------
+    def set(self, key: str, value, chat_id: Optional[int] = None):
+        """Set one value (None clears it); raises ValueError on bad input."""
+        if key == "groups":
+            if chat_id is not None:
+                raise ValueError("groups can't be set per chat")
+            self.groups = frozenset(int(g) for g in value or ())
+            return
+        if key not in CHAT_KEYS:
+            raise ValueError(f"unknown setting {key!r}; choose one of {', '.join(KEYS)}")
+        value = _check(key, value) if value else None
+        if chat_id is None:
+            setattr(self, key, value)
+            return
+        overrides = self.chats.setdefault(chat_id, {})
+        if value:
+            overrides[key] = value
+        else:
+            overrides.pop(key, None)
+        if not overrides:
+            del self.chats[chat_id]
+
+    # ------------------------ Lookup ------------------------
+    def plays_in(self, chat_id: int) -> bool:
+        if self.groups:
+            return chat_id in self.groups
+        # No groups of its own: the deployment's group, or every chat in debug mode
+        return not config.WORDCHAIN_GROUP or chat_id == config.WORDCHAIN_GROUP
+
+    def resolve(self, chat_id: int) -> ChatSettings:
+        overrides = self.chats.get(chat_id, {})
+        dictionary = overrides.get("dictionary") or self.dictionary
+        return ChatSettings(
+            dictionary if dictionary in config.DICTIONARIES else config.DEFAULT_DICTIONARY,
+            overrides.get("strategy") or self.strategy or config.WORD_STRATEGY,
+            overrides.get("latency") or self.latency or config.LATENCY_PROFILE,
+        )
+
+    def dictionaries(self) -> Set[str]:
+        """Names of every dictionary these settings can resolve to."""
+        names = {self.resolve(chat_id).dictionary for chat_id in self.chats}
+        names.add(self.dictionary or config.DEFAULT_DICTIONARY)
+        return {name for name in names if name in config.DICTIONARIES}
+
+    def describe(self) -> List[str]:
+        """Human-readable lines for /settings."""
+        groups = ", ".join(map(str, sorted(self.groups))) or f"{config.WORDCHAIN_GROUP} (default)"
+        lines = [
+            f"groups: {groups}",
+            f"dictionary: {self.dictionary or config.DEFAULT_DICTIONARY}",
+            f"strategy: {self.strategy or config.WORD_STRATEGY}",
+            f"latency: {self.latency or config.LATENCY_PROFILE}",
+        ]
+        for chat_id, overrides in sorted(self.chats.items()):
+            lines.append(f"chat {chat_id}: " + ", ".join(f"{k}={v}" for k, v in sorted(overrides.items())))
+        return lines
+
+
+# ------------------------ Process-wide registry ------------------------
+_DEFAULT = PlayerSettings()
+_settings: Dict[int, PlayerSettings] = {}
+
+
+def settings_for(user_id: int) -> PlayerSettings:
+    return _settings.get(user_id, _DEFAULT)
+
+
+def set_settings(user_id: int, data: Optional[dict]):
+    """Replace `user_id`'s settings with a stored document (empty/None resets them)."""
+    if data:
+        _settings[user_id] = PlayerSettings.from_dict(data)
+    else:
+        _settings.pop(user_id, None)
+
+
+def all_settings() -> Dict[int, dict]:
+    return {user_id: settings.to_dict() for user_id, settings in _settings.items()}
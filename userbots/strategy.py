@@ -0,0 +1,99 @@
+# ==========================================================
+# userbots/strategy.py — Pluggable word-selection strategies
+# ==========================================================
+# In WordChain the next player has to start with our last letter, so a
+# word ending in a letter with few continuations (x, q, z, ...) makes the
+# opponent's turn harder. A DifficultyTable holds, for every ending letter
+# and minimum length, how many dictionary words start with that letter;
+# strategies score candidates against it in O(1) each.
+#
+#   random      uniform choice among valid words (the original behaviour)
+#   aggressive  ending letter with the fewest continuations
+#   safe        shortest, most ordinary words; ending letter breaks ties
+
+import random
+import weakref
+from typing import List, Optional
+
+from userbots.word_index import BUCKETS, WordIndex
+from userbots.word_trie import word_trie
+
+# Candidates sampled per turn for the scoring strategies
+CANDIDATES = 32
+
+# Lengths above this share one column in the difficulty table
+MAX_TABLE_LEN = 16
+
+STRATEGIES = ("random", "aggressive", "safe")
+DEFAULT_STRATEGY = "random"
+
+
+class DifficultyTable:
+    """counts[bucket][min_len] = words starting with `bucket` of length >= min_len."""
+
+    def __init__(self, index: WordIndex):
+        self.counts = [
+            [index.continuations(b, k) for k in range(MAX_TABLE_LEN + 1)] for b in range(BUCKETS)
+        ]
+
+    def continuations(self, bucket: int, min_len: int = 0) -> int:
+        return self.counts[bucket][min(max(min_len, 0), MAX_TABLE_LEN)]
+
+
+# One table per loaded dictionary; dropped with the index after a reload
+_tables: "weakref.WeakKeyDictionary[WordIndex, DifficultyTable]" = weakref.WeakKeyDictionary()
+
+
+def difficulty_table(index: WordIndex) -> DifficultyTable:
+    """The table for `index`, computed once per loaded dictionary."""
+    table = _tables.get(index)
+    if table is None:
+        table = _tables[index] = DifficultyTable(index)
+    return table
+
+
+def candidates(index: WordIndex, prefix: str, include: str = "", banned=None, min_len: int = 3,
+               used=None, k: int = 1, max_len: Optional[int] = None) -> List[int]:
+    """Up to `k` random ids of valid words.
+
+    Multi-letter prefixes and includes go to the dictionary's WordTrie. It
+    is built in the background on the first such turn, so games that never
+    ask for one don't pay its memory; until it is ready WordIndex gives the
+    same answers, only slower when matches are rare.
+    """
+    if len(prefix) > 1 or len(include) > 1:
+        trie = word_trie(index, wait=False)
+        if trie is not None:
+            return trie.sample(prefix, include, banned, min_len, used, k, max_len)
+    return index.sample(prefix, include, banned, min_len, used, k, max_len)
+
+
+def choose_word(
+    index: WordIndex,
+    strategy: str,
+    prefix: str,
+    include: str = "",
+    banned=None,
+    min_len: int = 3,
+    used=None,
+    max_len: Optional[int] = None,
+) -> Optional[str]:
+    """Pick a word for this turn with the named strategy."""
+    if strategy not in ("aggressive", "safe"):
+        ids = candidates(index, prefix, include, banned, min_len, used, 1, max_len)
+        return index.word(ids[0]) if ids else None
+
+    ids = candidates(index, prefix, include, banned, min_len, used, CANDIDATES, max_len)
+    if not ids:
+        return None
+    table = difficulty_table(index)
+
+    def hardness(i: int) -> int:
+        return table.continuations(index.last_bucket(i), min_len)
+
+    if strategy == "aggressive":
+        best = min(ids, key=lambda i: (hardness(i), random.random()))
+    else:
+        best = min(ids, key=lambda i: (index.length(i), hardness(i), random.random()))
+    return index.word(best)
+
@@ -0,0 +1,256 @@
+# ==========================================================
+# userbots/supervisor.py — Lifecycle control for running userbots
+# ==========================================================
+# One UserbotSupervisor owns every userbot task in the controller's event
+# loop: at most one task per user_id, explicit start / stop / restart, and
+# automatic restarts with exponential backoff when a client crashes.
+
+import asyncio
+import functools
+import importlib
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Type, Union
+
+import loop_monitor
+from metrics import FLOOD_WAITS, RECONNECTS, REGISTRY, forget_user, resident_memory
+from userbots.dictionary import reload_dictionary
+from userbots.restore import restore_sessions
+from userbots.settings import set_settings
+
+log = logging.getLogger("userbot_supervisor")
+
+# runner(session_string, user_id, ready) — `ready()` is called once connected
+Runner = Callable[[str, int, Callable[[], None]], Awaitable[None]]
+
+# The Telethon player, imported on the first start rather than at startup
+DEFAULT_RUNNER = "userbots.wordchain_player:run_userbot"
+DEFAULT_PERMANENT = ("userbots.wordchain_player:SessionRevokedError",)
+
+
+def resolve(path: str):
+    """Import "package.module:attr" and return the attribute."""
+    module, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+class UserbotStartError(Exception):
+    """A userbot failed before becoming ready. `seconds` > 0 means a flood wait."""
+
+    def __init__(self, message: str, seconds: float = 0):
+        super().__init__(message)
+        self.seconds = seconds
+
+
+class UserbotSupervisor:
+    def __init__(
+        self,
+        runner: Union[Runner, str],
+        permanent_errors: Tuple[Union[Type[BaseException], str], ...] = (),
+        min_backoff: float = 5.0,
+        max_backoff: float = 300.0,
+        stable_after: float = 120.0,
+        on_state: Optional[Callable[[int, bool], None]] = None,
+    ):
+        """
+        runner           coroutine function (session_string, user_id, ready) that
+                         runs a userbot until it disconnects and raises on failure,
+                         or its "module:attr" path, imported on the first start
+        permanent_errors exceptions that mean "don't restart" (e.g. revoked session),
+                         as classes or "module:attr" paths
+        stable_after     a run lasting this long resets the backoff
+        on_state         called with (user_id, running) when a client comes up or goes down
+        """
+        self._runner = runner
+        self._permanent_errors = permanent_errors
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.on_state = on_state
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._sessions: Dict[int, str] = {}
+        self._ready: Dict[int, asyncio.Future] = {}
+        self.restarts: Dict[int, int] = {}
+        REGISTRY.gauge("userbots_running", "Userbots connected in this process", fn=lambda: len(self))
+        # Clients share one heap, so per-userbot memory is the process average
+        REGISTRY.gauge(
+            "userbot_memory_bytes", "Resident memory per running userbot",
+            fn=lambda: resident_memory() / max(len(self), 1),
+        )
+
+    @property
+    def runner(self) -> Runner:
+        if isinstance(self._runner, str):
+            self._runner = resolve(self._runner)
+        return self._runner
+
+    @property
+    def permanent_errors(self) -> Tuple[Type[BaseException], ...]:
+        if any(isinstance(e, str) for e in self._permanent_errors):
+            self._permanent_errors = tuple(resolve(e) if isinstance(e, str) else e for e in self._permanent_errors)
+        return self._permanent_errors
+
+    # ------------------------ Queries ------------------------
+    def is_running(self, user_id: int) -> bool:
+        task = self._tasks.get(user_id)
+        return task is not None and not task.done()
+
+    def task(self, user_id: int) -> Optional[asyncio.Task]:
+        return self._tasks.get(user_id)
+
+    def running(self):
+        return [uid for uid in self._tasks if self.is_running(uid)]
+
+    def __len__(self) -> int:
+        return len(self.running())
+
+    async def status(self) -> dict:
+        """{"running": count, "users": user ids, "restarts": total}; async like WorkerPool.status()."""
+        running = self.running()
+        return {"running": len(running), "users": running, "restarts": sum(self.restarts.values())}
+
+    # ------------------------ Lifecycle ------------------------
+    async def start(self, user_id: int, session_string: str, wait: bool = False, timeout: float = 60.0) -> bool:
+        """Start (or replace) the userbot for `user_id`.
+
+        Returns immediately unless `wait` is set, in which case it waits until
+        the client is connected and raises UserbotStartError if it fails first.
+        """
+        if self.is_running(user_id):
+            if self._sessions.get(user_id) == session_string:
+                return False
+            await self.stop(user_id)
+        self._sessions[user_id] = session_string
+        self.restarts[user_id] = 0
+        self._ready[user_id] = asyncio.get_running_loop().create_future()
+        self._tasks[user_id] = asyncio.create_task(
+            self._supervise(user_id, session_string), name=f"userbot-{user_id}"
+        )
+        if wait:
+            await self.wait_ready(user_id, timeout)
+        return True
+
+    async def wait_ready(self, user_id: int, timeout: float = 60.0):
+        """Wait for the first connect of `user_id`'s client."""
+        fut = self._ready.get(user_id)
+        if fut is None:
+            raise UserbotStartError(f"userbot {user_id} is not running")
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError:
+            raise UserbotStartError(f"userbot {user_id} not ready after {timeout:.0f}s")
+
+    async def stop(self, user_id: int) -> bool:
+        """Cancel the userbot for `user_id` and wait for its client to disconnect."""
+        task = self._tasks.pop(user_id, None)
+        self._sessions.pop(user_id, None)
+        self.restarts.pop(user_id, None)
+        forget_user(user_id)
+        ready = self._ready.pop(user_id, None)
+        self._notify(user_id, False)
+        if ready is not None and not ready.done():
+            ready.set_exception(UserbotStartError(f"userbot {user_id} was stopped"))
+            ready.exception()  # mark retrieved
+        if task is None or task.done():
+            return False
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            log.warning(f"⚠️ Userbot {user_id} raised while stopping: {e}")
+        return True
+
+    async def restart(self, user_id: int) -> bool:
+        session = self._sessions.get(user_id)
+        if session is None:
+            return False
+        await self.stop(user_id)
+        return await self.start(user_id, session)
+
+    async def stop_all(self):
+        await asyncio.gather(*(self.stop(uid) for uid in list(self._tasks)))
+
+    async def restore(self, db, **kwargs):
+        """Start every session stored in `db` through the staggered scheduler."""
+        return await restore_sessions(db, self, **kwargs)
+
+    async def reload_dictionary(self, path: str) -> int:
+        """Rebuild `path` and swap it in for every running player; returns the word count."""
+        return len(await reload_dictionary(path))
+
+    async def metrics(self):
+        """Snapshot of this process's metrics (see metrics.Registry.collect)."""
+        return REGISTRY.collect()
+
+    async def profile(self, enabled: Optional[bool] = None) -> dict:
+        """Switch this process's profiler on or off (None leaves it), then return its report."""
+        if enabled is not None:
+            loop_monitor.set_profiling(enabled)
+        return loop_monitor.report()
+
+    async def set_settings(self, user_id: int, settings: Optional[dict]):
+        """Replace `user_id`'s game settings (see userbots/settings.py); applies from the next message."""
+        set_settings(user_id, settings)
+
+    async def load_settings(self, settings: Dict[int, dict]):
+        """Install stored settings for many users at once, e.g. before restoring sessions."""
+        for user_id, data in settings.items():
+            set_settings(user_id, data)
+
+    # ------------------------ Internals ------------------------
+    def _notify(self, user_id: int, running: bool):
+        if self.on_state is not None:
+            try:
+                self.on_state(user_id, running)
+            except Exception as e:
+                log.warning(f"⚠️ on_state hook failed for {user_id}: {e}")
+
+    def _on_ready(self, user_id: int):
+        self._settle(user_id)
+        self._notify(user_id, True)
+
+    def _settle(self, user_id: int, error: Optional[BaseException] = None):
+        fut = self._ready.get(user_id)
+        if fut is None or fut.done():
+            return
+        if error is None:
+            fut.set_result(True)
+            return
+        fut.set_exception(UserbotStartError(str(error), getattr(error, "seconds", 0) or 0))
+        fut.exception()  # nobody may be waiting; avoid "never retrieved" warnings
+
+    async def _supervise(self, user_id: int, session_string: str):
+        backoff = self.min_backoff
+        ready = functools.partial(self._on_ready, user_id)
+        while True:
+            began = time.monotonic()
+            try:
+                try:
+                    await self.runner(session_string, user_id, ready)
+                finally:
+                    self._notify(user_id, False)
+                self._settle(user_id, RuntimeError("userbot exited before becoming ready"))
+                log.info(f"🛑 Userbot {user_id} exited")
+                return
+            except asyncio.CancelledError:
+                raise
+            except self.permanent_errors as e:
+                self._settle(user_id, e)
+                log.warning(f"⛔ Userbot {user_id} stopped permanently: {e}")
+                return
+            except Exception as e:
+                self._settle(user_id, e)
+                if time.monotonic() - began >= self.stable_after:
+                    backoff = self.min_backoff
+                # Never retry before a server-imposed flood wait is over.
+                flood = getattr(e, "seconds", 0) or 0
+                if flood:
+                    FLOOD_WAITS.inc(user=user_id)
+                backoff = max(backoff, flood)
+                self.restarts[user_id] = self.restarts.get(user_id, 0) + 1
+                RECONNECTS.inc(user=user_id)
+                log.warning(f"🔁 Userbot {user_id} crashed ({e}); restarting in {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
@@ -0,0 +1,137 @@
+# ==========================================================
+# userbots/turn_scheduler.py — Adaptive answer timing per turn
+# ==========================================================
+# Instead of a fixed random sleep, each answer is aimed at a fraction of
+# the turn's time limit, counted from when the turn message arrived, so
+# time already lost to delivery, parsing and lookup is not slept again.
+# At most one answer is pending per chat; a newer turn cancels it.
+
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from metrics import SEND_SECONDS, TURN_SECONDS
+
+log = logging.getLogger("turn_scheduler")
+
+# Never aim closer than this to the end of the turn (send round trip)
+SAFETY_MARGIN = 1.5
+
+# Random spread around the target so answers don't look scripted
+JITTER = 0.2
+
+
+class TurnTiming:
+    """Timestamps of one turn, from message receipt to the answer being sent."""
+
+    __slots__ = ("received", "delivery_lag", "time_limit", "profile", "decided", "sending", "sent")
+
+    def __init__(self, time_limit: float, delivery_lag: Optional[float] = None, received: Optional[float] = None,
+                 profile: Optional[Tuple[float, float]] = None):
+        self.received = received or time.monotonic()
+        self.delivery_lag = delivery_lag  # server timestamp → local receipt
+        self.time_limit = time_limit
+        self.profile = profile  # (fraction, min_delay) overriding the scheduler's
+        self.decided: Optional[float] = None
+        self.sending: Optional[float] = None
+        self.sent: Optional[float] = None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.received
+
+    def summary(self) -> str:
+        end = self.sent or time.monotonic()
+        think = (self.decided or end) - self.received
+        wait = (self.sending or end) - (self.decided or end)
+        send = end - (self.sending or end)
+        lag = f", delivery {self.delivery_lag:.2f}s" if self.delivery_lag is not None else ""
+        return (
+            f"{end - self.received:.2f}s of {self.time_limit:.0f}s "
+            f"(think {think * 1000:.1f}ms, wait {wait:.2f}s, send {send:.2f}s{lag})"
+        )
+
+
+class TurnScheduler:
+    def __init__(
+        self,
+        fraction: float = 0.08,
+        min_delay: float = 1.0,
+        default_limit: float = 30.0,
+    ):
+        """
+        fraction       part of the turn's time limit to aim the answer at
+        min_delay      never answer faster than this after the turn message
+        default_limit  time limit assumed when the message doesn't state one
+        """
+        self.fraction = fraction
+        self.min_delay = min_delay
+        self.default_limit = default_limit
+        self._pending: Dict[int, asyncio.Task] = {}
+
+    def begin(self, time_limit: Optional[float] = None, sent_at: Optional[float] = None,
+              received: Optional[float] = None, profile: Optional[Tuple[float, float]] = None) -> TurnTiming:
+        """Start timing a turn.
+
+        `sent_at` is the message's server UNIX timestamp, `received` the
+        time.monotonic() at which the handler got it (defaults to now), and
+        `profile` an optional (fraction, min_delay) for this turn only.
+        """
+        lag = max(time.time() - sent_at, 0.0) if sent_at is not None else None
+        return TurnTiming(time_limit or self.default_limit, lag, received, profile)
+
+    def resume(self, timing: TurnTiming) -> Optional[TurnTiming]:
+        """Timing for another answer to the same turn, or None if too late.
+
+        The new timing keeps the turn's receipt time, so time spent on the
+        refused answer counts against the same deadline.
+        """
+        if timing.elapsed() >= timing.time_limit - SAFETY_MARGIN:
+            return None
+        return TurnTiming(timing.time_limit, timing.delivery_lag, timing.received, timing.profile)
+
+    def delay(self, timing: TurnTiming) -> float:
+        """Seconds still to wait before sending this turn's answer."""
+        fraction, min_delay = timing.profile or (self.fraction, self.min_delay)
+        latest = timing.time_limit - SAFETY_MARGIN
+        target = timing.time_limit * fraction * random.uniform(1 - JITTER, 1 + JITTER)
+        target = min(max(target, min_delay), latest)
+        return max(target - timing.elapsed(), 0.0)
+
+    def cancel(self, chat_id: int) -> bool:
+        """Drop the pending answer in `chat_id` (the turn moved on)."""
+        task = self._pending.pop(chat_id, None)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    def schedule(self, chat_id: int, timing: TurnTiming, send: Callable[[], Awaitable[None]]) -> asyncio.Task:
+        """Run `send()` at this turn's target time, replacing any pending answer."""
+        self.cancel(chat_id)
+        timing.decided = time.monotonic()
+        task = asyncio.create_task(self._run(chat_id, timing, send))
+        self._pending[chat_id] = task
+        return task
+
+    async def _run(self, chat_id: int, timing: TurnTiming, send):
+        try:
+            await asyncio.sleep(self.delay(timing))
+        except asyncio.CancelledError:
+            log.info(f"⏭️ Turn moved on before sending; dropped answer ({timing.summary()})")
+            raise
+        # Once sending has started the answer is no longer cancellable
+        if self._pending.get(chat_id) is asyncio.current_task():
+            del self._pending[chat_id]
+        timing.sending = time.monotonic()
+        await send()
+        timing.sent = time.monotonic()
+        TURN_SECONDS.observe(timing.sent - timing.received)
+        SEND_SECONDS.observe(timing.sent - timing.sending)
+        level = logging.WARNING if timing.elapsed() > timing.time_limit else logging.INFO
+        log.log(level, f"⏱️ Turn latency {timing.summary()}")
+
+    def cancel_all(self):
+        for chat_id in list(self._pending):
+            self.cancel(chat_id)
@@ -0,0 +1,311 @@
+# ==========================================================
+# userbots/word_index.py — Indexed dictionary lookup
+# ==========================================================
+# Words are bucketed by first letter and sorted by length inside each
+# bucket, so a "min length" constraint becomes a single range. Every word
+# carries a 26-bit letter mask, turning include / banned checks into two
+# integer ANDs instead of substring scans.
+#
+# Storage is compact and immutable: all words live in one UTF-8 buffer
+# addressed through an offsets array, so one index can be shared by every
+# userbot in the process without millions of str objects. The same layout
+# is written to disk by `save()` and mapped back zero-copy by `open()`.
+
+import mmap
+import os
+import random
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Iterable, List, Optional
+
+# How many random probes to try before falling back to a filtered pass
+# over the candidate range.
+SAMPLE_TRIES = 24
+
+# Bucket 0-25 hold words starting with a-z, bucket 26 everything else.
+BUCKETS = 27
+
+# On-disk artifact: header, then offsets, masks and table as little-endian
+# uint32 arrays, then the word buffer. Every section is 4-byte aligned.
+MAGIC = b"WCIX"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sI32sIIQ")  # magic, version, source sha256, n, width, buf_len
+
+
+class StaleIndexError(ValueError):
+    """Raised when an index artifact is unreadable or built from another source."""
+
+
+def letter_mask(text: str) -> int:
+    """Return a bitmask with one bit set per a-z letter found in `text`."""
+    mask = 0
+    for ch in text:
+        o = ord(ch) - 97
+        if 0 <= o < 26:
+            mask |= 1 << o
+    return mask
+
+
+def bucket_of(ch: str) -> int:
+    o = ord(ch) - 97
+    return o if 0 <= o < 26 else 26
+
+
+class WordIndex:
+    """Read-only word index bucketed by first letter and length.
+
+    Layout (all arrays are uint32):
+      buf      UTF-8 bytes of every word, back to back
+      offsets  n + 1 byte offsets into `buf`
+      masks    n letter masks
+      table    BUCKETS * width entries; table[b * width + k] is the first
+               word in bucket b with length >= k, the last column is the
+               end of the bucket.
+    """
+
+    def __init__(self, buf, offsets, masks, table, width: int, source_hash: bytes = b""):
+        self._buf = buf
+        self._offsets = offsets
+        self._masks = masks
+        self._table = table
+        self._width = width
+        self.source_hash = source_hash
+        self.size = len(masks)
+        self._mm = None
+
+    @classmethod
+    def build(cls, words: Iterable[str]) -> "WordIndex":
+        """Build an index from an iterable of lowercase words."""
+        keyed = sorted({(bucket_of(w[0]), len(w), w) for w in words if w})
+        width = (max((k[1] for k in keyed), default=0)) + 2
+
+        table = array("I", [0]) * (BUCKETS * width)
+        offsets = array("I", [0])
+        masks = array("I")
+        chunks = []
+        pos = 0
+        cursor = 0
+        for b in range(BUCKETS):
+            for k in range(width):
+                # Advance to the first word in bucket b with length >= k.
+                while cursor < len(keyed) and (keyed[cursor][0], keyed[cursor][1]) < (b, k):
+                    cursor += 1
+                table[b * width + k] = cursor
+            # Last column: end of bucket.
+            while cursor < len(keyed) and keyed[cursor][0] == b:
+                cursor += 1
+            table[b * width + width - 1] = cursor
+
+        for _, _, w in keyed:
+            data = w.encode("utf-8")
+            chunks.append(data)
+            pos += len(data)
+            offsets.append(pos)
+            masks.append(letter_mask(w))
+
+        return cls(b"".join(chunks), offsets, masks, table, width)
+
+    # ------------------------ Artifact I/O ------------------------
+    def save(self, path: str, source_hash: bytes = b""):
+        """Write the index to `path` atomically in the mmap-able format."""
+        source_hash = source_hash or self.source_hash
+        # A unique temp file, so concurrent builds never write into each other's
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(path) or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp", delete=False,
+        ) as f:
+            try:
+                f.write(_HEADER.pack(
+                    MAGIC, FORMAT_VERSION, source_hash.ljust(32, b"\0"),
+                    self.size, self._width, len(self._buf),
+                ))
+                for arr in (self._offsets, self._masks, self._table):
+                    arr = array("I", arr)
+                    if sys.byteorder != "little":
+                        arr.byteswap()
+                    arr.tofile(f)
+                f.write(self._buf)
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        os.replace(f.name, path)
+
+    @classmethod
+    def open(cls, path: str, source_hash: Optional[bytes] = None) -> "WordIndex":
+        """Map an artifact written by `save()`; sections are used in place.
+
+        Raises StaleIndexError if the file is malformed or, when
+        `source_hash` is given, was built from a different source.
+        """
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(mm) < _HEADER.size:
+                raise StaleIndexError("truncated header")
+            magic, version, stored_hash, n, width, buf_len = _HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise StaleIndexError("unknown index format")
+            if source_hash is not None and stored_hash != source_hash.ljust(32, b"\0"):
+                raise StaleIndexError("index built from a different source")
+            sizes = ((n + 1) * 4, n * 4, BUCKETS * width * 4)
+            if len(mm) != _HEADER.size + sum(sizes) + buf_len:
+                raise StaleIndexError("size mismatch")
+        except StaleIndexError:
+            mm.close()
+            raise
+
+        view = memoryview(mm)
+        pos = _HEADER.size
+        arrays = []
+        for size in sizes:
+            section = view[pos:pos + size]
+            if sys.byteorder == "little":
+                arrays.append(section.cast("I"))
+            else:
+                arr = array("I", bytes(section))
+                arr.byteswap()
+                arrays.append(arr)
+            pos += size
+        index = cls(view[pos:pos + buf_len], *arrays, width=width, source_hash=stored_hash)
+        index._mm = mm
+        return index
+
+    def __len__(self) -> int:
+        return self.size
+
+    def word(self, i: int) -> str:
+        return str(self._buf[self._offsets[i]:self._offsets[i + 1]], "utf-8")
+
+    def word_bytes(self, i: int) -> bytes:
+        return bytes(self._buf[self._offsets[i]:self._offsets[i + 1]])
+
+    @property
+    def masks(self):
+        """Letter masks by word id (read-only)."""
+        return self._masks
+
+    def __iter__(self):
+        return (self.word(i) for i in range(self.size))
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the index, in bytes."""
+        return (
+            len(self._buf)
+            + len(self._offsets) * self._offsets.itemsize
+            + len(self._masks) * self._masks.itemsize
+            + len(self._table) * self._table.itemsize
+        )
+
+    @property
+    def mapped(self) -> bool:
+        return self._mm is not None
+
+    def find(self, word: str) -> Optional[int]:
+        """Return the id of `word` in the index, or None (binary search)."""
+        if not word:
+            return None
+        b = bucket_of(word[0])
+        n = len(word)
+        if n >= self._width - 1:
+            return None
+        base = b * self._width
+        lo, hi = self._table[base + n], self._table[base + n + 1]
+        target = word.encode("utf-8")
+        buf, offsets = self._buf, self._offsets
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = bytes(buf[offsets[mid]:offsets[mid + 1]])
+            if probe < target:
+                lo = mid + 1
+            elif probe > target:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def __contains__(self, word: str) -> bool:
+        return self.find(word) is not None
+
+    def bucket_range(self, first: str, min_len: int = 0, max_len: Optional[int] = None):
+        """Return the [lo, hi) word range starting with `first` and length in [min_len, max_len]."""
+        b = bucket_of(first)
+        base = b * self._width
+        hi = self._table[base + self._width - 1]
+        if min_len >= self._width - 1:
+            return hi, hi
+        if max_len is not None and max_len + 1 < self._width - 1:
+            hi = self._table[base + max(max_len + 1, 0)]
+        return self._table[base + max(min_len, 0)], hi
+
+    def length(self, i: int) -> int:
+        return len(self.word(i))
+
+    def last_bucket(self, i: int) -> int:
+        """Bucket (0-25 for a-z, 26 otherwise) of the word's last character."""
+        o = self._buf[self._offsets[i + 1] - 1] - 97
+        return o if 0 <= o < 26 else 26
+
+    def continuations(self, bucket: int, min_len: int = 0) -> int:
+        """How many words start with the letter of `bucket` and have length >= min_len."""
+        base = bucket * self._width
+        hi = self._table[base + self._width - 1]
+        if min_len >= self._width - 1:
+            return 0
+        return hi - self._table[base + max(min_len, 0)]
+
+    # ------------------------ Lookup ------------------------
+    def sample(self, prefix: str, include: str = "", banned=None, min_len: int = 3,
+               exclude=None, k: int = 1, max_len: Optional[int] = None) -> List[int]:
+        """Return up to `k` distinct random ids of words matching the constraints.
+
+        `exclude` is an optional container of word ids (e.g. a UsedWords
+        bitset) that must not be returned; `max_len` caps the length.
+        """
+        if not prefix:
+            return []
+        lo, hi = self.bucket_range(prefix[0], max(min_len, len(prefix)), max_len)
+        if lo >= hi:
+            return []
+
+        need = letter_mask(include)
+        banned_mask = letter_mask("".join(banned or []))
+        masks = self._masks
+        # Only decode the word when masks alone cannot decide.
+        check_text = len(prefix) > 1 or bucket_of(prefix[0]) == 26 or (
+            include and (len(include) > 1 or not need)
+        )
+
+        def ok(i: int) -> bool:
+            m = masks[i]
+            if m & banned_mask or (m & need) != need:
+                return False
+            if exclude is not None and i in exclude:
+                return False
+            if check_text:
+                w = self.word(i)
+                return w.startswith(prefix) and (not include or include in w)
+            return True
+
+        # Rejection sampling keeps the result uniform and is O(1) expected
+        # when valid words are not rare within the range.
+        found = {}
+        for _ in range(SAMPLE_TRIES * k):
+            i = random.randrange(lo, hi)
+            if i not in found and ok(i):
+                found[i] = None
+                if len(found) >= k:
+                    break
+        if len(found) >= k:
+            return list(found)
+
+        # Too few hits for k: top up from a filtered pass over the range
+        valid = [i for i in range(lo, hi) if i not in found and ok(i)]
+        return list(found) + random.sample(valid, min(k - len(found), len(valid)))
+
+    def pick(self, prefix: str, include: str = "", banned=None, min_len: int = 3, exclude=None,
+             max_len: Optional[int] = None) -> Optional[str]:
+        """Return a uniformly random word matching the constraints, or None."""
+        ids = self.sample(prefix, include, banned, min_len, exclude, max_len=max_len)
+        return self.word(ids[0]) if ids else None
@@ -0,0 +1,251 @@
+# ==========================================================
+# userbots/word_trie.py — Array-backed trie for pattern turns
+# ==========================================================
+# WordIndex answers "start with X" turns from one bucket range, but a
+# multi-letter prefix or a substring include forces it to decode every
+# word of the first letter's bucket whenever matches are rare. WordTrie
+# indexes the same words by their UTF-8 bytes so that:
+#
+#   - a prefix of any length is one walk down the trie, giving the range
+#     of matching words in lexicographic order
+#   - a search below that node skips whole subtrees that are too short,
+#     go through a banned letter or lack a letter the include needs
+#
+# Nodes are numbered in depth-first (preorder) order, so a node's subtree
+# is the id range [v, v + size[v]) and its first child is v + 1; the
+# trie is five flat arrays, with no per-node Python objects. Word ids are
+# the WordIndex's own, so UsedWords bitsets and blacklists apply as is.
+
+import random
+import threading
+import weakref
+from array import array
+from typing import List, Optional
+
+from userbots.word_index import SAMPLE_TRIES, WordIndex, letter_mask
+
+# Stored subtree lengths are capped here; longer words still match
+MAX_STORED_LEN = 255
+
+
+class WordTrie:
+    """Read-only trie over the words of a WordIndex.
+
+    Layout (one entry per node):
+      labels   byte leading to the node (bytes; the root's is 0)
+      size     nodes in the subtree, the node included (array "I")
+      first    rank of the subtree's first word, plus a sentinel; a node
+               ends a word when it is a leaf or first[v + 1] > first[v]
+               (array "I")
+      longest  longest word length in the subtree, in characters (bytes)
+      masks    OR of the letter masks of the subtree's words (array "I")
+    and `order[rank]`, the WordIndex id of the rank-th word in byte order.
+    """
+
+    def __init__(self, index: WordIndex, labels, size, first, longest, masks, order):
+        # Weak: _tries is keyed by the index, and a strong reference from its
+        # value would keep a reloaded-away index (and this trie) alive forever
+        self._index = weakref.ref(index)
+        self._labels = labels
+        self._size = size
+        self._first = first
+        self._longest = longest
+        self._masks = masks
+        self._order = order
+
+    @classmethod
+    def build(cls, index: WordIndex) -> "WordTrie":
+        """Build the trie for every word of `index` in one pass over them sorted."""
+        words = sorted((index.word_bytes(i), i) for i in range(len(index)))
+        labels = bytearray([0])
+        size = array("I", [0])
+        first = array("I", [0])
+        longest = bytearray([0])
+        masks = array("I", [0])
+        order = array("I")
+        word_masks = index.masks
+
+        def close(v: int):
+            size[v] = len(labels) - v
+            parent = path[-1]
+            if longest[v] > longest[parent]:
+                longest[parent] = longest[v]
+            masks[parent] |= masks[v]
+
+        path = [0]  # nodes along the previous word
+        prev = b""
+        for rank, (word, i) in enumerate(words):
+            common = 0
+            for a, b in zip(prev, word):
+                if a != b:
+                    break
+                common += 1
+            while len(path) > common + 1:
+                close(path.pop())
+            for byte in word[common:]:
+                path.append(len(labels))
+                labels.append(byte)
+                size.append(0)
+                first.append(rank)
+                longest.append(0)
+                masks.append(0)
+            end = path[-1]
+            longest[end] = max(longest[end], min(len(word.decode("utf-8")), MAX_STORED_LEN))
+            masks[end] |= word_masks[i]
+            order.append(i)
+            prev = word
+        while len(path) > 1:
+            close(path.pop())
+        size[0] = len(labels)
+        first.append(len(order))  # sentinel: ends the last subtree
+        return cls(index, bytes(labels), size, first, bytes(longest), masks, order)
+
+    @property
+    def index(self) -> Optional[WordIndex]:
+        """The WordIndex the trie was built for; None once it has been dropped."""
+        return self._index()
+
+    def __len__(self) -> int:
+        """Number of nodes, the root included."""
+        return len(self._labels)
+
+    def nbytes(self) -> int:
+        """Memory held by the trie arrays, in bytes (the WordIndex not included)."""
+        return (
+            len(self._labels) + len(self._longest)
+            + (len(self._size) + len(self._first) + len(self._masks) + len(self._order)) * 4
+        )
+
+    # ------------------------ Lookup ------------------------
+    def node(self, prefix: str) -> Optional[int]:
+        """The node reached by `prefix`, or None if no word starts with it."""
+        labels, size = self._labels, self._size
+        v = 0
+        for byte in prefix.encode("utf-8"):
+            child, end = v + 1, v + size[v]
+            while child < end and labels[child] != byte:
+                child += size[child]
+            if child >= end:
+                return None
+            v = child
+        return v
+
+    def sample(self, prefix: str, include: str = "", banned=None, min_len: int = 3,
+               exclude=None, k: int = 1, max_len: Optional[int] = None) -> List[int]:
+        """Return up to `k` distinct random ids of words matching the constraints.
+
+        Same contract as WordIndex.sample(); `include` is a substring and
+        `prefix` may be any length.
+        """
+        if not prefix:
+            return []
+        min_len = max(min_len, len(prefix))
+        if max_len is not None and max_len < min_len:
+            return []
+        banned_mask = letter_mask("".join(banned or []))
+        if letter_mask(prefix) & banned_mask:
+            return []
+        v = self.node(prefix)
+        if v is None or self._longest[v] < min(min_len, MAX_STORED_LEN):
+            return []
+        need = letter_mask(include)
+        if self._masks[v] & need != need:
+            return []
+
+        index = self.index
+        if index is None:
+            return []
+        order, masks = self._order, index.masks
+        lo, hi = self._first[v], self._first[v + self._size[v]]
+
+        def ok(i: int) -> bool:
+            m = masks[i]
+            if m & banned_mask or (m & need) != need:
+                return False
+            if exclude is not None and i in exclude:
+                return False
+            w = index.word(i)
+            return len(w) >= min_len and (max_len is None or len(w) <= max_len) and (not include or include in w)
+
+        # Rejection sampling first, as in WordIndex.sample(): uniform and
+        # O(1) expected unless matches are rare under this prefix.
+        found = {}
+        for _ in range(SAMPLE_TRIES * k):
+            i = order[random.randrange(lo, hi)]
+            if i not in found and ok(i):
+                found[i] = None
+                if len(found) >= k:
+                    break
+        if len(found) >= k:
+            return list(found)
+
+        valid = [i for i in self._search(v, prefix, include, banned_mask, need, min_len, max_len, exclude)
+                 if i not in found]
+        return list(found) + random.sample(valid, min(k - len(found), len(valid)))
+
+    def _search(self, v, prefix, include, banned_mask, need, min_len, max_len, exclude) -> List[int]:
+        """Every matching word id below node `v`, pruning subtrees that can't match."""
+        labels, size, first, longest, masks, order = (
+            self._labels, self._size, self._first, self._longest, self._masks, self._order,
+        )
+        target = include.encode("utf-8")
+        # Stored lengths stop at MAX_STORED_LEN
+        min_len = min(min_len, MAX_STORED_LEN)
+        found = []
+        # (node, path bytes, length in characters, include already seen)
+        stack = [(v, prefix.encode("utf-8"), len(prefix), not target or target in prefix.encode("utf-8"))]
+        while stack:
+            v, path, length, seen = stack.pop()
+            end = v + size[v]
+            if length >= min_len and seen and (end == v + 1 or first[v + 1] > first[v]):
+                i = order[first[v]]
+                if exclude is None or i not in exclude:
+                    found.append(i)
+            child = v + 1
+            while child < end:
+                byte = labels[child]
+                after = child + size[child]
+                # UTF-8 continuation bytes don't start a new character
+                grown = length + (0 if 0x80 <= byte < 0xC0 else 1)
+                letter = byte - 97
+                if not (
+                    (0 <= letter < 26 and banned_mask >> letter & 1)
+                    or longest[child] < min_len
+                    or (max_len is not None and grown > max_len)
+                    or (not seen and masks[child] & need != need)
+                ):
+                    child_path = path + bytes((byte,))
+                    stack.append((child, child_path, grown, seen or child_path.endswith(target)))
+                child = after
+        return found
+
+
+# ------------------------ Shared tries ------------------------
+# One trie per loaded dictionary, built in the background on first use and
+# dropped with the index after a reload.
+_tries: "weakref.WeakKeyDictionary[WordIndex, WordTrie]" = weakref.WeakKeyDictionary()
+_building: "weakref.WeakSet[WordIndex]" = weakref.WeakSet()
+_lock = threading.Lock()
+
+
+def _build(index: WordIndex):
+    try:
+        _tries[index] = WordTrie.build(index)
+    finally:
+        with _lock:
+            _building.discard(index)
+
+
+def word_trie(index: WordIndex, wait: bool = True) -> Optional[WordTrie]:
+    """The trie for `index`; with `wait=False`, None until a background build finishes."""
+    trie = _tries.get(index)
+    if trie is not None:
+        return trie
+    if wait:
+        trie = _tries[index] = WordTrie.build(index)
+        return trie
+    with _lock:
+        if index not in _building:
+            _building.add(index)
+            threading.Thread(target=_build, args=(index,), name="word-trie", daemon=True).start()
+    return None
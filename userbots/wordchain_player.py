@@ -3,18 +3,26 @@
 # ==========================================================
 
 import asyncio
-import random
-import re
+import html
 import logging
+import time
+from typing import Dict, Optional
 from telethon import TelegramClient, events
 from telethon.sessions import StringSession
-from pyrogram import Client as PyroClient
-from pyrogram.enums import ParseMode
 import config
-from db import DBSessionManager
-
-# Database instance
-db = DBSessionManager(config.DB_PATH)
+from activity import GAME, WORD, record
+from broadcast import flood_wait_seconds
+from loop_monitor import section
+from metrics import FLOOD_WAITS, LOOKUP_SECONDS, NO_WORD, SEND_ERRORS, TURNS, WORDS_SENT
+from notifier import notify
+from userbots.dictionary import load_dictionary, subscribe
+from userbots.dispatcher import ChatDispatcher, Seat
+from userbots.game_parser import ACCEPTED, AFK, ANSWER, NEW_ROUND, REJECTED, TURN, USED, PlayerIdentity
+from userbots.game_state import GameRegistry
+from userbots.learned_words import LearnedWords, get_learned
+from userbots.strategy import choose_word, difficulty_table
+from userbots.turn_scheduler import TurnScheduler
+from userbots.word_index import WordIndex
 
 # ----------------------------------------------------------
 # Logging setup
@@ -24,176 +32,261 @@ log.setLevel(logging.INFO)
 
 
 # ----------------------------------------------------------
-# Load dictionary safely
+# Get a valid word
 # ----------------------------------------------------------
-def import_words(path):
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return [w.strip().lower() for w in f if w.strip()]
-    except FileNotFoundError:
-        log.error("❌ words.txt not found!")
-        return []
+def get_word(dictionary: WordIndex, prefix, include="", banned=None, min_len=3, used=None, strategy="random",
+             learned: LearnedWords = None, max_len=None):
+    if learned is None:
+        return choose_word(dictionary, strategy, prefix, include, banned, min_len, used, max_len)
+    exclude = learned.exclude(dictionary, used)
+    word = choose_word(dictionary, strategy, prefix, include, banned, min_len, exclude, max_len)
+    return word or learned.pick(prefix, include, banned, min_len, used, max_len)
 
 
-# ----------------------------------------------------------
-# Get a valid word
-# ----------------------------------------------------------
-def get_word(dictionary, prefix, include="", banned=None, min_len=3):
-    banned = banned or []
-    valid = [
-        w for w in dictionary
-        if w.startswith(prefix)
-        and (not include or include in w)
-        and all(bl not in w for bl in banned)
-        and len(w) >= min_len
-    ]
-    return random.choice(valid) if valid else None
+# A refused answer is retried at most this many times per turn
+MAX_RETRIES = 3
 
 
 # ----------------------------------------------------------
 # Game logic handler
 # ----------------------------------------------------------
-async def start_game_logic(client, words):
-    delay = 2.5
-    banned_letters = []
-    min_length = 3
-    skip_cooldown = False
-    current_round = 0
+# One dispatcher per process, shared by every userbot it runs: each group
+# message is parsed once and game state is kept once per chat.
+_dispatcher: Optional[ChatDispatcher] = None
 
-    me = await client.get_me()
-    my_id = me.id
-    my_name = (me.first_name + (f" {me.last_name}" if me.last_name else "")).strip().lower()
-    log.info(f"🎮 Playing as {my_name} ({my_id})")
-
-    # --- Detect turn ownership ---
-    def is_my_turn(text: str) -> bool:
-        match = re.search(r"turn:\s*([^\n]+)", text, re.IGNORECASE)
-        if not match:
-            return False
-        current_turn = re.sub(r"[^a-zA-Z0-9 ]", "", match.group(1)).strip().lower()
-        clean_name = re.sub(r"[^a-zA-Z0-9 ]", "", my_name).strip().lower()
-        return clean_name in current_turn or str(my_id) in current_turn
 
-    # --- Monitor messages ---
-    target_chat = getattr(config, "WORDCHAIN_GROUP", None)
-    if not target_chat:
-        log.warning("⚠️ WORDCHAIN_GROUP not set — listening to all chats (debug mode).")
+def get_dispatcher(words: WordIndex, learned: LearnedWords = None) -> ChatDispatcher:
+    """The process-wide dispatcher, created on first use with the default dictionary `words`."""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = _make_dispatcher(words, learned)
+    return _dispatcher
 
-    @client.on(events.NewMessage(chats=target_chat))
-    async def on_message(event):
-        nonlocal banned_letters, min_length, skip_cooldown, current_round
 
-        text = event.raw_text or ""
-        if not text:
+def _make_dispatcher(words: WordIndex, learned: LearnedWords = None) -> ChatDispatcher:
+    # Game states per dictionary name; a chat plays with the dictionary of
+    # its last turn owner's settings. Learned words belong to the default one.
+    registries: Dict[str, GameRegistry] = {}
+    chat_dictionary: Dict[int, str] = {}
+
+    def add_registry(name: str, index: WordIndex) -> GameRegistry:
+        games = registries[name] = GameRegistry(index)
+        subscribe(games)  # follow dictionary hot reloads
+        difficulty_table(index)  # precompute once, before the first turn
+        return games
+
+    async def registry(name: str) -> GameRegistry:
+        games = registries.get(name)
+        if games is None:
+            index = await load_dictionary(config.DICTIONARIES[name])
+            games = registries.get(name) or add_registry(name, index)
+        return games
+
+    add_registry(config.DEFAULT_DICTIONARY, words)
+
+    def answer(seat, chat_id, games, game, parsed, timing):
+        player = seat.identity
+        prefix, include = parsed.prefix, parsed.include
+        strategy = seat.settings.resolve(chat_id).strategy
+        started = time.perf_counter()
+        with section("lookup", player.user_id):
+            word = get_word(games.index, prefix, include, game.banned_letters, game.min_length_for(parsed), game.used,
+                            strategy, learned if games is registries[config.DEFAULT_DICTIONARY] else None,
+                            parsed.max_len)
+        LOOKUP_SECONDS.observe(time.perf_counter() - started)
+
+        if not word:
+            NO_WORD.inc(user=player.user_id)
+            log.warning(f"⚠️ No valid word found for '{prefix}' (include '{include}')")
+            return
+
+        async def send():
+            try:
+                await seat.client.send_message(chat_id, word)
+                game.used.add(word)
+                game.last_sent, game.last_turn, game.last_timing = word, parsed, timing
+                game.players.add(player.user_id)
+                WORDS_SENT.inc(user=player.user_id)
+                record(WORD, player.user_id)
+                log.info(f"💬 Sent word: {word}")
+            except Exception as e:
+                SEND_ERRORS.inc(user=player.user_id)
+                if flood_wait_seconds(e) is not None:
+                    FLOOD_WAITS.inc(user=player.user_id)
+                log.warning(f"⚠️ Failed to send word: {e}")
+
+        game.answering = seat
+        seat.turns.schedule(chat_id, timing, send)
+
+    async def handle(event, parsed, seat, received):
+        chat_id = event.chat_id
+        chat = None
+        if seat is not None:
+            chat = seat.settings.resolve(chat_id)
+            chat_dictionary[chat_id] = chat.dictionary
+        games = await registry(chat_dictionary.get(chat_id, config.DEFAULT_DICTIONARY))
+        game = games.get(chat_id)
+        learn = learned if games is registries[config.DEFAULT_DICTIONARY] else None
+
+        # A word played by any participant; unknown ones are learned only if
+        # the turn owner sent them and they fit the turn (not group chatter)
+        if parsed.kind == ANSWER:
+            if not game.record_answer(parsed.word) and learn is not None and parsed.word not in learn:
+                sender = await event.get_sender()
+                if sender is not None and game.answers_turn(parsed.word, PlayerIdentity(
+                        getattr(sender, "first_name", None) or "", getattr(sender, "last_name", None), sender.id)):
+                    game.unconfirmed = parsed.word
+            return
+
+        # Game bot feedback on the last word played
+        if parsed.kind in (ACCEPTED, USED, REJECTED):
+            if parsed.kind == REJECTED:
+                game.record_rejected(parsed.word)
+                if learn is not None:
+                    learn.reject(parsed.word)
+            else:
+                game.record_answer(parsed.word)
+                if parsed.kind == ACCEPTED and learn is not None:
+                    learn.learn(parsed.word, games.index)
+            if game.unconfirmed == parsed.word:
+                game.unconfirmed = None
+
+            # Our answer was refused while the turn is still ours: try another
+            # within the time the original turn has left
+            retry = game.answering
+            if (parsed.kind != ACCEPTED and retry is not None and parsed.word == game.last_sent
+                    and game.retries < MAX_RETRIES):
+                timing = retry.turns.resume(game.last_timing)
+                if timing is None:
+                    log.info(f"⌛ '{parsed.word}' refused ({parsed.kind}) too late to retry")
+                    return
+                game.retries += 1
+                log.info(f"↩️ '{parsed.word}' refused ({parsed.kind}); retrying")
+                answer(retry, chat_id, games, game, game.last_turn, timing)
             return
 
+        # The turn moved on: an unknown word played before it was accepted
+        if game.unconfirmed and parsed.prefix and game.unconfirmed.endswith(parsed.prefix):
+            learn.learn(game.unconfirmed, games.index)
+        game.unconfirmed = None
+        game.last_sent = None
+        game.retries = 0
+        game.turn = parsed if parsed.kind == TURN else None
+
+        # Anything but an answer means the turn moved on
+        if game.answering is not None and game.answering is not seat:
+            game.answering.turns.cancel(chat_id)
+            game.answering = None
+
         # New round
-        if re.search(r"(won the game|new round|starting a new game)", text, re.IGNORECASE):
-            banned_letters.clear()
-            skip_cooldown = False
-            current_round += 1
-            log.info(f"🔁 New round started (#{current_round})")
+        if parsed.kind == NEW_ROUND:
+            for user_id in game.players:
+                record(GAME, user_id)
+            game.new_round()
+            log.info(f"🔁 New round started (#{game.current_round})")
             return
 
         # AFK / skipped
-        if re.search(r"(skipped due to afk|no word given)", text, re.IGNORECASE):
-            skip_cooldown = True
+        if parsed.kind == AFK:
+            game.skip_cooldown = True
             log.info("⏸️ AFK skip detected — pausing 5s")
             await asyncio.sleep(5)
-            skip_cooldown = False
+            game.skip_cooldown = False
             return
 
-        if skip_cooldown or not is_my_turn(text):
+        if game.skip_cooldown or seat is None:
             return
 
-        log.info("🟢 It's my turn!")
+        log.info(f"🟢 It's {seat.identity.name}'s turn!")
+        TURNS.inc(user=seat.identity.user_id)
+        sent_at = event.message.date.timestamp() if event.message.date else None
+        timing = seat.turns.begin(parsed.time_limit, sent_at, received, chat.timing())
 
-        # Detect banned letters
-        if "banned letters" in text.lower():
-            bl = re.findall(r"[A-Za-z]", text.split("Banned letters:")[-1])
-            banned_letters[:] = [b.lower() for b in bl]
-            log.info(f"🚫 Banned letters: {banned_letters}")
+        game.apply_turn(parsed)
+        if parsed.banned is not None:
+            log.info(f"🚫 Banned letters: {game.banned_letters}")
+        if parsed.min_len is not None:
+            scope = "for this turn" if parsed.max_len is not None else "from now on"
+            log.info(f"🔤 Min length {parsed.min_len} {scope}")
 
-        # Detect minimum length
-        m = re.search(r"at least\s*(\d+)\s*letters", text, re.IGNORECASE)
-        if m:
-            min_length = int(m.group(1))
-            log.info(f"🔤 Min length set to {min_length}")
+        if not parsed.prefix:
+            return
 
-        # Include letter
-        include_match = re.search(r"include[^A-Za-z]*([A-Za-z])", text, re.IGNORECASE)
-        include = include_match.group(1).lower() if include_match else ""
+        answer(seat, chat_id, games, game, parsed, timing)
 
-        # Starting prefix
-        prefix_match = re.search(r"start[^A-Za-z]*with[^A-Za-z]*([A-Za-z])", text, re.IGNORECASE)
-        if not prefix_match:
-            return
+    return ChatDispatcher(handle)
 
-        prefix = prefix_match.group(1).lower()
-        word = get_word(words, prefix, include, banned_letters, min_length)
 
-        if word:
-            await asyncio.sleep(random.uniform(1.8, 3.2))
-            try:
-                await client.send_message(event.chat_id, word)
-                log.info(f"💬 Sent word: {word}")
-            except Exception as e:
-                log.warning(f"⚠️ Failed to send word: {e}")
-        else:
-            log.warning(f"⚠️ No valid word found for '{prefix}' (include '{include}')")
+async def start_game_logic(client, words, turns: TurnScheduler, learned: LearnedWords = None) -> Seat:
+    """Seat `client` at the shared dispatcher; unregister the returned seat when it stops."""
+    dispatcher = get_dispatcher(words, learned)
+
+    me = await client.get_me()
+    seat = Seat(client, PlayerIdentity(me.first_name, me.last_name, me.id), turns)
+    dispatcher.register(seat)
+    log.info(f"🎮 Playing as {seat.identity.name} ({seat.identity.user_id})")
+
+    # Load other dictionaries this user plays with before their first turn
+    for name in seat.settings.dictionaries() - {config.DEFAULT_DICTIONARY}:
+        await load_dictionary(config.DICTIONARIES[name])
+
+    # --- Monitor messages ---
+    # Not filtered by chat here: the groups come from settings that can
+    # change while the client runs, so the dispatcher checks them per message.
+    if not seat.settings.groups and not config.WORDCHAIN_GROUP:
+        log.warning("⚠️ WORDCHAIN_GROUP not set — listening to all chats (debug mode).")
+
+    @client.on(events.NewMessage())
+    async def on_message(event):
+        await dispatcher.feed(seat, event)
+
+    return seat
 
 
 # ----------------------------------------------------------
-# Main async start (with detailed error handling)
+# Main async run (supervised from bot.py)
 # ----------------------------------------------------------
-async def _start_userbot(session_string, user_id):
+class SessionRevokedError(Exception):
+    """The stored string session is no longer authorized; restarting won't help."""
+
+
+async def run_userbot(session_string, user_id, ready=None):
+    """Run one userbot until it disconnects; `ready()` is called once it is playing.
+
+    Failures are reported to the log group (batched by the notifier) and re-raised so the
+    UserbotSupervisor can decide whether to restart.
+    """
     client = TelegramClient(StringSession(session_string), config.API_ID, config.API_HASH)
+    turns = TurnScheduler(config.TURN_DELAY_FRACTION, config.TURN_MIN_DELAY, config.TURN_DEFAULT_LIMIT)
+    seat = None
     try:
-        await client.start()
+        # connect() + authorization check instead of start(): start() would
+        # prompt for a phone number on a revoked session.
+        await client.connect()
+        if not await client.is_user_authorized():
+            raise SessionRevokedError("session is not authorized")
         me = await client.get_me()
         log.info(f"✅ Userbot started for {me.first_name} ({me.id})")
 
-        words = import_words(config.WORDS_PATH)
+        words = await load_dictionary(config.WORDS_PATH)
         if not words:
             log.error("⚠️ Empty dictionary — stopping bot.")
-            await client.disconnect()
             return
 
-        await start_game_logic(client, words)
+        seat = await start_game_logic(client, words, turns, get_learned(config.LEARNED_WORDS_PATH))
+        if ready is not None:
+            ready()
         await client.run_until_disconnected()
 
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
         log.error(f"❌ Failed to start userbot for {user_id}: {e}")
-        try:
-            bot = PyroClient(
-                "error_notifier",
-                bot_token=config.BOT_TOKEN,
-                api_id=config.API_ID,
-                api_hash=config.API_HASH,
-            )
-            await bot.start()
-            await bot.send_message(
-                config.LOG_GROUP_ID,
-                f"⚠️ <b>Failed to start userbot</b>\n"
-                f"🆔 <code>{user_id}</code>\n"
-                f"💬 Error: <code>{str(e)}</code>",
-                parse_mode=ParseMode.HTML,
-            )
-            await bot.stop()
-        except Exception as suberr:
-            log.warning(f"⚠️ Could not send error to admin log group: {suberr}")
+        notify(f"🆔 <code>{user_id}</code> — <code>{html.escape(str(e))}</code>", group="⚠️ <b>Userbot failures</b>")
+        raise
     finally:
+        if seat is not None:
+            _dispatcher.unregister(seat.identity.user_id)
+        turns.cancel_all()
         await client.disconnect()
         log.info(f"🛑 Userbot stopped for {user_id}")
-
-
-# ----------------------------------------------------------
-# Entry wrapper (called from bot.py)
-# ----------------------------------------------------------
-def start_userbot(session_string, user_id):
-    """Thread-safe entry point for launching the userbot"""
-    try:
-        asyncio.run(_start_userbot(session_string, user_id))
-    except RuntimeError:
-        loop = asyncio.get_event_loop()
-        loop.create_task(_start_userbot(session_string, user_id))
\ No newline at end of file
@@ -0,0 +1,368 @@
+# ==========================================================
+# userbots/workers.py — Sharded multi-process userbot workers
+# ==========================================================
+# Optional mode (USERBOT_WORKERS > 0): userbots are spread over N worker
+# processes by user_id % N, each with its own event loop, UserbotSupervisor
+# and memory-mapped dictionary (the OS page cache shares the pages). The
+# controller talks to workers over a duplex pipe per worker:
+#
+#   controller -> worker   (req_id, command, *args)
+#   worker -> controller   (req_id, ok, result)
+#   worker -> controller   (None, "notify", (text, group))   log-group events
+#   worker -> controller   (None, "activity", events)        activity log batches
+#   worker -> controller   (None, "state", (user_id, running)) a client came up or went down
+#
+# Commands: start, stop, restart, status, metrics, profile, settings, reload,
+# shutdown.
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+import activity
+import config
+import loop_monitor
+from metrics import REGISTRY, merge
+import notifier
+from userbots.dictionary import build_index, reload_dictionary
+from userbots.restore import restore_sessions
+from userbots.settings import all_settings, set_settings
+from userbots.supervisor import DEFAULT_PERMANENT, DEFAULT_RUNNER, UserbotStartError, UserbotSupervisor
+
+log = logging.getLogger("userbot_workers")
+
+
+# ------------------------ Worker process ------------------------
+def _worker_main(conn, worker_id: int, runner: str, permanent: Tuple[str, ...], warmup: Optional[str]):
+    logging.basicConfig(level=logging.INFO)
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    asyncio.run(_worker_loop(conn, worker_id, runner, permanent, warmup))
+
+
+async def _worker_loop(conn, worker_id, runner, permanent, warmup):
+    loop = asyncio.get_running_loop()
+    if warmup:
+        from userbots.dictionary import load_dictionary
+        await load_dictionary(warmup)
+
+    # The controller's on_state hook runs only when a client really is up or down
+    supervisor = UserbotSupervisor(
+        runner, permanent, on_state=lambda user_id, running: conn.send((None, "state", (user_id, running))),
+    )
+    inbox: asyncio.Queue = asyncio.Queue()
+    # The controller owns the log-group notifier; hand events to it
+    notifier.install(lambda text, group=None: conn.send((None, "notify", (text, group))))
+
+    async def ship_activity(events):
+        conn.send((None, "activity", events))
+
+    activity_log = activity.ActivityLog(ship_activity)
+    activity.install(activity_log)
+    activity_log.start()
+    loop_monitor.start(config.LOOP_LAG_THRESHOLD)
+
+    def on_readable():
+        try:
+            inbox.put_nowait(conn.recv())
+        except (EOFError, OSError):
+            loop.remove_reader(conn.fileno())
+            inbox.put_nowait((None, "shutdown"))
+
+    async def handle(req_id, command, args):
+        try:
+            if command == "start":
+                result = await supervisor.start(*args)
+            elif command == "stop":
+                result = await supervisor.stop(*args)
+            elif command == "restart":
+                result = await supervisor.restart(*args)
+            elif command == "status":
+                result = await supervisor.status()
+            elif command == "metrics":
+                result = await supervisor.metrics()
+            elif command == "profile":
+                result = await supervisor.profile(*args)
+            elif command == "settings":
+                result = await supervisor.load_settings(*args)
+            elif command == "reload":
+                # The controller already rebuilt the artifact; just map it
+                result = len(await reload_dictionary(*args, rebuild=False))
+            else:
+                raise ValueError(f"unknown command {command!r}")
+            conn.send((req_id, True, result))
+        except Exception as e:
+            conn.send((req_id, False, (str(e), getattr(e, "seconds", 0) or 0)))
+
+    loop.add_reader(conn.fileno(), on_readable)
+    log.info(f"👷 Worker {worker_id} ready (pid {os.getpid()})")
+
+    # Each request runs in its own task, so a start waiting for its client to
+    # connect doesn't hold up status or metrics; only shutdown is sequential.
+    handlers = set()
+    while True:
+        req_id, command, *args = await inbox.get()
+        if command == "shutdown":
+            break
+        task = asyncio.create_task(handle(req_id, command, args))
+        handlers.add(task)
+        task.add_done_callback(handlers.discard)
+
+    for task in list(handlers):
+        task.cancel()
+    await asyncio.gather(*handlers, return_exceptions=True)
+    await supervisor.stop_all()
+    await activity_log.stop()
+    loop_monitor.stop()
+    if req_id is not None:
+        conn.send((req_id, True, None))
+    loop.remove_reader(conn.fileno())
+    conn.close()
+
+
+# ------------------------ Controller side ------------------------
+class _Worker:
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.process: Optional[multiprocessing.Process] = None
+        self.conn = None
+        self.pending: Dict[int, asyncio.Future] = {}
+
+
+class WorkerPool:
+    """Drop-in for UserbotSupervisor that shards userbots across processes."""
+
+    def __init__(
+        self,
+        workers: int,
+        runner: str = DEFAULT_RUNNER,
+        permanent: Iterable[str] = DEFAULT_PERMANENT,
+        warmup: Optional[str] = None,
+        request_timeout: float = 30.0,
+        monitor_interval: float = 5.0,
+        on_state=None,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.runner = runner
+        self.permanent = tuple(permanent)
+        self.warmup = warmup
+        self.request_timeout = request_timeout
+        self.monitor_interval = monitor_interval
+        self.on_state = on_state
+        self._ctx = multiprocessing.get_context("spawn")
+        self._workers = [_Worker(i) for i in range(workers)]
+        self._sessions: Dict[int, str] = {}
+        self._next_id = 0
+        self._monitor: Optional[asyncio.Task] = None
+
+    def shard(self, user_id: int) -> int:
+        return user_id % len(self._workers)
+
+    # ------------------------ Process management ------------------------
+    def _spawn(self, worker: _Worker):
+        loop = asyncio.get_running_loop()
+        parent, child = self._ctx.Pipe()
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(child, worker.worker_id, self.runner, self.permanent, self.warmup),
+            name=f"userbot-worker-{worker.worker_id}",
+            daemon=True,
+        )
+        worker.process.start()
+        child.close()
+        worker.conn = parent
+        loop.add_reader(parent.fileno(), self._on_reply, worker)
+
+    def _on_reply(self, worker: _Worker):
+        try:
+            req_id, ok, result = worker.conn.recv()
+        except (EOFError, OSError):
+            self._detach(worker, "worker pipe closed")
+            return
+        if req_id is None:
+            if ok == "notify":
+                notifier.notify(*result)
+            elif ok == "activity":
+                activity.record_many(result)
+            elif ok == "state":
+                self._state(*result)
+            return
+        fut = worker.pending.pop(req_id, None)
+        if fut is not None and not fut.done():
+            if ok:
+                fut.set_result(result)
+            else:
+                fut.set_exception(UserbotStartError(*result))
+
+    def _state(self, user_id: int, running: bool):
+        if self.on_state is not None:
+            try:
+                self.on_state(user_id, running)
+            except Exception as e:
+                log.warning(f"⚠️ on_state hook failed for {user_id}: {e}")
+
+    def _detach(self, worker: _Worker, reason: str):
+        if worker.conn is not None:
+            asyncio.get_running_loop().remove_reader(worker.conn.fileno())
+            worker.conn.close()
+            worker.conn = None
+        for fut in worker.pending.values():
+            if not fut.done():
+                fut.set_exception(RuntimeError(reason))
+        worker.pending.clear()
+
+    async def start_workers(self):
+        for worker in self._workers:
+            self._spawn(worker)
+        self._monitor = asyncio.create_task(self._watch(), name="userbot-worker-monitor")
+        log.info(f"👷 Started {len(self._workers)} userbot worker process(es)")
+
+    async def _watch(self):
+        """Respawn dead workers and restart the sessions they owned."""
+        while True:
+            await asyncio.sleep(self.monitor_interval)
+            for worker in self._workers:
+                if worker.process is None or worker.process.is_alive():
+                    continue
+                log.warning(f"💥 Worker {worker.worker_id} died (exit {worker.process.exitcode}); respawning")
+                try:
+                    await self._respawn(worker)
+                except Exception as e:
+                    # Retried on the next pass if the new process died too
+                    log.warning(f"⚠️ Could not respawn worker {worker.worker_id}: {e}")
+
+    async def _respawn(self, worker: _Worker):
+        self._detach(worker, "worker died")
+        # Its clients died with it; each reports running again once reconnected
+        for user_id in self._sessions:
+            if self.shard(user_id) == worker.worker_id:
+                self._state(user_id, False)
+        self._spawn(worker)
+        await self._request(worker, "settings", {
+            user_id: data for user_id, data in all_settings().items() if self.shard(user_id) == worker.worker_id
+        })
+        for user_id, session in list(self._sessions.items()):
+            if self.shard(user_id) == worker.worker_id:
+                try:
+                    await self._request(worker, "start", user_id, session)
+                except Exception as e:
+                    log.warning(f"⚠️ Could not restart {user_id} on worker {worker.worker_id}: {e}")
+
+    async def _request(self, worker: _Worker, command: str, *args, timeout: Optional[float] = None):
+        if worker.conn is None:
+            raise RuntimeError(f"worker {worker.worker_id} is not running")
+        self._next_id += 1
+        req_id = self._next_id
+        fut = asyncio.get_running_loop().create_future()
+        worker.pending[req_id] = fut
+        worker.conn.send((req_id, command, *args))
+        try:
+            return await asyncio.wait_for(fut, timeout or self.request_timeout)
+        finally:
+            worker.pending.pop(req_id, None)
+
+    # ------------------------ Supervisor interface ------------------------
+    async def start(self, user_id: int, session_string: str, wait: bool = False, timeout: float = 60.0) -> bool:
+        self._sessions[user_id] = session_string
+        worker = self._workers[self.shard(user_id)]
+        return await self._request(worker, "start", user_id, session_string, wait, timeout, timeout=timeout + 5)
+
+    async def stop(self, user_id: int) -> bool:
+        self._sessions.pop(user_id, None)
+        return await self._request(self._workers[self.shard(user_id)], "stop", user_id)
+
+    async def restart(self, user_id: int) -> bool:
+        return await self._request(self._workers[self.shard(user_id)], "restart", user_id)
+
+    async def restore(self, db, **kwargs):
+        return await restore_sessions(db, self, **kwargs)
+
+    async def set_settings(self, user_id: int, settings: Optional[dict]):
+        # Kept in the controller too, so a respawned worker gets them back
+        set_settings(user_id, settings)
+        await self._request(self._workers[self.shard(user_id)], "settings", {user_id: settings})
+
+    async def load_settings(self, settings: Dict[int, dict]):
+        """Install stored settings for many users with one request per worker."""
+        shards: Dict[int, Dict[int, dict]] = {}
+        for user_id, data in settings.items():
+            set_settings(user_id, data)
+            shards.setdefault(self.shard(user_id), {})[user_id] = data
+        await asyncio.gather(*(
+            self._request(self._workers[shard], "settings", batch) for shard, batch in shards.items()
+        ))
+
+    async def status(self) -> dict:
+        """UserbotSupervisor.status() summed over workers; per-worker details under "workers"."""
+        total = {"running": 0, "users": [], "restarts": 0, "workers": []}
+        for worker in self._workers:
+            alive = worker.process is not None and worker.process.is_alive()
+            entry = {"worker": worker.worker_id, "pid": worker.process.pid if worker.process else None, "alive": alive}
+            if alive:
+                try:
+                    entry.update(await self._request(worker, "status"))
+                except Exception as e:
+                    entry["error"] = str(e)
+            total["running"] += entry.get("running", 0)
+            total["users"].extend(entry.get("users", ()))
+            total["restarts"] += entry.get("restarts", 0)
+            total["workers"].append(entry)
+        return total
+
+    async def reload_dictionary(self, path: str) -> int:
+        """Rebuild the artifact once here, then have every worker map it."""
+        index = await asyncio.get_running_loop().run_in_executor(None, build_index, path)
+        await asyncio.gather(*(
+            self._request(worker, "reload", path, timeout=120)
+            for worker in self._workers if worker.conn is not None
+        ))
+        return len(index)
+
+    async def metrics(self):
+        """Every worker's metrics plus the controller's, labelled by worker."""
+        snapshots = [((("worker", "main"),), REGISTRY.collect())]
+        for worker in self._workers:
+            if worker.conn is None:
+                continue
+            try:
+                snapshots.append(((("worker", str(worker.worker_id)),), await self._request(worker, "metrics")))
+            except Exception as e:
+                log.warning(f"⚠️ No metrics from worker {worker.worker_id}: {e}")
+        return merge(snapshots)
+
+    async def profile(self, enabled: Optional[bool] = None) -> dict:
+        """Switch profiling here and in every worker, then merge their reports."""
+        if enabled is not None:
+            loop_monitor.set_profiling(enabled)
+        reports = [loop_monitor.report()]
+        for worker in self._workers:
+            if worker.conn is None:
+                continue
+            try:
+                reports.append(await self._request(worker, "profile", enabled))
+            except Exception as e:
+                log.warning(f"⚠️ No profile from worker {worker.worker_id}: {e}")
+        return loop_monitor.merge_reports(reports)
+
+    async def stop_all(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        for worker in self._workers:
+            if worker.conn is not None:
+                try:
+                    await self._request(worker, "shutdown")
+                except Exception as e:
+                    log.warning(f"⚠️ Worker {worker.worker_id} did not shut down cleanly: {e}")
+                self._detach(worker, "pool stopped")
+            if worker.process is not None:
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+        self._sessions.clear()